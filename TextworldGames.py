@@ -43,4 +43,19 @@ class TextworldGames():
             Integer of the arbitrary maximum number of steps allowed for that game.
         """
         
-        return self.games_and_paths[code]["max_steps"]
\ No newline at end of file
+        return self.games_and_paths[code]["max_steps"]
+    
+    def get_game_data_path(self, code):
+        """Getter to build and return the full path to a game's saved world data.
+    
+        tw-make saves the game world as a .json file alongside the game itself.
+    
+        Args:
+            code: shortcode of the game to be returned. 
+
+        Returns:
+            String of the full relative filepath to the game .json file.
+        """
+        
+        file_path = self.get_game_path(code)
+        return file_path[:file_path.rindex(".")] + ".json"
\ No newline at end of file
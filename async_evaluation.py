@@ -0,0 +1,177 @@
+"""Plays the Episodes of a Population concurrently, using asyncio.
+
+Every Episode is a coroutine that alternates between asking for the network
+ outputs of its current input, and playing the chosen step in its game. The
+ requests for outputs from all the waiting Episodes are gathered into batches,
+ each evaluated in one forward pass, while the game steps of other Episodes
+ run in a thread pool. So inference and the game interpreters work at the
+ same time, rather than taking turns as in the lockstep mode.
+
+Typical usage example:
+
+  foo = AsyncEvaluation(layer_weights, layer_biases, layer_activations, 8)
+  foo.run(episodes)
+"""
+
+import asyncio
+import concurrent.futures
+import numpy as np
+import inference
+
+class AsyncEvaluation():
+    """Plays the Episodes of a Population concurrently, using asyncio.
+
+    Attributes:
+        layer_weights: list, per layer, of the stacked weights of the Population.
+        layer_biases: list, per layer, of the stacked biases of the Population.
+        layer_activations: list, per layer, of the activation keyword of each
+         Network of the Population.
+        step_workers: INT count of threads playing game steps, or 0 to play
+         them in the event loop, for games which do not wait on anything.
+        pending_requests: list of the (network_id, input, future) requests
+         waiting for the next batch.
+        batch_scheduled: Boolean, True while a batch is waiting to be evaluated.
+        batches_count: INT count of the forward passes evaluated.
+        inference_executor: the thread pool of the forward passes, while running.
+        step_executor: the thread pool of the game steps, while running.
+    """
+
+    def __init__(self, layer_weights, layer_biases, layer_activations, step_workers):
+        self.layer_weights = layer_weights
+        self.layer_biases = layer_biases
+        self.layer_activations = layer_activations
+        self.step_workers = step_workers
+        self.pending_requests = []
+        self.batch_scheduled = False
+        self.batches_count = 0
+        self.inference_executor = None
+        self.step_executor = None
+
+    def run(self, episodes):
+        """Plays every Episode through to the end.
+
+        Args:
+            episodes: list of the Episode of each Network of the Population,
+             in Population order.
+
+        Returns:
+            None. Each Episode holds its fitness once finished.
+        """
+
+        # Inference has a thread of its own, so that the event loop can keep
+        #  handing game steps to the step threads while a batch is evaluated.
+        # NumPy and the TextWorld interpreter, which runs in a process of its
+        #  own, both release the GIL while they work.
+
+        self.inference_executor = concurrent.futures.ThreadPoolExecutor(1)
+        if self.step_workers > 0:
+            self.step_executor = concurrent.futures.ThreadPoolExecutor(self.step_workers)
+        try:
+            asyncio.run(self.play_all(episodes))
+        finally:
+            self.inference_executor.shutdown()
+            if self.step_executor is not None:
+                self.step_executor.shutdown()
+                self.step_executor = None
+
+    async def play_all(self, episodes):
+        """Coroutine playing every Episode concurrently.
+
+        Args:
+            episodes: list of the Episode of each Network of the Population.
+
+        Returns:
+            None.
+        """
+
+        await asyncio.gather(*[
+            self.play(network_id, episodes[network_id])
+            for network_id in range(len(episodes))
+            ])
+
+    async def play(self, network_id, episode):
+        """Coroutine playing one Episode through to the end.
+
+        Args:
+            network_id: INT element of the Population playing the Episode.
+            episode: the Episode to be played.
+
+        Returns:
+            None.
+        """
+
+        loop = asyncio.get_running_loop()
+        while not episode.finished:
+            nn_outputs = await self.infer(network_id, episode.get_input_state())
+            if self.step_executor is None:
+                episode.take_step(nn_outputs)
+            else:
+                await loop.run_in_executor(self.step_executor, episode.take_step, nn_outputs)
+
+    async def infer(self, network_id, nn_input):
+        """Coroutine returning the outputs of a Network for an input.
+
+        The request waits to be evaluated in the next batch.
+
+        Args:
+            network_id: INT element of the Population to be evaluated.
+            nn_input: numpy array of the input of the Network.
+
+        Returns:
+            A numpy array of the Network outputs.
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending_requests.append((network_id, nn_input.copy(), future))
+        if not self.batch_scheduled:
+            self.batch_scheduled = True
+            loop.create_task(self.evaluate_batch())
+        return await future
+
+    async def evaluate_batch(self):
+        """Coroutine evaluating all the pending requests in one forward pass.
+
+        Args:
+            None.
+
+        Returns:
+            None. Sets the result of each request's future.
+        """
+
+        # Give every Episode that is ready a chance to join the batch first.
+
+        await asyncio.sleep(0)
+        requests = self.pending_requests
+        self.pending_requests = []
+        self.batch_scheduled = False
+
+        # A failed batch fails the requests waiting on it, rather than leaving
+        #  their Episodes waiting forever.
+
+        try:
+            network_ids = [request[0] for request in requests]
+            nn_inputs = np.stack([request[1] for request in requests])
+            layer_weights = [weights[network_ids] for weights in self.layer_weights]
+            layer_biases = [biases[network_ids] for biases in self.layer_biases]
+            layer_activations = [
+                [activations[network_id] for network_id in network_ids]
+                for activations in self.layer_activations
+                ]
+
+            loop = asyncio.get_running_loop()
+            nn_outputs = await loop.run_in_executor(
+                self.inference_executor,
+                inference.Inference.forward_batch,
+                nn_inputs,
+                layer_weights,
+                layer_biases,
+                layer_activations
+                )
+        except Exception as error:
+            for request in requests:
+                request[2].set_exception(error)
+            return
+        self.batches_count += 1
+        for row in range(len(requests)):
+            requests[row][2].set_result(nn_outputs[row])
@@ -1,7 +1,8 @@
 """Holds methods to control breeding of networks and the details of that.
 
 The main method is called to generate a crossed and mutated child network.
-The sub-methods perform the actual crossing and mutation of the passed floats.
+The sub-methods perform the actual crossing and mutation of the passed floats,
+ or of whole weight arrays at once.
 
 Typical usage example:
 
@@ -9,9 +10,9 @@ Typical usage example:
   bar = foo.cross_and_mutate()
 """
 
-from copy import deepcopy
 import random
 import numpy as np
+import population
 
 class Breeding():
     """Holds methods to control breeding of networks and the details of that.
@@ -20,6 +21,12 @@ class Breeding():
     The sub-methods perform the actual crossing and mutation of the passed floats.
     """
     
+    # The most weights crossed and mutated at once when breeding a generation,
+    #  so that the arrays drawn for them stay small however many children
+    #  there are.
+    
+    chunk_elements = 1 << 20
+    
     def network_cross_and_mutate(
         self,
         sim_population,
@@ -53,13 +60,9 @@ class Breeding():
         
         child_nn_definition = {}
 
-        # Select two parent networks from the population, 
-        #  until two unique parents are chosen
+        # Select two unique parent networks from the population
         
-        parent_1 = sim_population.get_weighted_parent()
-        parent_2 = parent_1
-        while parent_1 == parent_2:
-            parent_2 = sim_population.get_weighted_parent()
+        parent_1, parent_2 = sim_population.get_weighted_parent_pairs(1)[0].tolist()
         
         # Fitness checks and modifications
         
@@ -106,45 +109,29 @@ class Breeding():
         
         # Create a child neural network from the parents,
         #  and potentially affected by mutation.
-        # Create the child hidden layer weights as a full copy of parent 1.
+        # The child hidden layer weights and biases start as parent 1's.
         # Then as necessary, replace with values from parent 2,
-        #  thus achieving crossover breeding.
-        
-        child_network_weights_bias = deepcopy(parent_1_nn_weights_bias)
-        child_network_weights = child_network_weights_bias[0]
-
-        # Iterate through child hidden layer weights,
-        #  applying crossover and mutation to each
-        
-        completed_iterations = 0
-        
-        # pass child_network_weights[0] and parent_2_nn_weights_bias[0][0],
-        #  and weighted chance of parent_2 being selected
+        #  thus achieving crossover breeding, for every weight of the layer
+        #  at once.
         
-        for i in range (len(child_network_weights[0])):
-            # Crossover
-            
-            child_network_weights[0][i] = self.float_cross_and_mutate(
+        child_network_weights_bias = []
+        for element in range(len(parent_1_nn_weights_bias)):
+            child_network_weights_bias.append(self.array_cross_and_mutate(
                 "weight",
-                child_network_weights[0][i],
-                parent_2_nn_weights_bias[0][0][i],
+                parent_1_nn_weights_bias[element],
+                parent_2_nn_weights_bias[element],
                 point_mutation_chance,
                 point_mutation_amount,
                 fitness_bias
-                )
-            completed_iterations += 1
-            
-  
-        # Write the new weights back to the weights+biases variable, 
-        #  for later writing to the network object.
-        
-        child_network_weights_bias[0] = child_network_weights
+                ))
         
         # Now crossover and mutate the floats in the DNA
         # Again start with the child being a full copy of parent 1,
         #  then achieve crossover by replacing with parts of parent_2.
+        # The Population builds a new definition on every call, so the
+        #  child can take this one over without copying it.
         
-        child_nn_definition = deepcopy(parent_1_nn_definition)
+        child_nn_definition = sim_population.get_neural_network_def(parent_1)
         
         # Nothing in the input layer to crossover or mutate.
         #  If we change the inputs then the network will not be able to
@@ -195,48 +182,23 @@ class Breeding():
             
         # This will retrieve the last elements of the layers information,
         #  which will be the output layer.
-        # This layer also has 512 weights
+        # This layer has 512 * 5 weights and 5 biases
         
         parent_1_nn_output_weights_bias = sim_population.get_weight_bias_definitions(parent_1, 2)
         parent_2_nn_output_weights_bias = sim_population.get_weight_bias_definitions(parent_2, 2)
                 
-        # Create the child output layer weights as a full copy of parent 1.
-        # Then if necessary, replace with values from parent 2,
-        #  thus achieving crossover breeding.
-        
-        child_network_output_weights_bias = deepcopy(parent_1_nn_output_weights_bias)
-        child_network_output_weights = child_network_output_weights_bias[0]
-        child_network_output_weights_initial = deepcopy(child_network_output_weights)
-        
-        # Randomly sample to make sure the copy worked
+        # Create the child output layer weights and biases in the same way.
         
-        for i in range(10):
-            rand = random.randint(
-                0,
-                len(parent_1_nn_output_weights_bias[0][0]) - 1
-                )
-        
-        # Iterate through the child output layer weights,
-        #  applying crossover and mutation to each
-        
-        completed_iterations = 0
-        for i in range (len(child_network_output_weights[0])):
-            # Crossover
-            
-            child_network_output_weights[0][i] = self.float_cross_and_mutate(
+        child_network_output_weights_bias = []
+        for element in range(len(parent_1_nn_output_weights_bias)):
+            child_network_output_weights_bias.append(self.array_cross_and_mutate(
                 "weight",
-                child_network_output_weights[0][i],
-                parent_2_nn_output_weights_bias[0][0][i],
+                parent_1_nn_output_weights_bias[element],
+                parent_2_nn_output_weights_bias[element],
                 point_mutation_chance,
                 point_mutation_amount,
                 fitness_bias
-                )
-            completed_iterations += 1
-
-        # Write the new weights back to the weights+biases variable,
-        #  for later writing to the network object.       
-             
-        child_network_output_weights_bias[0] = child_network_output_weights
+                ))
         
         # Get parent serial numbers and write everything to the child definition
         
@@ -252,6 +214,129 @@ class Breeding():
 
         return child_nn_obj
     
+    def breed_generation(
+        self,
+        sim_population,
+        serial_number,
+        children_count,
+        point_mutation_scalar,
+        point_mutation_chance,
+        point_mutation_amount,
+        point_mutation_chance_max,
+        point_mutation_amount_max,
+        fitness_bias_scalar
+        ):
+        """Crosses and mutates the Population to define a whole generation.
+
+        The generation equivalent of calling network_cross_and_mutate() once
+         per child. All the parent pairs are selected in one draw, and the
+         weights of the children are crossed and mutated together as arrays
+         stacked by child, up to chunk_elements weights at a time.
+
+        Args:
+            sim_population: the Population instance being evaluated.
+            serial_number: INT serial number of the first child, the rest
+             following in sequence.
+            children_count: INT number of child Networks to create.
+            point_mutation_scalar: int scaling mutation of unfit networks.
+            point_mutation_chance: float probability of mutation.
+            point_mutation_amount: float amount of mutation.
+            point_mutation_chance_max: float maximum chance, if scaled.
+            point_mutation_amount_max: float maximum amount, if scaled.
+            fitness_bias_scalar: float how much to favour the more fit parent.
+
+        Returns:
+            A new Population instance holding the child Networks.
+        """
+        
+        # Select all the pairs of unique parent networks from the population.
+        
+        parents = sim_population.get_weighted_parent_pairs(children_count)
+        parent_1 = parents[:, 0]
+        parent_2 = parents[:, 1]
+        
+        # Fitness checks and modifications, per child, as described in
+        #  network_cross_and_mutate().
+        
+        fitnesses = sim_population.get_fitnesses()
+        parent_1_fitness = fitnesses[parent_1]
+        parent_2_fitness = fitnesses[parent_2]
+        fitness_bias = (parent_2_fitness / (parent_1_fitness + parent_2_fitness) - 0.5) * fitness_bias_scalar
+        
+        # If both parents have fitness of 1 then neither succeeded at the game
+        # Increase the mutation chance and factor for that child.
+        
+        both_unfit = (parent_1_fitness == 1) & (parent_2_fitness == 1)
+        mutation_chance = np.where(
+            both_unfit,
+            min(point_mutation_chance * point_mutation_scalar, point_mutation_chance_max),
+            point_mutation_chance
+            )
+        mutation_amount = np.where(
+            both_unfit,
+            min(point_mutation_amount * point_mutation_scalar, point_mutation_amount_max),
+            point_mutation_amount
+            )
+        
+        # Cross and mutate the weights and biases of every layer, for as many
+        #  children at once as fit in chunk_elements. The per-child settings
+        #  are shaped to broadcast along the trailing dimensions of each
+        #  stacked array.
+        
+        layer_weights, layer_biases, layer_activations = sim_population.get_stacked_layers()
+        child_layer_weights = []
+        child_layer_biases = []
+        for layer in range(len(layer_weights)):
+            for stacked, child_stacks in (
+                (layer_weights[layer], child_layer_weights),
+                (layer_biases[layer], child_layer_biases)
+                ):
+                per_child = (-1,) + (1,) * (stacked.ndim - 1)
+                child_stack = np.empty((children_count,) + stacked.shape[1:], dtype = stacked.dtype)
+                chunk_size = max(1, self.chunk_elements // max(1, child_stack[0].size))
+                for start in range(0, children_count, chunk_size):
+                    chunk = slice(start, start + chunk_size)
+                    child_stack[chunk] = self.array_cross_and_mutate(
+                        "weight",
+                        stacked[parent_1[chunk]],
+                        stacked[parent_2[chunk]],
+                        mutation_chance[chunk].reshape(per_child),
+                        mutation_amount[chunk].reshape(per_child),
+                        fitness_bias[chunk].reshape(per_child)
+                        )
+                child_stacks.append(child_stack)
+        
+        # Cross and mutate the type and activation floats in the DNA, for
+        #  every child at once. Nothing in the input layer to crossover or
+        #  mutate, see network_cross_and_mutate().
+        
+        child_definitions = []
+        for stacked in sim_population.get_stacked_definitions():
+            child_definitions.append(self.array_cross_and_mutate(
+                "definition",
+                stacked[parent_1],
+                stacked[parent_2],
+                mutation_chance[:, None],
+                mutation_amount[:, None],
+                fitness_bias[:, None]
+                ))
+        
+        # Store the children straight into the arrays of a new Population.
+        
+        serial_numbers = sim_population.serial_numbers[:sim_population.get_population_size()]
+        children = population.Population()
+        children.add_stacked_networks(
+            sim_population.get_neural_network_def(0),
+            np.arange(serial_number, serial_number + children_count),
+            np.stack((serial_numbers[parent_1], serial_numbers[parent_2]), axis = 1),
+            child_definitions[0],
+            child_definitions[1],
+            child_layer_weights,
+            child_layer_biases
+            )
+        
+        return children
+    
     def float_cross_and_mutate(
         self,
         weight_or_def,
@@ -313,4 +398,85 @@ class Breeding():
             elif result > range_max:
                 result = range_max
         
-        return result
\ No newline at end of file
+        return result
+    
+    def array_cross_and_mutate(
+        self,
+        weight_or_def,
+        child_values,
+        parent_values,
+        point_mutation_chance,
+        point_mutation_amount,
+        fitness_bias=0
+        ):
+        """Crosses and mutates every element of the two arrays provided.
+
+        The array equivalent of float_cross_and_mutate(), with the same
+         crossover and mutation chances applied to each element independently.
+        The chances, amount, and bias may also be arrays, as long as they
+         broadcast against the values.
+
+        Args
+            weight_or_def: string separating if weight or definition is the input.
+            child_values: numpy array of the child network, copied from parent_1.
+            parent_values: numpy array of parent_2 values to be considered.
+            point_mutation_chance: float chance of mutation, previously scaled.
+            point_mutation_amount: float maximum amount of mutation, previously scaled.
+            fitness_bias: float bias to the more fit of the parents.
+
+        Returns:
+            A new numpy array, of the dtype of child_values, to be used for the
+             child network weights or definitions.
+        """
+        
+        # Weights have a range from -1.0 to 1.0
+        # Definitions have a range from 0.0 to 1.0
+        
+        if weight_or_def == "weight":
+            range_min = -1.0
+            range_max = 1.0
+        elif weight_or_def == "definition":
+            range_min = 0.0
+            range_max = 1.0
+        
+        child_values = np.asarray(child_values)
+        shape = np.broadcast_shapes(
+            child_values.shape,
+            np.shape(parent_values),
+            np.shape(point_mutation_chance),
+            np.shape(point_mutation_amount),
+            np.shape(fitness_bias)
+            )
+        generator = self.get_generator()
+        
+        # Choose either the child value, which is currently a copy of parent_1,
+        #  or the parent_2 value, for every element at once.
+        
+        threshold = np.clip(0.5 + np.asarray(fitness_bias), -1.0, 1.0)
+        crossover = generator.random(shape, dtype = np.float32) < threshold
+        result = np.where(crossover, parent_values, child_values).astype(child_values.dtype, copy = False)
+        del crossover
+        
+        # Now mutate the selected values, or not, capping only the mutated
+        #  values to the range. Only the mutated values are drawn an amount.
+        
+        mutate = generator.random(shape, dtype = np.float32) < point_mutation_chance
+        mutation_amount = generator.random(np.count_nonzero(mutate), dtype = np.float32) * 2 - 1
+        mutation_amount *= np.broadcast_to(point_mutation_amount, shape)[mutate]
+        result[mutate] = np.clip(result[mutate] + mutation_amount, range_min, range_max)
+        
+        return result
+    
+    def get_generator(self):
+        """Getter of a NumPy Generator seeded from the global NumPy RNG.
+
+        The Generator draws float32 values directly, where np.random draws
+         only float64, while seeding it from np.random keeps breeding
+         repeatable after np.random.seed(), or after restoring the RNG state
+         saved in a checkpoint.
+
+        Returns:
+            A new numpy.random.Generator instance.
+        """
+        
+        return np.random.default_rng(np.random.randint(0, 2 ** 32, 4, dtype = np.uint64))
\ No newline at end of file
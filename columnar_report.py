@@ -0,0 +1,161 @@
+"""Writes the networks of each generation to a typed, columnar file.
+
+The same details as nn_and_results_data.csv, but each column is held as a
+ typed array rather than as formatted text, so the results can be loaded for
+ analysis without parsing, and take a fraction of the space on disk. Each
+ generation is written in one call to its own file, as a Parquet table if
+ pyarrow is installed, otherwise as a NumPy .npz archive.
+
+The columns are those of Population.get_report_columns(), after a generation
+ column, -1 for the initial population, and a stage column, of "initial",
+ "after_evaluation", or "after_carryover".
+
+Typical usage example:
+
+  foo = ColumnarReport(hyperparameters, "parquet")
+  foo.write_generation(0, after_evaluation_columns, after_carryover_columns)
+  bar = ColumnarReport.load_columns(foo.get_file_path(0))
+"""
+
+import numpy as np
+
+class ColumnarReport():
+    """Writes the networks of each generation to a typed, columnar file.
+
+    Attributes:
+        fulldir: str of the experiment folder, under experiments/, or None if
+         no reporting to disk is to be done.
+        file_format: str of "parquet" or "npz", the format the files are
+         written in.
+    """
+
+    def __init__(self, hyperparameters, file_format="parquet"):
+        """Chooses the experiment folder and the file format.
+
+        If the experiment number is specified as 0 then no reporting to disk
+         will be done, as for Reporting.output_simulation_to_csv().
+
+        Args:
+            hyperparameters: DICT containing all the experimental settings. The
+             collection number and experiment number are used here.
+            file_format: str of "parquet", or "npz". Parquet falls back to npz
+             if pyarrow is not installed.
+        """
+
+        self.fulldir = None
+        maindir = hyperparameters['collection_number']
+        subdir = hyperparameters['experiment']
+        if subdir != 0 and maindir != 0:
+            self.fulldir = maindir + "/" + subdir
+
+        # pyarrow is optional, so only try to import it when Parquet files
+        #  are wanted, and warn if it has to fall back.
+
+        if file_format == "parquet":
+            try:
+                import pyarrow
+            except ImportError:
+                print("Note, pyarrow is not installed, results are written as .npz instead of Parquet.")
+                file_format = "npz"
+        self.file_format = file_format
+
+    def get_file_path(self, generation):
+        """Getter to return the path of the file of a generation.
+
+        Args:
+            generation: INT of the generation, or -1 for the initial population.
+
+        Returns:
+            A str of the path of the file, under experiments/.
+        """
+
+        if generation == -1:
+            name = "initial"
+        else:
+            name = f"generation_{generation}"
+        return "experiments/" + str(self.fulldir) + "/nn_and_results_" + name + "." + self.file_format
+
+    def write_initial(self, initial_columns):
+        """Writes the file of the initial population.
+
+        Args:
+            initial_columns: DICT returned by Population.get_report_columns()
+             for the initial population.
+
+        Returns:
+            None. Writes the file to disk.
+        """
+
+        self.write_columns(-1, [("initial", initial_columns)])
+
+    def write_generation(self, generation, after_evaluation, after_carryover):
+        """Writes the file of a completed generation.
+
+        Args:
+            generation: INT of the generation.
+            after_evaluation: DICT returned by Population.get_report_columns()
+             after the population was evaluated.
+            after_carryover: DICT returned by Population.get_report_columns()
+             after the breeding and carryover.
+
+        Returns:
+            None. Writes the file to disk.
+        """
+
+        self.write_columns(generation, [
+            ("after_evaluation", after_evaluation),
+            ("after_carryover", after_carryover)
+            ])
+
+    def write_columns(self, generation, stages):
+        """Joins the columns of each stage, and writes them in one call.
+
+        Args:
+            generation: INT of the generation, or -1 for the initial population.
+            stages: list of (str stage, DICT of columns) tuples, in row order.
+
+        Returns:
+            None. Writes the file to disk.
+        """
+
+        if self.fulldir is None:
+            return
+
+        columns = {
+            "generation": np.concatenate([
+                np.full(len(stage_columns["serial_number"]), generation, dtype = np.int64)
+                for stage, stage_columns in stages
+                ]),
+            "stage": np.concatenate([
+                np.full(len(stage_columns["serial_number"]), stage)
+                for stage, stage_columns in stages
+                ])
+            }
+        for name in stages[0][1]:
+            columns[name] = np.concatenate([stage_columns[name] for stage, stage_columns in stages])
+
+        file_path = self.get_file_path(generation)
+        if self.file_format == "parquet":
+            import pyarrow
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(pyarrow.table(columns), file_path)
+        else:
+            np.savez_compressed(file_path, **columns)
+
+    @staticmethod
+    def load_columns(file_path):
+        """Loads the columns of a file written by a ColumnarReport.
+
+        Args:
+            file_path: str path of the .parquet or .npz file.
+
+        Returns:
+            A DICT of column name to a numpy array.
+        """
+
+        if file_path.endswith(".parquet"):
+            import pyarrow.parquet
+            table = pyarrow.parquet.read_table(file_path)
+            return {name: table.column(name).to_numpy() for name in table.column_names}
+        with np.load(file_path) as archive:
+            return {name: archive[name] for name in archive.files}
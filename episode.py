@@ -0,0 +1,274 @@
+"""Plays a single network's TextWorld game, one step at a time.
+
+The Episode holds the state of one game in progress: the environment, the
+ rolling history of previous action spaces and results, and the fitness once
+ the game is finished. Splitting the step into building the input state and
+ then applying the network's outputs allows the Simulation to run one network
+ at a time, or many networks together in lockstep with a single batched
+ forward pass per step.
+"""
+
+import hashlib
+import numpy as np
+import random
+import step_history
+
+class Episode():
+    """Plays a single network's TextWorld game, one step at a time.
+
+    Attributes:
+        environment: the TextWorld/Gym environment being played.
+        force_random_choice: Boolean to force random movement if the network
+         is repeating a previously failed action.
+        force_pickup: Boolean to force the network to pick up an available coin.
+        failed_step_reward: INT reward for making an invalid choice.
+        valid_step_reward: INT reward for making a valid choice.
+        chain_rewards: Boolean to sum previous valid step rewards, or not.
+        remaining_steps: INT count of steps left, decrementing from max_steps.
+        infos: DICT of the TextWorld infos returned by the last step.
+        action_space_values: numpy array of the one-hot action space of this step.
+        previous_action_spaces_and_choices: StepHistory of the retained steps.
+        finished: Boolean, True once the game is won or out of steps.
+        fitness: INT fitness of the network, None until finished.
+        detect_cycles: Boolean to end the episode as soon as the network
+         returns to a state it has already been in.
+        visited_states: set of the digests of the states visited so far.
+    """
+
+    # Per TextWorld docs, entities are everything in the game,
+    #  anywhere in the maze.
+    # Admissible commands are all the commands relevant to the current
+    #  game state. So this will change from step to step.
+    # Verbs - all as understood by the game, is static from step to step.
+    # To build the action space of available commands that could be
+    #  entered into the interpreter:
+    #   Get the verbs, and remove the ones that aren't necessary here
+    #   like drop, examine, inventory, and look.
+    #   Which leaves an action space of go * 4, one for each cardinal
+    #   direction, and take coin, since that's the only object in the game.
+
+    action_space = ["take coin", "go east", "go west", "go north", "go south"]
+
+    def __init__(
+        self,
+        environment,
+        max_steps,
+        force_random_choice,
+        force_pickup,
+        steps_to_retain,
+        failed_step_reward,
+        valid_step_reward,
+        chain_rewards,
+        detect_cycles=False
+        ):
+        self.environment = environment
+        self.force_random_choice = force_random_choice
+        self.force_pickup = force_pickup
+        self.failed_step_reward = failed_step_reward
+        self.valid_step_reward = valid_step_reward
+        self.chain_rewards = chain_rewards
+        self.remaining_steps = max_steps
+        self.finished = False
+        self.fitness = None
+        self.detect_cycles = detect_cycles and not force_random_choice
+        self.visited_states = set()
+        obs, self.infos = environment.reset()
+        self.action_space_values = np.zeros(len(self.action_space), dtype = np.float32)
+
+        # Setup the previous_action_spaces_and_choices to the right size for
+        #  storing the prescribed number of previous action spaces.
+
+        self.previous_action_spaces_and_choices = step_history.StepHistory(
+            steps_to_retain,
+            len(self.action_space)
+            )
+
+    def get_input_state(self):
+        """Builds the input state for the network for the current step.
+
+        Args:
+            None.
+
+        Returns:
+            A numpy float32 array of the current one-hot action space followed
+             by the retained previous action spaces, choices, and results.
+             The array is reused by the next step.
+        """
+
+        # Build the action space for this room/step - the curated list of
+        #  actions the network could legally make from the list of
+        #  available actions in this room.
+
+        # Poll the admissible actions - all the commands relevant to the
+        #  current game state.
+        # Parse through the curated action space, and mark as to if it's
+        #  also in the currently admissible commands.
+
+        # For each step, build the input tensor from a one-hot list of
+        #  which of the global permitted commands are valid in this room.
+        # So if there is no coin in the room, despite "take coin" being
+        #  globally valid, the action space for this room would have a 0 for
+        #  "take coin". The one-hot list for the steps in this room are
+        #  stored in action_space_values[].
+
+        for action in range(len(self.action_space)):
+            if self.action_space[action] in self.infos["admissible_commands"]:
+                self.action_space_values[action] = 1
+            else:
+                self.action_space_values[action] = 0
+
+        # Combine the current action space with the previous action
+        #  spaces and results, to build the full input state.
+
+        return self.previous_action_spaces_and_choices.get_input_state(self.action_space_values)
+
+    def take_step(self, nn_outputs):
+        """Chooses and plays the action for this step from the network outputs.
+
+        Must be called after get_input_state() for the same step.
+        If cycles are detected, and this step repeats an earlier state, the
+         game is finished without playing it.
+
+        Args:
+            nn_outputs: 1-D numpy array of the network's 5 action probabilities.
+
+        Returns:
+            None. Updates the instance, setting finished and fitness when the
+             game is won or the steps have run out.
+        """
+
+        # The network, and the game, are deterministic unless random
+        #  choices are forced. So if the network is back in a room with
+        #  exactly the same input as before, it will go round the same loop
+        #  again and again until it runs out of steps, and scores the
+        #  minimum fitness of 1. Stop it now instead.
+
+        if self.detect_cycles:
+            state = hashlib.blake2b(str(self.infos["location"]).encode())
+            state.update(self.previous_action_spaces_and_choices.input_state)
+            digest = state.digest()
+            if digest in self.visited_states:
+                self.finish(1)
+                return
+            self.visited_states.add(digest)
+
+        # Use argsort to determine the arrangement of the probabilities
+        #  in the returned list. This is required over argmax because there
+        #  is a chance that the most preferred step will be discarded.
+
+        sorted = nn_outputs.argsort()
+        descending = sorted[::-1]
+        nn_action = descending[0]
+
+        # Here is the editing out a choice which is proven to not work.
+        # In early testing the networks were very likely to get stuck,
+        #  repeatedly walking into the same wall or picking up a coin
+        #  that wasn't there.
+        # To avoid this, check the current observation, which is the result
+        #  of the last step in the game. If it suggests that there is no
+        #  coin to pick up, which is the response when the network tries to
+        #  pick up a coin that isn't there, or that the last step was
+        #  invalid, remove those choices from the possible actions.
+        # Basically, if the selected action is the same as the last action,
+        #  then check if that did anything. If it failed, choose the next
+        #  most likely option instead.
+        # Else, set the action to be what the network has decided.
+
+        # Use random choice instead of next most likely, if the flag is set
+
+        if descending[0] == nn_action and self.force_random_choice:
+            # The current step choice is the same as the previous.
+            # Check what happened the last time this step was taken
+
+            if self.previous_action_spaces_and_choices.oldest()[6] == self.failed_step_reward:
+                # Means last step resulted in walking into a wall
+                #  or trying to pick up a coin that wasn't there.
+                # Avoid doing that again by choosing a different action.
+
+                nn_action = descending[random.randint(1, len(descending) - 1)]
+        else:
+            # The last step didn't fail outright, accept network's choice
+            #  to try it again.
+
+            nn_action = descending[0]
+
+        # If flagged, force the network to pick the coin if it's available,
+        #  denoted by a action_space_values[0] == 1
+
+        if self.action_space_values[0] == 1 and self.force_pickup:
+            # action 0 is defined above as "take coin" - force it now since
+            #  there is a coin in the room and the flag is true
+
+            nn_action = 0
+
+        # Now, having determined which step the network would like to take,
+        #  or overriding and forcing the decision,
+        #  send that action to the game.
+
+        obs, score, done, self.infos = self.environment.step(self.action_space[nn_action])
+
+        # Evaluate the step.
+        # Check the info output to see if the network solved the game.
+        #  If so, the fitness is the number of steps still available when
+        #  decrementing from the max_steps. It's a Boolean, returning True|False.
+
+        if self.infos['won']:
+            self.finish(self.remaining_steps)
+            return
+
+        # If the network failed to find the coin in the maximum number of
+        #  steps then it is given the minimum fitness of 1.
+
+        if self.remaining_steps <= 1:
+            self.finish(1)
+            return
+        self.remaining_steps -= 1
+
+        # Determine if the step resulted in running into a wall or trying to
+        #  pick up a coin that wasn't there.
+        # After this we know the current action space, the step decision,
+        #  and the result of the step.
+        # So populate that into the previous choices array for the next step.
+
+        result_to_be_added = None
+        if obs.strip() == "You can't go that way." or obs.strip() == "You can't see any such thing.":
+            result_to_be_added = self.failed_step_reward
+        else:
+            # Here is a good step. The network didn't win the game, but also
+            #  didn't walk into a wall or try to pick up a coin that wasn't
+            #  there.
+            # Check if we are to chain the rewards, incrementing them as a
+            #  series of valid decisions are made, or not.
+
+            if self.chain_rewards:
+                previous_step_reward = self.previous_action_spaces_and_choices.newest()[6]
+                result_to_be_added = self.valid_step_reward + previous_step_reward
+            else:
+                result_to_be_added = self.valid_step_reward
+
+        # We have the current action space, the step decision, and the
+        #  result of the step. Populate that into the previous choices
+        #  for the next step, in place of the oldest entry, to keep it at
+        #  the required number of input steps.
+
+        self.previous_action_spaces_and_choices.append(
+            self.action_space_values,
+            nn_action,
+            result_to_be_added
+            )
+
+    def finish(self, fitness):
+        """Marks the episode as finished.
+
+        The environment is left open, for the Simulation to reuse it in
+         another episode.
+
+        Args:
+            fitness: INT fitness the network scored in this episode.
+
+        Returns:
+            None. Updates the instance.
+        """
+
+        self.finished = True
+        self.fitness = fitness
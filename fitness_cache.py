@@ -0,0 +1,149 @@
+"""Remembers the fitnesses of Networks already run through a game.
+
+A Network's fitness only depends on its weights, its activation functions,
+ and the settings of the game it plays, so long as random choices are not
+ forced. The cache is keyed by a BLAKE2 hash of all of those, so a Network
+ carried over from one generation to the next, or a child identical to an
+ earlier Network, is only run through the game once.
+
+The cache holds a bounded number of fitnesses, evicting the least recently
+ used, and can be saved to disk to be shared between the experiments of a
+ run_experiment.py sweep. The experiments of a sweep may run at the same time,
+ so each save merges in whatever the others have saved since.
+
+Typical usage example:
+
+  foo = FitnessCache(1000, "fitness_cache.json")
+  bar = foo.get_key(network_digest, settings)
+  baz = foo.get(bar)
+"""
+
+import collections
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+
+class FitnessCache():
+    """Remembers the fitnesses of Networks already run through a game.
+
+    Attributes:
+        max_entries: INT maximum number of fitnesses held.
+        file_path: str path of the file the cache is saved to, or None.
+        entries: OrderedDict of key to fitness, least recently used first.
+        hits: INT count of the fitnesses found in the cache.
+        misses: INT count of the fitnesses not found in the cache.
+    """
+
+    def __init__(self, max_entries, file_path=None):
+        """Creates the cache, loading any fitnesses saved at file_path.
+
+        Args:
+            max_entries: INT maximum number of fitnesses held.
+            file_path: str path of the file to load from and save to, or None
+             to keep the cache in memory only.
+        """
+
+        self.max_entries = max_entries
+        self.file_path = file_path
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if file_path is not None and os.path.exists(file_path):
+            with open(file_path) as cache_file:
+                for key, fitness in json.load(cache_file):
+                    self.set(key, fitness)
+
+    def get_key(self, network_digest, settings):
+        """Builds the cache key of a Network playing a game.
+
+        Args:
+            network_digest: bytes of the BLAKE2 digest of the Network weights
+             and DNA, see Population.get_network_digest().
+            settings: tuple of the game settings which affect the fitness.
+
+        Returns:
+            A str of the hex digest of the Network and the settings.
+        """
+
+        key = hashlib.blake2b(network_digest, digest_size = 32)
+        key.update(repr(settings).encode())
+        return key.hexdigest()
+
+    def get(self, key):
+        """Getter to return a cached fitness, marking it as recently used.
+
+        Args:
+            key: str key from get_key().
+
+        Returns:
+            The INT fitness, or None if it is not in the cache.
+        """
+
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def set(self, key, fitness):
+        """Setter to store a fitness, evicting the least recently used if full.
+
+        Args:
+            key: str key from get_key().
+            fitness: INT fitness to be stored.
+
+        Returns:
+            None. Updates the instance.
+        """
+
+        self.entries[key] = fitness
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last = False)
+
+    def save(self):
+        """Saves the cache to its file, if it has one.
+
+        Other processes may be saving to the same file, so the file is locked
+         while it is read, merged with this cache, and written. The fitnesses
+         saved by the others are kept as less recently used than this cache's
+         own, and the cache holds the merged fitnesses afterwards. The file is
+         replaced in one step, so a sweep reading it never sees it half
+         written.
+
+        Args:
+            None.
+
+        Returns:
+            None. Writes the file to disk.
+        """
+
+        if self.file_path is None:
+            return
+        folder = os.path.dirname(os.path.abspath(self.file_path))
+        with open(self.file_path + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            merged = collections.OrderedDict()
+            if os.path.exists(self.file_path):
+                with open(self.file_path) as cache_file:
+                    for key, fitness in json.load(cache_file):
+                        merged[key] = fitness
+            for key, fitness in self.entries.items():
+                merged[key] = fitness
+                merged.move_to_end(key)
+            while len(merged) > self.max_entries:
+                merged.popitem(last = False)
+            self.entries = merged
+
+            file_descriptor, temporary_path = tempfile.mkstemp(dir = folder, suffix = ".tmp")
+            try:
+                with os.fdopen(file_descriptor, "w") as cache_file:
+                    json.dump(list(self.entries.items()), cache_file)
+                os.replace(temporary_path, self.file_path)
+            except BaseException:
+                os.remove(temporary_path)
+                raise
@@ -0,0 +1,132 @@
+"""Shared fixtures of the unit tests.
+
+Seeds the random number generators, and builds Populations of random Networks
+ from them, so that every test run draws the same networks. Keras and
+ TensorFlow can be faked, for the tests of sharing models to run without them.
+
+Typical usage example:
+
+  foo = make_population(8, 13, 5, fitnesses = range(1, 9))
+"""
+
+import random
+import sys
+import types
+from unittest import mock
+import numpy as np
+import inference
+import network
+import population
+
+def seed_random(seed):
+    """Seeds both the random module and the NumPy random number generators.
+
+    Args:
+        seed: INT seed of both generators.
+
+    Returns:
+        None.
+    """
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+def make_population(size, inputs_size, seed, serial_number=0, fitnesses=None):
+    """Creates a Population of random Networks, after seeding the generators.
+
+    Args:
+        size: INT count of the Networks.
+        inputs_size: INT size of the input tensor of the Networks.
+        seed: INT seed of the random number generators.
+        serial_number: INT serial number of the first Network.
+        fitnesses: optional iterable of the fitness of each Network.
+
+    Returns:
+        The new Population instance.
+    """
+
+    seed_random(seed)
+    sim_population = population.Population()
+    sim_population.create_random_population(size, serial_number, inputs_size)
+    if fitnesses is not None:
+        for network_id, fitness in enumerate(fitnesses):
+            sim_population.set_nn_fitness(network_id, fitness)
+    return sim_population
+
+class FakeLayer():
+    """A Keras layer, keeping the weights and biases set on it.
+
+    Attributes:
+        weights: list of the numpy arrays set, None until set.
+    """
+
+    def __init__(self):
+        self.weights = None
+
+    def set_weights(self, weights):
+        self.weights = [np.array(values) for values in weights]
+
+
+class FakeModel():
+    """A Keras model of a Network's architecture, run with NumPy.
+
+    Attributes:
+        activations: tuple of the activation keyword of each layer.
+        layers: list of a FakeLayer per layer, the first being the input,
+         which has no weights.
+    """
+
+    def __init__(self, nn):
+        self.activations = nn.get_architecture_key()[2]
+        self.layers = [FakeLayer() for layer in range(len(self.activations) + 1)]
+
+    def __call__(self, values, training=False):
+        values = np.asarray(values, dtype = np.float32)
+        for layer in range(len(self.activations)):
+            weights, biases = self.layers[layer + 1].weights
+            values = inference.Inference.activate(values @ weights + biases, self.activations[layer])
+        return values
+
+
+class FakeTensor():
+    """A TensorFlow tensor of the values returned by a FakeModel.
+
+    Attributes:
+        values: numpy array of the values.
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def numpy(self):
+        return self.values
+
+
+# A tensorflow module of what the CompiledModel uses, whose tf.function
+#  calls the model in place of tracing it.
+
+fake_tensorflow = types.SimpleNamespace(
+    function = lambda forward, input_signature: lambda values: FakeTensor(forward(values)),
+    TensorSpec = lambda shape, dtype: (shape, dtype),
+    float32 = np.float32
+    )
+
+def fake_keras(test_case):
+    """Fakes Keras and TensorFlow until the end of a test.
+
+    Networks build a FakeModel in place of a Keras model, and importing
+     tensorflow gives fake_tensorflow.
+
+    Args:
+        test_case: the unittest.TestCase instance of the test.
+
+    Returns:
+        None.
+    """
+
+    for patcher in (
+        mock.patch.object(network.Network, "build_network_model", lambda nn: FakeModel(nn)),
+        mock.patch.dict(sys.modules, {"tensorflow": fake_tensorflow})
+        ):
+        patcher.start()
+        test_case.addCleanup(patcher.stop)
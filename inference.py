@@ -0,0 +1,156 @@
+"""Evaluates stacks of Dense layers directly from stored weights, using NumPy.
+
+The networks in a Population are all stacks of Dense layers, so a forward
+ pass is a matrix multiplication, a bias addition, and an activation function
+ per layer. Working from the stored weights allows many networks to be
+ evaluated together in one batched call.
+"""
+
+import numpy as np
+
+class Inference():
+    """Evaluates stacks of Dense layers directly from stored weights, using NumPy.
+    """
+
+    @staticmethod
+    def activate(values, activation_keyword):
+        """Applies the named activation function to an array.
+
+        Args:
+            values: numpy array of the layer pre-activation values.
+            activation_keyword: string keyword of the activation function, as
+             returned by Network.get_activation_function_keyword().
+
+        Returns:
+            A numpy array of the same shape, with the activation applied.
+        """
+
+        match activation_keyword:
+            case "relu":
+                return np.maximum(values, 0.0)
+            case "linear":
+                return values
+            case "sigmoid":
+                return 1.0 / (1.0 + np.exp(-values))
+            case "tanh":
+                return np.tanh(values)
+
+    @staticmethod
+    def forward_batch(inputs, layer_weights, layer_biases, layer_activations):
+        """Runs one input row through each of a batch of networks.
+
+        Row n of the inputs is fed to network n only, so every network in the
+         batch may have different weights and activation functions, as long as
+         they share the same layer shapes.
+
+        Args:
+            inputs: numpy array of shape (networks, inputs_size).
+            layer_weights: list, per layer, of numpy arrays of shape
+             (networks, layer_inputs, layer_outputs).
+            layer_biases: list, per layer, of numpy arrays of shape
+             (networks, layer_outputs).
+            layer_activations: list, per layer, of a list of the activation
+             keyword of each network.
+
+        Returns:
+            A numpy array of shape (networks, outputs) of the network outputs.
+        """
+
+        values = inputs
+        for layer in range(len(layer_weights)):
+            values = np.matmul(values[:, None, :], layer_weights[layer])[:, 0, :]
+            values = values + layer_biases[layer]
+
+            # Networks sharing an activation function are activated together.
+
+            keywords = np.asarray(layer_activations[layer])
+            for keyword in np.unique(keywords):
+                rows = np.flatnonzero(keywords == keyword)
+                values[rows] = Inference.activate(values[rows], keyword)
+        return values
+
+
+class NumpyModel():
+    """A single network's forward pass, callable in place of a Keras model.
+
+    Attributes:
+        weights: list, per layer, of the [weights, biases] numpy arrays.
+        activations: list, per layer, of the activation keyword.
+    """
+
+    def __init__(self, weights, activations):
+        self.weights = weights
+        self.activations = activations
+
+    def __call__(self, inputs):
+        """Runs a batch of inputs through the network.
+
+        Args:
+            inputs: array-like of shape (batch, inputs_size).
+
+        Returns:
+            A numpy array of shape (batch, outputs) of the network outputs.
+        """
+
+        values = np.asarray(inputs, dtype = np.float32)
+        for layer in range(len(self.weights)):
+            values = values @ self.weights[layer][0] + self.weights[layer][1]
+            values = Inference.activate(values, self.activations[layer])
+        return values
+
+
+class CompiledModel():
+    """A Keras model traced once by tf.function, with weights swapped in.
+
+    Networks with the same architecture can share one CompiledModel. Loading
+     a network's weights assigns the model variables, which the traced graph
+     reads, so the graph is never traced again for another network.
+
+    Attributes:
+        model: the Keras nn.Model of the architecture.
+        forward: the tf.function of the model forward pass, with an input
+         signature fixed to (batch, inputs_size) float32.
+    """
+
+    def __init__(self, network):
+        """Builds and traces the model of a network's architecture.
+
+        Args:
+            network: Network instance of the architecture to be compiled.
+        """
+
+        # TensorFlow is only imported when a compiled model is requested, as
+        #  Keras is for Network.get_network_model().
+
+        import tensorflow as tf
+
+        self.model = network.build_network_model()
+        self.forward = tf.function(
+            lambda values: self.model(values, training = False),
+            input_signature = [tf.TensorSpec((None, network.dna["inputs"]), tf.float32)]
+            )
+
+    def set_weights(self, weights):
+        """Loads a network's weights and biases into the model.
+
+        Args:
+            weights: list, per layer, of the [weights, biases] numpy arrays.
+
+        Returns:
+            None. Assigns the model variables.
+        """
+
+        for layer in range(len(weights)):
+            self.model.layers[layer + 1].set_weights(weights[layer])
+
+    def __call__(self, inputs):
+        """Runs a batch of inputs through the traced graph.
+
+        Args:
+            inputs: numpy float32 array of shape (batch, inputs_size).
+
+        Returns:
+            A numpy array of shape (batch, outputs) of the network outputs.
+        """
+
+        return self.forward(inputs).numpy()
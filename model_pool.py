@@ -0,0 +1,86 @@
+"""Shares one model between all the Networks of the same architecture.
+
+Every Network of a Population has the same layer widths, and only differs
+ from the others in its activation functions and its weights, so an
+ experiment only ever needs a handful of distinct models. The ModelPool
+ builds the model of each architecture once, on first use, and loads the
+ weights and biases of each Network into it in place as it is evaluated,
+ rather than building, and leaking, a new Keras model for every Network.
+
+Typical usage example:
+
+  foo = ModelPool()
+  bar = foo.get_model(network, "keras")
+  baz = bar(nn_input_tensor)
+"""
+
+import inference
+
+class ModelPool():
+    """Shares one model between all the Networks of the same architecture.
+
+    Attributes:
+        models: DICT of (backend, Network architecture key) to the model of
+         that architecture.
+        builds_count: INT count of the models built.
+        loads_count: INT count of the Networks loaded into a model.
+    """
+
+    def __init__(self):
+        self.models = {}
+        self.builds_count = 0
+        self.loads_count = 0
+
+    def get_model(self, network, backend="keras"):
+        """Returns the model of a Network's architecture, with its weights loaded.
+
+        The model is shared, so it only holds this Network's weights until
+         the next call.
+
+        Args:
+            network: the Network instance to be evaluated.
+            backend: str of "keras" for a Keras model, or "keras_compiled" for
+             an inference.CompiledModel.
+
+        Returns:
+            The Keras model or inference.CompiledModel, called in the same way.
+        """
+
+        # A Network without weights has them initialised by Keras, and saved
+        #  back, which a shared model cannot do, so it builds its own.
+
+        if len(network.weights) == 0:
+            return network.get_network_model()
+
+        key = (backend, network.get_architecture_key())
+        model = self.models.get(key)
+        if model is None:
+            if backend == "keras_compiled":
+                model = inference.CompiledModel(network)
+            else:
+                model = network.build_network_model()
+            self.models[key] = model
+            self.builds_count += 1
+
+        # The first layer of a Keras model is the input, which has no
+        #  weights, so the Network's layers start from the second.
+
+        if backend == "keras_compiled":
+            model.set_weights(network.weights)
+        else:
+            for layer in range(len(network.weights)):
+                model.layers[layer + 1].set_weights(network.weights[layer])
+        self.loads_count += 1
+        return model
+
+    def clear(self):
+        """Drops every model held, to be rebuilt when next needed.
+
+        Args:
+            None.
+
+        Returns:
+            None. Updates the instance.
+        """
+
+        self.models = {}
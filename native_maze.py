@@ -0,0 +1,229 @@
+"""Plays a coin_collector maze directly from its TextWorld game data.
+
+The coin_collector games are mazes of rooms with a single coin somewhere in
+ them. The full state of each game, the rooms, the exits between them, and
+ where the player and the coin start, is saved by tw-make in the .json file
+ next to the compiled game. The NativeMaze reads that file into a room graph
+ and walks it in-process, rather than running the game in the Glulx/Inform
+ interpreter, which is by far the most expensive part of a step.
+
+It answers the commands of the Episode action space as TextWorld does, with
+ the same admissible commands, the same observations for failed moves, and the
+ same won flag, through the same reset(), step(), and close() calls as a
+ TextWorld/Gym environment.
+
+Typical usage example:
+
+  foo = NativeMaze("tw_games/game.json")
+  obs, infos = foo.reset()
+  obs, score, done, infos = foo.step("go east")
+"""
+
+import json
+
+class NativeMaze():
+    """Plays a coin_collector maze directly from its TextWorld game data.
+
+    Attributes:
+        exits: DICT of room ID to a DICT of direction to the room ID it leads to.
+        room_names: DICT of room ID to the room name.
+        room_descriptions: DICT of room ID to the room description.
+        start_room: str room ID the player starts in.
+        coin_start_room: str room ID the coin starts in.
+        room: str room ID the player is in.
+        coin_room: str room ID the coin is in, None once it's taken.
+        moves: INT count of the commands played since reset().
+        won: Boolean, True once the coin has been taken.
+    """
+
+    # The replies of the game to a move into a wall, and to taking a coin
+    #  that is not in the room, exactly as TextWorld gives them.
+
+    failed_move_observation = "You can't go that way."
+    failed_take_observation = "You can't see any such thing."
+
+    # The world facts "east_of(a, b)" and so on mean room a is east of room b,
+    #  so from b, going east leads to a.
+
+    directions = {
+        "north_of": "north",
+        "south_of": "south",
+        "east_of": "east",
+        "west_of": "west"
+    }
+
+    def __init__(self, file_path):
+        """Reads the maze from the game data file.
+
+        Args:
+            file_path: str path to the .json file saved with the game.
+
+        Raises:
+            ValueError: if the game is not a coin_collector maze.
+        """
+
+        with open(file_path) as game_file:
+            game = json.load(game_file)
+
+        self.room_names = {}
+        self.room_descriptions = {}
+        for entity_id, entity in game["infos"]:
+            if entity["type"] == "r":
+                self.room_names[entity_id] = entity["name"]
+                self.room_descriptions[entity_id] = entity["desc"]
+
+        # Only the passages which are free can be walked through, so gather
+        #  those first, then the directions they lead in.
+
+        facts = []
+        for fact in game["world"]:
+            facts.append((fact["name"], [argument["name"] for argument in fact["arguments"]]))
+        free = set()
+        for name, arguments in facts:
+            if name == "free":
+                free.add((arguments[0], arguments[1]))
+
+        self.exits = {room: {} for room in self.room_names}
+        self.start_room = None
+        self.coin_start_room = None
+        coin_id = None
+        for entity_id, entity in game["infos"]:
+            if entity["name"] == "coin":
+                coin_id = entity_id
+        for name, arguments in facts:
+            if name in self.directions and (arguments[1], arguments[0]) in free:
+                self.exits[arguments[1]][self.directions[name]] = arguments[0]
+            elif name == "at" and arguments[0] == "P":
+                self.start_room = arguments[1]
+            elif name == "at" and arguments[0] == coin_id:
+                self.coin_start_room = arguments[1]
+
+        if self.coin_start_room is None:
+            raise ValueError(file_path + " is not a coin_collector maze.")
+
+        self.room = self.start_room
+        self.coin_room = self.coin_start_room
+        self.moves = 0
+        self.won = False
+
+    def reset(self):
+        """Starts the game again, with the player and the coin where they began.
+
+        Args:
+            None.
+
+        Returns:
+            A tuple of the str observation, and the DICT of infos.
+        """
+
+        self.room = self.start_room
+        self.coin_room = self.coin_start_room
+        self.moves = 0
+        self.won = False
+        return self.describe_room(), self.get_infos()
+
+    def step(self, command):
+        """Plays a command in the game.
+
+        Args:
+            command: str command, one of "take coin" or "go " and a direction.
+
+        Returns:
+            A tuple of the str observation, the INT score, the Boolean done,
+             and the DICT of infos.
+        """
+
+        self.moves += 1
+        if command == "take coin":
+            if self.coin_room == self.room:
+                self.coin_room = None
+                self.won = True
+                observation = "You pick up the coin from the ground."
+            else:
+                observation = self.failed_take_observation
+        elif command.startswith("go ") and command[3:] in self.exits[self.room]:
+            self.room = self.exits[self.room][command[3:]]
+            observation = self.describe_room()
+        else:
+            observation = self.failed_move_observation
+        return observation, int(self.won), self.won, self.get_infos()
+
+    def get_state(self):
+        """Getter to return the state of the game, to be restored later.
+
+        Args:
+            None.
+
+        Returns:
+            A tuple of the player room, coin room, moves, and won flag.
+        """
+
+        return (self.room, self.coin_room, self.moves, self.won)
+
+    def set_state(self, state):
+        """Setter to restore a state of the game from get_state().
+
+        Args:
+            state: tuple returned by get_state().
+
+        Returns:
+            None. Updates the instance.
+        """
+
+        self.room, self.coin_room, self.moves, self.won = state
+
+    def close(self):
+        """Nothing to release, but matches a TextWorld/Gym environment.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+
+        pass
+
+    def describe_room(self):
+        """Builds the observation of the room the player is in.
+
+        Args:
+            None.
+
+        Returns:
+            A str of the room name heading and description, and the coin if
+             it's in the room.
+        """
+
+        observation = "-= " + self.room_names[self.room].title() + " =-\n"
+        observation += self.room_descriptions[self.room]
+        if self.coin_room == self.room:
+            observation += "\n\nYou see a coin on the floor."
+        return observation
+
+    def get_infos(self):
+        """Builds the infos of the game state, as TextWorld would return them.
+
+        Only the infos used by the Simulation are given.
+
+        Args:
+            None.
+
+        Returns:
+            A DICT of the admissible_commands, location, moves, score, and won
+             infos.
+        """
+
+        admissible_commands = ["inventory", "look"]
+        for direction in self.exits[self.room]:
+            admissible_commands.append("go " + direction)
+        if self.coin_room == self.room:
+            admissible_commands.append("examine coin")
+            admissible_commands.append("take coin")
+        return {
+            "admissible_commands": sorted(admissible_commands),
+            "location": self.room_names[self.room],
+            "moves": self.moves,
+            "score": int(self.won),
+            "won": self.won
+        }
@@ -4,11 +4,14 @@ This module is for defining, creating, and updating Keras neural networks.
 Getter and setter methods interface between the instance data and the rest
  of the simulation, most frequently from a Population instance working with the
  networks assigned to it.
+The network can also be evaluated directly from its weights with NumPy, in
+ which case Keras is never imported.
 """
 
 import genome
-import keras
-from keras import layers
+import hashlib
+import inference
+import numpy as np
 
 class Network:
     """Defines and controls a neural network instance, using Keras.
@@ -18,12 +21,15 @@ class Network:
         fitness: int of the fitness score achieved by a Network instance.
         weights: list of numpy arrays for layer weights and biases.
         dna: dict of properties specific to this instance of the Network.
+        digest: bytes of the BLAKE2 digest of the weights, biases, and DNA,
+         or None if they have changed since it was last computed.
     """
     
     def __init__(self):
         self.genome = genome.Genome.get_gene_specifications()
         self.fitness = None
         self.weights = []
+        self.digest = None
         self.dna = {
             "meta":{
                 "serial_number": 0,
@@ -60,6 +66,7 @@ class Network:
         self.dna["meta"]["serial_number"] = serial_number
         self.dna["inputs"] = inputs_size
         self.weights = []
+        self.digest = None
     
     def get_network_dna(self):
         """Getter to return the instance DNA.
@@ -103,9 +110,7 @@ class Network:
         self.dna["meta"]["serial_number"] = serial_number
         self.save_weight_bias_definitions(1, hidden_weights)
         self.save_weight_bias_definitions(2, output_weights)
-        self.dna["meta"]["hidden_checksum"] = self.checksum_weights(1)
-        self.dna["meta"]["output_checksum"] = self.checksum_weights(2)
-        self.dna["meta"]["checksum"] = self.checksum()
+        self.update_checksums()
         self.dna["meta"]["parent_1"] = parent_1
         self.dna["meta"]["parent_2"] = parent_2
     
@@ -168,6 +173,7 @@ class Network:
             self.weights.append(weights)
         else:
             self.weights[layer] = weights
+        self.digest = None
     
     def get_network_model(self):
         """Builds the keras nn.Model of this instance, updating checksums.
@@ -187,6 +193,51 @@ class Network:
              are initialised.
         """
         
+        nn_model = self.build_network_model()
+        
+        # Right now the weights have been randomly generated.
+        # If there are already weights in this instance then overwrite.
+        # If there are no weights then this is a new instance - 
+        #  recover and save the randomised weights
+        # Gather the weights and biases of the layers, input, all hidden, 
+        #  and output layers are included in the method. The first is the 
+        #  input, which has no weights, so skip it.
+        
+        if len(self.weights) != 0:
+            for layer in range(1, len(nn_model.layers) - 0):
+                nn_model.layers[layer].set_weights(self.get_weight_bias_definitions(layer))
+        else:
+            for layer in range(1, len(nn_model.layers) - 0):
+                weights_biases = (nn_model.layers[layer].get_weights())
+                self.save_weight_bias_definitions(layer, weights_biases)
+                
+        # Update  metadata for this instance with  checksum weights of layers,
+        #  if the weights have changed since they were last calculated.
+             
+        if self.digest is None:
+            self.update_checksums()
+        
+        return nn_model
+    
+    def build_network_model(self):
+        """Builds a keras nn.Model of the architecture of this instance.
+
+        The layers of the model are as defined by the DNA, and the weights
+         and biases are left as Keras randomly initialises them.
+
+        Args:
+            None.
+
+        Returns:
+            A Keras nn.Model object of the instance architecture.
+        """
+        
+        # Keras is only imported when a Keras model is requested, so that the
+        #  NumPy backend does not pay for loading it.
+        
+        import keras
+        from keras import layers
+        
         # Get parameters from the instance DNA and initialise.
         
         inputs = layers.Input(shape = (self.dna["inputs"],))
@@ -237,31 +288,151 @@ class Network:
         
         nn_model = keras.Model(inputs=inputs, outputs=outputs)
         
-        # Right now the weights have been randomly generated.
-        # If there are already weights in this instance then overwrite.
-        # If there are no weights then this is a new instance - 
-        #  recover and save the randomised weights
+        return nn_model
+    
+    def get_architecture_key(self):
+        """Getter to return what identifies the architecture of this instance.
+
+        Networks with the same key only differ in their weights and biases,
+         so can share a model.
+
+        Args:
+            None.
+
+        Returns:
+            A tuple of the input size, a tuple of the width of each layer, and
+             a tuple of the activation keyword of each layer.
+        """
         
-        if len(self.weights) != 0:
-            pass
-        else:
-            # Gather the weights and biases of the layers, input, all hidden, 
-            #  and output layers are included in the method. The first is the 
-            #  input, which has no weights, so skip it.
+        widths = []
+        activations = []
+        for hidden_layer in self.dna["hidden_layers"]:
+            widths.append(int(hidden_layer["neurons"]))
+            activations.append(self.get_activation_function_keyword(hidden_layer["activation"]))
+        widths.append(int(self.dna["output"]["count"]))
+        activations.append(self.get_activation_function_keyword(self.dna["output"]["activation"]))
+        return (int(self.dna["inputs"]), tuple(widths), tuple(activations))
+    
+    def get_numpy_model(self):
+        """Builds a NumPy forward pass of this instance, updating checksums.
+
+        The NumPy equivalent of get_network_model(), evaluating the network
+         directly from the stored weights and biases. If the instance has no
+         weights yet they are initialised as Keras would, see
+         initialise_weights().
+
+        Args:
+            None.
+
+        Returns:
+            An inference.NumpyModel of the instance, called in the same way as
+             a Keras model.
+        """
+        
+        if len(self.weights) == 0:
+            self.initialise_weights()
             
-            for layer in range(1, len(nn_model.layers) - 0):
-                weights_biases = (nn_model.layers[layer].get_weights())
-                layer_config = (nn_model.layers[layer].get_config())
-                self.save_weight_bias_definitions(layer, weights_biases)
-                
-        # Update  metadata for this instance with  checksum weights of layers. 
-             
+        activations = []
+        for hidden_layer in self.dna["hidden_layers"]:
+            activations.append(self.get_activation_function_keyword(hidden_layer["activation"]))
+        activations.append(self.get_activation_function_keyword(self.dna["output"]["activation"]))
+        
+        if self.digest is None:
+            self.update_checksums()
+        
+        return inference.NumpyModel(self.weights, activations)
+    
+    def initialise_weights(self):
+        """Randomly initialises the weights and biases of every layer.
+
+        Matches the Keras Dense layer defaults, Glorot uniform weights and
+         zero biases, so that new networks are alike whichever backend
+         first evaluates them.
+
+        Args:
+            None.
+
+        Returns:
+            None. Saves the weights and biases to the instance.
+        """
+        
+        layer_sizes = [self.dna["inputs"]]
+        for hidden_layer in self.dna["hidden_layers"]:
+            layer_sizes.append(int(hidden_layer["neurons"]))
+        layer_sizes.append(int(self.dna["output"]["count"]))
+        
+        self.weights = []
+        for layer in range(1, len(layer_sizes)):
+            fan_in = layer_sizes[layer - 1]
+            fan_out = layer_sizes[layer]
+            limit = np.sqrt(6 / (fan_in + fan_out))
+            weights = np.random.uniform(-limit, limit, (fan_in, fan_out)).astype(np.float32)
+            biases = np.zeros(fan_out, dtype = np.float32)
+            self.save_weight_bias_definitions(layer, [weights, biases])
+           
+    def update_checksums(self):
+        """Recalculates and saves the layer and instance checksums to the DNA.
+
+        Also recalculates the digest of the instance, see get_digest().
+
+        Args:
+            None.
+
+        Returns:
+            None. Modifies the instance metadata.
+        """
+        
         self.dna["meta"]["hidden_checksum"] = self.checksum_weights(1)
         self.dna["meta"]["output_checksum"] = self.checksum_weights(2)
         self.dna["meta"]["checksum"] = self.checksum()
+        self.digest = self.compute_digest(self.weights, self.dna)
+    
+    def get_digest(self):
+        """Getter to return the digest of the instance.
+
+        The checksums only sum a few of the values, so different networks can
+         easily share them. The digest is a BLAKE2 hash of every weight and
+         bias, and of the DNA, for a trustworthy identity of the network.
+        It is only recalculated when the weights have changed.
+
+        Args:
+            None.
+
+        Returns:
+            The bytes of the digest.
+        """
         
-        return nn_model
-           
+        if self.digest is None:
+            self.update_checksums()
+        return self.digest
+    
+    @staticmethod
+    def compute_digest(weights, dna):
+        """Generates the BLAKE2 digest of a set of weights and DNA.
+
+        Args:
+            weights: list, per layer, of the numpy arrays of the weights and biases.
+            dna: DICT of the DNA of a Network. The meta data is not included.
+
+        Returns:
+            The bytes of the digest.
+        """
+        
+        digest = hashlib.blake2b(digest_size = 32)
+        for weights_biases in weights:
+            for values in weights_biases:
+                digest.update(np.ascontiguousarray(values, dtype = np.float32))
+        
+        # The DNA is encoded as the repr of each gene, always in the same
+        #  order, so that equal DNA always gives the same digest.
+        
+        genes = [dna["inputs"]]
+        for hidden_layer in dna["hidden_layers"]:
+            genes.extend([hidden_layer["type"], hidden_layer["neurons"], hidden_layer["activation"]])
+        genes.extend([dna["output"]["type"], dna["output"]["count"], dna["output"]["activation"]])
+        digest.update(",".join([repr(float(gene)) for gene in genes]).encode())
+        return digest.digest()
+    
     def checksum_weights(self, layer):
         """Generates and returns a checksum of the weights of the noted layer.
 
@@ -277,7 +448,7 @@ class Network:
         """
         
         weights_biases = self.get_weight_bias_definitions(layer)
-        sumOfList = sum(weights_biases[0][0])
+        sumOfList = float(np.sum(weights_biases[0][0], dtype = np.float64))
         return sumOfList
     
     
@@ -1,27 +1,104 @@
-"""Contains the Network objects and allows access to them.
+"""Contains the Network data of a Population and allows access to them.
+
+The Networks are stored as a struct of arrays: the weights and biases of each
+ layer of every Network are held in one contiguous numpy array per layer, of
+ shape (population, layer_inputs, layer_outputs), and the DNA floats, serial
+ numbers, parents, checksums, and fitnesses in parallel typed arrays. The
+ getters build Network DNA dicts and Network instances from those arrays on
+ request, so the rest of the simulation can still work with single Networks.
 """
 
+import json
 import network
+import genome
+import numpy as np
+import os
 import random
 
 class Population():
-    """Contains the Network objects and allows access to them.
+    """Contains the Network data of a Population and allows access to them.
 
     Contains the data of the neural network objects.
     Methods for getting and setting actions with those Networks.
+    All the Networks of a Population share the same layer sizes.
 
     Attributes:
     remove this: only need to be here if there is an __init__
-        fitness_map: a list of the weighted fitnesses of this population.
-        networks: a list of Network instances.
+        fitness_map: a numpy array of the cumulative fitnesses of this population.
+        fitnesses: a numpy array of the fitnesses the fitness map was built from.
+        selection_strategy: str of how parents are selected, see
+         set_selection_strategy().
+        tournament_size: INT of networks in each "tournament" selection.
+        rank_pressure: float of the selection pressure of "rank" selection.
+        size: INT count of the Networks stored.
+        capacity: INT count of the Networks the arrays have room for.
+        inputs_size: INT size of the input tensor of every Network.
+        hidden_neurons: list of the neurons value of each hidden layer.
+        output_count: INT count of the outputs of every Network.
+        serial_numbers: numpy int64 array of the Network serial numbers.
+        parents: numpy int64 array, (population, 2), of the parent serial
+         numbers, or -1 for none.
+        fitness_scores: numpy float64 array of the fitnesses, NaN if not yet
+         evaluated.
+        checksums: numpy float64 array, (population, 3), of the hidden layer,
+         output layer, and Network checksums.
+        digests: numpy uint8 array, (population, 32), of the BLAKE2 digest of
+         each Network, see Network.get_digest().
+        layer_types: numpy float64 array, (population, layers), of the type
+         gene of each hidden layer then the output layer.
+        layer_activations: numpy float64 array, (population, layers), of the
+         activation gene of each hidden layer then the output layer.
+        layer_weights: list, per layer, of numpy float32 arrays of shape
+         (population, layer_inputs, layer_outputs).
+        layer_biases: list, per layer, of numpy float32 arrays of shape
+         (population, layer_outputs).
+        serial_index: DICT mapping each Network serial number to its element
+         in the Population.
     """
     
     def __init__(self):
         self.fitness_map = []
-        self.networks = []
+        self.fitnesses = []
+        self.selection_strategy = "fitness_proportionate"
+        self.tournament_size = 3
+        self.rank_pressure = 1.5
+        self.size = 0
+        self.capacity = 0
+        self.inputs_size = None
+        self.hidden_neurons = None
+        self.output_count = None
+        self.serial_numbers = None
+        self.parents = None
+        self.fitness_scores = None
+        self.checksums = None
+        self.digests = None
+        self.layer_types = None
+        self.layer_activations = None
+        self.layer_weights = []
+        self.layer_biases = []
+        self.serial_index = {}
+    
+    def __getstate__(self):
+        # Only the occupied part of the arrays is worth pickling. The slices
+        #  are taken in a copy of the attributes, so pickling leaves this
+        #  Population, and the room it has reserved, as it was.
+
+        state = self.__dict__.copy()
+        if self.serial_numbers is None:
+            return state
+        size = self.size
+        for name in ("serial_numbers", "parents", "fitness_scores", "checksums", "digests", "layer_types", "layer_activations"):
+            state[name] = np.asarray(state[name][:size])
+        state["layer_weights"] = [np.asarray(weights[:size]) for weights in self.layer_weights]
+        state["layer_biases"] = [np.asarray(biases[:size]) for biases in self.layer_biases]
+        state["capacity"] = size
+        return state
     
     def create_random_population(self, population_size, serial_number, inputs_size):
-        """Generate a population of Network objects with randomised DNA.
+        """Generate a population of Networks with randomised DNA and weights.
+
+        The weights and biases are initialised as Keras would, see
+         Network.initialise_weights(), for the whole Population at once.
 
         Args:
             population_size: INT count of the number of Networks to instantiate.
@@ -29,13 +106,221 @@ class Population():
             inputs_size: INT value of the input tensor size to be assigned.
 
         Returns:
-            None. Instantiates the Network and stores it in self.networks[].
+            None. Stores the Networks in the Population arrays.
         """
         
+        gene_specification = genome.Genome.get_gene_specifications()
+        dnas = []
         for i in range(population_size):
-            temp_network = network.Network()
-            temp_network.create_random_network_dna(serial_number + i, inputs_size)
-            self.networks.append(temp_network)
+            dna = genome.Genome.create_random_genome(gene_specification, 1)
+            dna["inputs"] = inputs_size
+            dnas.append(dna)
+        
+        layer_sizes = [inputs_size]
+        for hidden_layer in dnas[0]["hidden_layers"]:
+            layer_sizes.append(int(hidden_layer["neurons"]))
+        layer_sizes.append(int(dnas[0]["output"]["count"]))
+        
+        # The weights are drawn as float32 straight away, by a Generator seeded
+        #  from np.random as in Breeding.get_generator().
+        
+        generator = np.random.default_rng(np.random.randint(0, 2 ** 32, 4, dtype = np.uint64))
+        layer_weights = []
+        layer_biases = []
+        for layer in range(1, len(layer_sizes)):
+            fan_in = layer_sizes[layer - 1]
+            fan_out = layer_sizes[layer]
+            limit = np.float32(np.sqrt(6 / (fan_in + fan_out)))
+            weights = generator.random((population_size, fan_in, fan_out), dtype = np.float32)
+            weights *= 2 * limit
+            weights -= limit
+            layer_weights.append(weights)
+            layer_biases.append(np.zeros((population_size, fan_out), dtype = np.float32))
+        
+        self.add_stacked_networks(
+            dnas[0],
+            np.arange(serial_number, serial_number + population_size),
+            np.full((population_size, 2), -1),
+            np.asarray([self.get_dna_genes(dna, "type") for dna in dnas]),
+            np.asarray([self.get_dna_genes(dna, "activation") for dna in dnas]),
+            layer_weights,
+            layer_biases
+            )
+    
+    def get_dna_genes(self, dna, gene):
+        """Gathers one gene of each layer of a DNA dict, in layer order.
+
+        Args:
+            dna: DICT of the DNA of a Network.
+            gene: str key of the gene, "type" or "activation".
+
+        Returns:
+            A list of the gene float of each hidden layer, then the output layer.
+        """
+        
+        genes = [hidden_layer[gene] for hidden_layer in dna["hidden_layers"]]
+        genes.append(dna["output"][gene])
+        return genes
+    
+    def reserve(self, count, exact=False):
+        """Makes room in the arrays for count more Networks.
+
+        The arrays grow by doubling, so that adding Networks one at a time
+         does not copy the Population every time.
+
+        Args:
+            count: INT count of Networks about to be added.
+            exact: Boolean to size the arrays to exactly fit, rather than double.
+
+        Returns:
+            None. Reallocates the arrays stored in self, if needed.
+        """
+        
+        needed = self.size + count
+        if self.serial_numbers is None or (needed <= self.capacity and not exact):
+            return
+        if exact:
+            capacity = needed
+        else:
+            capacity = max(needed, 2 * self.capacity)
+        
+        def resized(array):
+            new_array = np.empty((capacity,) + array.shape[1:], dtype = array.dtype)
+            new_array[:self.size] = array[:self.size]
+            return new_array
+        
+        self.serial_numbers = resized(self.serial_numbers)
+        self.parents = resized(self.parents)
+        self.fitness_scores = resized(self.fitness_scores)
+        self.checksums = resized(self.checksums)
+        self.digests = resized(self.digests)
+        self.layer_types = resized(self.layer_types)
+        self.layer_activations = resized(self.layer_activations)
+        self.layer_weights = [resized(weights) for weights in self.layer_weights]
+        self.layer_biases = [resized(biases) for biases in self.layer_biases]
+        self.capacity = capacity
+    
+    def add_stacked_networks(
+        self,
+        dna_template,
+        serial_numbers,
+        parents,
+        layer_types,
+        layer_activations,
+        layer_weights,
+        layer_biases,
+        fitness_scores=None
+        ):
+        """Setter to store several Networks, given as arrays, in the Population.
+
+        Args:
+            dna_template: DICT of the DNA of any of the Networks, for the input,
+             hidden layer neurons, and output counts they all share.
+            serial_numbers: array-like of the INT serial numbers.
+            parents: array-like, (networks, 2), of the INT parent serial
+             numbers, or -1 for none.
+            layer_types: array-like, (networks, layers), of the type genes.
+            layer_activations: array-like, (networks, layers), of the
+             activation genes.
+            layer_weights: list, per layer, of arrays of the weights.
+            layer_biases: list, per layer, of arrays of the biases.
+            fitness_scores: optional array-like of the fitnesses, NaN if not
+             evaluated.
+
+        Returns:
+            None. Stores the Networks in the Population arrays, and
+             calculates their checksums and digests.
+            
+        Raises:
+            ValueError: if the layer sizes differ from the Population's.
+        """
+        
+        count = len(serial_numbers)
+        hidden_neurons = [hidden_layer["neurons"] for hidden_layer in dna_template["hidden_layers"]]
+        if self.serial_numbers is None:
+            # The first Networks define the layer sizes of the Population.
+            
+            self.inputs_size = dna_template["inputs"]
+            self.hidden_neurons = hidden_neurons
+            self.output_count = dna_template["output"]["count"]
+            layers_count = len(layer_weights)
+            self.serial_numbers = np.empty(0, dtype = np.int64)
+            self.parents = np.empty((0, 2), dtype = np.int64)
+            self.fitness_scores = np.empty(0, dtype = np.float64)
+            self.checksums = np.empty((0, 3), dtype = np.float64)
+            self.digests = np.empty((0, 32), dtype = np.uint8)
+            self.layer_types = np.empty((0, layers_count), dtype = np.float64)
+            self.layer_activations = np.empty((0, layers_count), dtype = np.float64)
+            self.layer_weights = [np.empty((0,) + weights.shape[1:], dtype = np.float32) for weights in layer_weights]
+            self.layer_biases = [np.empty((0,) + biases.shape[1:], dtype = np.float32) for biases in layer_biases]
+        elif (dna_template["inputs"] != self.inputs_size
+              or hidden_neurons != self.hidden_neurons
+              or dna_template["output"]["count"] != self.output_count):
+            raise ValueError("All the Networks of a Population must have the same layer sizes.")
+        
+        self.reserve(count)
+        new = slice(self.size, self.size + count)
+        self.serial_numbers[new] = serial_numbers
+        self.serial_index.update(zip(
+            self.serial_numbers[new].tolist(),
+            range(self.size, self.size + count)
+            ))
+        self.parents[new] = parents
+        self.layer_types[new] = layer_types
+        self.layer_activations[new] = layer_activations
+        for layer in range(len(layer_weights)):
+            self.layer_weights[layer][new] = layer_weights[layer]
+            self.layer_biases[layer][new] = layer_biases[layer]
+        if fitness_scores is None:
+            self.fitness_scores[new] = np.nan
+        else:
+            self.fitness_scores[new] = fitness_scores
+        self.size += count
+        self.update_checksums(new)
+        for network_id in range(new.start, new.stop):
+            self.update_digest(network_id)
+    
+    def update_checksums(self, networks):
+        """Calculates and stores the checksums of the given Networks.
+
+        The array equivalent of Network.update_checksums().
+
+        Args:
+            networks: slice or array of the elements of the Population.
+
+        Returns:
+            None. Updates self.checksums.
+        """
+        
+        hidden_checksum = self.layer_weights[0][networks, 0, :].sum(axis = 1, dtype = np.float64)
+        output_checksum = self.layer_weights[-1][networks, 0, :].sum(axis = 1, dtype = np.float64)
+        self.checksums[networks, 0] = hidden_checksum
+        self.checksums[networks, 1] = output_checksum
+        self.checksums[networks, 2] = (
+            hidden_checksum
+            + output_checksum
+            + self.layer_types[networks, 0]
+            + self.layer_activations[networks, 0]
+            + self.layer_types[networks, -1]
+            + self.layer_activations[networks, -1]
+            )
+    
+    def update_digest(self, network_id):
+        """Calculates and stores the digest of a Network.
+
+        Args:
+            network_id: INT of the element of the Population.
+
+        Returns:
+            None. Updates self.digests.
+        """
+        
+        weights = [
+            [self.layer_weights[layer][network_id], self.layer_biases[layer][network_id]]
+            for layer in range(len(self.layer_weights))
+            ]
+        digest = network.Network.compute_digest(weights, self.get_neural_network_def(network_id))
+        self.digests[network_id] = np.frombuffer(digest, dtype = np.uint8)
     
     def get_population_size(self):
         """Getter to return the number of neural networks in the population.
@@ -47,48 +332,207 @@ class Population():
             INT of the number of neural network objects stored in this Population.
         """
         
-        return len(self.networks)
+        return self.size
+    
+    def get_network_id(self, serial_number):
+        """Getter to return the element of the Network with a serial number.
+
+        Args:
+            serial_number: INT serial number of the Network.
+
+        Returns:
+            The INT element of the Population, or None if no Network in the
+             Population has that serial number.
+        """
+        
+        return self.serial_index.get(serial_number)
+    
+    def verify_carried_networks(self, previous_population):
+        """Checks the Networks carried over from the previous generation.
+
+        Any Network in this Population with the serial number of a Network
+         in the previous Population was carried over, and must be EXACTLY the
+         same, so their checksums and digests must match.
+
+        Args:
+            previous_population: Population instance of the previous generation.
+
+        Returns:
+            INT count of the carried over Networks checked.
+
+        Raises:
+            ValueError: if a carried over Network's checksums or digest do not
+             match.
+        """
+        
+        carried_count = 0
+        for network_id in range(self.size):
+            previous_id = previous_population.get_network_id(int(self.serial_numbers[network_id]))
+            if previous_id is None:
+                continue
+            if (not np.array_equal(self.checksums[network_id], previous_population.checksums[previous_id])
+                or self.get_network_digest(network_id) != previous_population.get_network_digest(previous_id)):
+                raise ValueError(
+                    "Carried over network "
+                    + str(self.serial_numbers[network_id])
+                    + " does not match its previous generation checksums."
+                    )
+            carried_count += 1
+        return carried_count
     
     def get_neural_network_def(self, network_id):
         """Getter to return a neural network definition from the population.
 
+        The DICT is built from the Population arrays, so changing it does not
+         change the Population.
+
         Args:
-            network_id: INT of the element in the self.networks list to return.
+            network_id: INT of the element of the Population to return.
 
         Returns:
             The DICT of the DNA used to define the specified Network model.
         """
         
-        return (self.networks[network_id].get_network_dna())
+        parent_1, parent_2 = self.parents[network_id].tolist()
+        hidden_layers = []
+        for layer in range(len(self.hidden_neurons)):
+            hidden_layers.append({
+                "type": float(self.layer_types[network_id, layer]),
+                "neurons": self.hidden_neurons[layer],
+                "activation": float(self.layer_activations[network_id, layer])
+                })
+        return {
+            "meta": {
+                "serial_number": int(self.serial_numbers[network_id]),
+                "checksum": float(self.checksums[network_id, 2]),
+                "parent_1": None if parent_1 == -1 else parent_1,
+                "parent_2": None if parent_2 == -1 else parent_2,
+                "hidden_checksum": float(self.checksums[network_id, 0]),
+                "output_checksum": float(self.checksums[network_id, 1]),
+                },
+            "inputs": self.inputs_size,
+            "hidden_layers": hidden_layers,
+            "output": {
+                "type": float(self.layer_types[network_id, -1]),
+                "count": self.output_count,
+                "activation": float(self.layer_activations[network_id, -1])
+                }
+            }
     
     def set_nn_fitness(self, network_id, fitness):
         """Setter to store the fitness of a Network in the Population.
 
         Args:
-            network_id: INT of the element in the self.networks list to update.
+            network_id: INT of the element of the Population to update.
             fitness: INT of the fitness to be assigned.
 
         Returns:
-            None. Modifies the Network definition.
+            None. Modifies the Population.
         """
         
-        self.networks[network_id].set_fitness(fitness)
+        self.fitness_scores[network_id] = np.nan if fitness is None else fitness
         
     def get_nn_fitness(self, network_id):
         """Getter to return a neural network fitness from the Population.
 
         Args:
-            network_id: INT of the element in the self.networks list to query.
+            network_id: INT of the element of the Population to query.
 
         Returns:
-            The INT of the fitness stored with that Network instance.
+            The INT of the fitness stored with that Network, or None if it has
+             not been evaluated.
         """
         
-        return self.networks[network_id].get_fitness()
+        fitness = self.fitness_scores[network_id]
+        if np.isnan(fitness):
+            return None
+        return int(fitness)
+    
+    def get_fitnesses(self):
+        """Getter to return the fitnesses of every Network in the Population.
+
+        Args:
+            None.
+
+        Returns:
+            A numpy float64 array of the fitnesses, NaN if not evaluated.
+        """
+        
+        return self.fitness_scores[:self.size].copy()
+
+    def get_report_columns(self):
+        """Getter to return the reporting columns of every Network, typed.
+
+        The columns are those of nn_and_results_data.csv, from the serial
+         number to the fitness, each copied from the Population arrays in one
+         go rather than gathered Network by Network.
+
+        Args:
+            None.
+
+        Returns:
+            A DICT of column name to a numpy array with a row per Network.
+             Parents are -1, and fitnesses NaN, where there are none.
+        """
+
+        size = self.size
+        return {
+            "serial_number": self.serial_numbers[:size].copy(),
+            "checksum": self.checksums[:size, 2].copy(),
+            "parent_1": self.parents[:size, 0].copy(),
+            "parent_2": self.parents[:size, 1].copy(),
+            "hidden_checksum": self.checksums[:size, 0].copy(),
+            "output_checksum": self.checksums[:size, 1].copy(),
+            "input": np.full(size, self.inputs_size, dtype = np.int64),
+            "hidden_type": self.layer_types[:size, 0].copy(),
+            "hidden_neurons": np.full(size, self.hidden_neurons[0], dtype = np.int64),
+            "hidden_activation": self.layer_activations[:size, 0].copy(),
+            "output_type": self.layer_types[:size, -1].copy(),
+            "output_count": np.full(size, self.output_count, dtype = np.int64),
+            "output_activation": self.layer_activations[:size, -1].copy(),
+            "fitness": self.fitness_scores[:size].copy()
+            }
+
+    def set_selection_strategy(self, strategy, tournament_size=3, rank_pressure=1.5):
+        """Setter to choose how parents are selected from this Population.
+
+        Strategies:
+            "fitness_proportionate": the chance of selection is the share of
+             the total fitness, the original roulette wheel.
+            "rank": the chance of selection is linear in the rank of the
+             fitness, so the spread of fitnesses does not matter, only order.
+            "sus": stochastic universal sampling, the fitness proportionate
+             chances taken with evenly spaced pointers, so that each network is
+             selected close to its expected number of times.
+            "tournament": the fittest of tournament_size randomly drawn
+             networks.
+
+        Args:
+            strategy: str of one of the strategies above.
+            tournament_size: INT of networks drawn for each tournament.
+            rank_pressure: float between 1.0 and 2.0, the expected selections
+             of the fittest network under "rank". 1.0 is uniform selection.
+
+        Returns:
+            None. Updates the selection settings stored in self.
+            
+        Raises:
+            ValueError: if the strategy is not known.
+        """
+        
+        if strategy not in ("fitness_proportionate", "rank", "sus", "tournament"):
+            raise ValueError(f"Unknown selection strategy {strategy}.")
+        self.selection_strategy = strategy
+        self.tournament_size = tournament_size
+        self.rank_pressure = rank_pressure
     
     def create_fitness_map(self):
         """Create/replace the fitness map for this Population.
 
+        For the "rank" selection strategy the map is built from the linear
+         rank weights instead of the fitnesses, with tied fitnesses sharing
+         the same weight.
+
         Args:
             None.
 
@@ -96,12 +540,23 @@ class Population():
             None. Updates the fitness map stored in self.
         """
         
-        total_fitness = 0
-        if len(self.fitness_map) > 0:
-            self.fitness_map = []
-        for i in range(self.get_population_size()):
-            total_fitness += self.get_nn_fitness(i)
-            self.fitness_map.append(total_fitness)
+        # The fitness map is the running total of the fitnesses, so a random
+        #  seed up to the total fitness falls in each Network's span with a
+        #  chance weighted by its fitness, and is found by binary search.
+        
+        fitnesses = self.get_fitnesses()
+        self.fitnesses = fitnesses
+        
+        if self.selection_strategy == "rank" and len(fitnesses) > 1:
+            ranks = np.empty(len(fitnesses))
+            ranks[np.argsort(fitnesses, kind = "stable")] = np.arange(len(fitnesses))
+            unique_fitnesses, tied = np.unique(fitnesses, return_inverse = True)
+            ranks = (np.bincount(tied, weights = ranks) / np.bincount(tied))[tied]
+            pressure = self.rank_pressure
+            weights = (2 - pressure) + 2 * (pressure - 1) * ranks / (len(fitnesses) - 1)
+        else:
+            weights = fitnesses
+        self.fitness_map = np.cumsum(weights)
     
     def get_fitness_map(self):
         """Getter to return the fitness map for this Population.
@@ -110,7 +565,7 @@ class Population():
             None.
 
         Returns:
-            The list of the fitness map stored in self.
+            The numpy array of the fitness map stored in self.
         """
         
         return self.fitness_map
@@ -134,56 +589,230 @@ class Population():
         #  fitness map which will be the sum of all fitnesses
         
         random_seed = random.random() * self.fitness_map[-1]
-        for network in range(len(self.fitness_map)):
-            if random_seed <= self.fitness_map[network]:
-                return network
+        return int(np.searchsorted(self.fitness_map, random_seed, side = "right"))
+        
+    def get_weighted_parent_pairs(self, count):
+        """Selects pairs of distinct networks with the selection strategy.
+
+        The vectorised equivalent of calling get_weighted_parent() twice per
+         pair, drawing all the pairs at once, for whichever strategy was set
+         by set_selection_strategy(). create_fitness_map() must be called
+         first.
+         
+        Args:
+            count: INT number of parent pairs to select.
+
+        Returns:
+            A numpy array of shape (count, 2) of the INT elements of
+             self.networks selected as parent_1 and parent_2.
+            
+        Raises:
+            ValueError: if the fitness map has fewer than two networks.
+        """
+        
+        networks_count = len(self.fitness_map)
+        if networks_count < 2:
+            raise ValueError("At least two networks are needed to select parents.")
+        
+        if self.selection_strategy == "tournament":
+            return self.get_tournament_parent_pairs(count)
+        
+        if self.selection_strategy == "sus":
+            # Evenly spaced pointers across the fitness map, from one random
+            #  start, shuffled so that the pairs are random.
+            
+            spacing = self.fitness_map[-1] / (2 * count)
+            pointers = (random.random() + np.arange(2 * count)) * spacing
+            selected = np.searchsorted(self.fitness_map, pointers, side = "right")
+            selected = np.random.permutation(np.minimum(selected, networks_count - 1))
+            parent_1 = selected[:count]
+            parent_2 = selected[count:]
+            same = parent_1 == parent_2
+            parent_2[same] = self.get_weighted_other_parents(parent_1[same])
+        else:
+            parent_1 = np.searchsorted(
+                self.fitness_map,
+                np.random.random(count) * self.fitness_map[-1],
+                side = "right"
+                )
+            parent_2 = self.get_weighted_other_parents(parent_1)
+        
+        return np.stack((parent_1, parent_2), axis = 1)
+    
+    def get_weighted_other_parents(self, parent_1):
+        """Selects, for each given network, a different network from the map.
+
+        Each is drawn with the given network's span taken out of the fitness
+         map, so it is always a different network, however much of the total
+         the given network holds. If the other networks hold nothing at all,
+         one of them is chosen uniformly instead.
+
+        Args:
+            parent_1: numpy array of INT elements of self.networks.
+
+        Returns:
+            A numpy array, the same shape as parent_1, of the INT elements of
+             self.networks selected.
+        """
+        
+        fitness_map = self.fitness_map
+        networks_count = len(fitness_map)
+        fitness_before = np.concatenate(([0.0], fitness_map[:-1]))
+        total_fitness = fitness_map[-1]
+        
+        # Draw across the fitness map without parent_1's span, then skip the
+        #  seed over that span.
+        
+        parent_1_fitness = fitness_map[parent_1] - fitness_before[parent_1]
+        random_seeds = np.random.random(len(parent_1)) * (total_fitness - parent_1_fitness)
+        random_seeds = np.where(
+            random_seeds >= fitness_before[parent_1],
+            random_seeds + parent_1_fitness,
+            random_seeds
+            )
+        parent_2 = np.searchsorted(fitness_map, random_seeds, side = "right")
+        parent_2 = np.minimum(parent_2, networks_count - 1)
+        
+        no_fitness_left = (total_fitness - parent_1_fitness <= 0) | (parent_2 == parent_1)
+        if no_fitness_left.any():
+            others = np.random.randint(0, networks_count - 1, no_fitness_left.sum())
+            parent_2[no_fitness_left] = others + (others >= parent_1[no_fitness_left])
+        
+        return parent_2
+    
+    def get_tournament_parent_pairs(self, count):
+        """Selects pairs of distinct networks by tournament.
+
+        Each parent is the fittest of tournament_size networks drawn uniformly,
+         with replacement. The second parent's tournament ignores any draws of
+         the first parent, and if it drew nothing else a different network is
+         chosen uniformly instead.
+
+        Args:
+            count: INT number of parent pairs to select.
+
+        Returns:
+            A numpy array of shape (count, 2) of the INT elements of
+             self.networks selected as parent_1 and parent_2.
+        """
+        
+        networks_count = len(self.fitnesses)
+        contestants = np.random.randint(0, networks_count, (count, 2, self.tournament_size))
+        rows = np.arange(count)
+        
+        contestant_fitnesses = self.fitnesses[contestants[:, 0]]
+        parent_1 = contestants[rows, 0, contestant_fitnesses.argmax(axis = 1)]
+        
+        contestant_fitnesses = np.where(
+            contestants[:, 1] == parent_1[:, None],
+            -np.inf,
+            self.fitnesses[contestants[:, 1]]
+            )
+        parent_2 = contestants[rows, 1, contestant_fitnesses.argmax(axis = 1)]
+        
+        no_contest = parent_2 == parent_1
+        if no_contest.any():
+            others = np.random.randint(0, networks_count - 1, no_contest.sum())
+            parent_2[no_contest] = others + (others >= parent_1[no_contest])
+        
+        return np.stack((parent_1, parent_2), axis = 1)
         
     def save_weight_bias_definitions(self, network_id, layer, weights):
         """Set the weight definitions of a given layer.
 
-        Given the provided weights, save them to the Network instance definition.
+        Given the provided weights, save them to the Population arrays.
 
         Args:
-            network_id: INT of the element of self.networks to be modified.
+            network_id: INT of the element of the Population to be modified.
             layer: layer INT to be updated.
-            _weights: numpy array of the weights to be stored.
+            _weights: list of the numpy arrays of the weights and biases.
 
         Returns:
-            None. Updates the Network instance stored in self.
+            None. Updates the Population arrays and checksums.
         """
         
-        self.networks[network_id].save_weight_bias_definitions(layer, weights)
+        self.layer_weights[layer - 1][network_id] = weights[0]
+        self.layer_biases[layer - 1][network_id] = weights[1]
+        self.update_checksums([network_id])
+        self.update_digest(network_id)
         
     '''Get the weights definitions of a given layer on a given network in this population'''
     def get_weight_bias_definitions(self, network_id, layer):
         """Getter to return the weights of a specified layer.
 
         Args:
-            network_id: INT of the element of self.networks to be queried.
+            network_id: INT of the element of the Population to be queried.
             layer: layer INT to be queried.
 
         Returns:
-            A list of the stored weights and biases.
+            A list of the stored weights and biases, as read-only views of the
+             Population arrays. Use save_weight_bias_definitions() to change
+             them.
+        """
+        
+        return [
+            self.read_only(self.layer_weights[layer - 1][network_id]),
+            self.read_only(self.layer_biases[layer - 1][network_id])
+            ]
+    
+    def read_only(self, array):
+        """Returns a read-only view of an array, sharing its memory.
+
+        Views handed out of the Population are read-only, so that a Network
+         built from them can never silently change the weights it shares with
+         the Population. Anything that needs to modify them must copy them
+         first, nothing copies them on write.
+
+        Args:
+            array: numpy array, usually a view of the Population arrays.
+
+        Returns:
+            A read-only numpy view of the array.
+        """
+        
+        view = array.view()
+        view.setflags(write = False)
+        return view
+    
+    def get_network(self, network_id):
+        """Builds a Network instance from the Population arrays.
+
+        Args:
+            network_id: INT of the element of the Population to be built.
+
+        Returns:
+            A Network instance with the DNA, fitness, and weights of the
+             specified element.
         """
         
-        return self.networks[network_id].get_weight_bias_definitions(layer)
+        temp_network = network.Network()
+        temp_network.dna = self.get_neural_network_def(network_id)
+        temp_network.weights = [
+            self.get_weight_bias_definitions(network_id, layer)
+            for layer in range(1, len(self.layer_weights) + 1)
+            ]
+        temp_network.set_fitness(self.get_nn_fitness(network_id))
+        return temp_network
     
     '''Get the specified nn model object'''
-    def get_neural_network_model(self, network_id):
+    def get_neural_network_model(self, network_id, backend="keras"):
         """Builds and returns a Keras neural network model.
 
-        Triggers the Network instance to read the various definition parameters
-         stored in itself and instantiate an Keras neural network model from that,
-        and return it.
+        Builds the Network instance from the Population arrays, then triggers
+         it to read the various definition parameters stored in itself and
+         instantiate an Keras neural network model from that, and return it.
 
         Args:
-            network_id: INT of the element of self.networks to be queried.
+            network_id: INT of the element of the Population to be queried.
+            backend: str of "keras", or "numpy" for a NumPy forward pass.
 
         Returns:
-            A Keras neural network model instance.
+            A Keras neural network model instance, or an inference.NumpyModel.
         """
         
-        return self.networks[network_id].get_network_model()
+        if backend == "numpy":
+            return self.get_network(network_id).get_numpy_model()
+        return self.get_network(network_id).get_network_model()
     
     '''Create a nn from provided specs'''
     def create_nn(self, serial_number, specs, hidden_weights, output_weights, parent_1, parent_2):
@@ -207,14 +836,230 @@ class Population():
     
     '''Add a nn to this population'''
     def add_nn(self, network):
-        """Setter to store a neural network object in self.networks.
+        """Setter to store a neural network object in the Population arrays.
+
+        If the Network has no weights yet they are initialised first.
 
         Args:
             network: Network instance.
 
         Returns:
-            None. Updates the self.networks.
+            None. Updates the Population arrays.
+        """
+        
+        if len(network.weights) == 0:
+            network.initialise_weights()
+        dna = network.get_network_dna()
+        parents = [
+            -1 if dna["meta"]["parent_1"] is None else dna["meta"]["parent_1"],
+            -1 if dna["meta"]["parent_2"] is None else dna["meta"]["parent_2"]
+            ]
+        self.add_stacked_networks(
+            dna,
+            [dna["meta"]["serial_number"]],
+            [parents],
+            [self.get_dna_genes(dna, "type")],
+            [self.get_dna_genes(dna, "activation")],
+            [weights_biases[0][None] for weights_biases in network.weights],
+            [weights_biases[1][None] for weights_biases in network.weights],
+            [np.nan if network.get_fitness() is None else network.get_fitness()]
+            )
+    
+    def add_carried_networks(self, source_population, network_ids):
+        """Setter to store Networks of another Population in this one.
+
+        Used to carry Networks over from one generation to the next. Their
+         rows are copied from the arrays of source_population into this one's,
+         so the carried Networks are exactly the same, without building any
+         Network instances or DNA dicts on the way. This is a plain copy, not
+         copy-on-write: the two Populations share no memory afterwards, so
+         source_population can be dropped once this one is complete.
+         Fitnesses are not carried, the Networks are evaluated again.
+
+        Args:
+            source_population: Population instance holding the Networks.
+            network_ids: list of INT elements of source_population to store.
+
+        Returns:
+            None. Updates the Population arrays.
         """
         
-        self.networks.append(network)
-    
\ No newline at end of file
+        if len(network_ids) == 0:
+            return
+        network_ids = np.asarray(network_ids)
+        self.add_stacked_networks(
+            source_population.get_neural_network_def(0),
+            source_population.serial_numbers[network_ids],
+            source_population.parents[network_ids],
+            source_population.layer_types[network_ids],
+            source_population.layer_activations[network_ids],
+            [weights[network_ids] for weights in source_population.layer_weights],
+            [biases[network_ids] for biases in source_population.layer_biases]
+            )
+    
+    def get_stacked_layers(self, network_ids=None):
+        """Getter to return the weights of several Networks stacked per layer.
+
+        Args:
+            network_ids: list of INT elements of the Population to be stacked,
+             or None for the whole Population, which is returned as read-only
+             views of the Population arrays rather than copies.
+
+        Returns:
+            A tuple of three lists, one entry per layer: numpy arrays of the
+             stacked weights, numpy arrays of the stacked biases, and lists of
+             the activation keyword of each Network.
+        """
+        
+        if network_ids is None:
+            network_ids = slice(0, self.size)
+        get_keyword = network.Network().get_activation_function_keyword
+        layer_weights = []
+        layer_biases = []
+        layer_activations = []
+        for layer in range(len(self.layer_weights)):
+            layer_weights.append(self.read_only(self.layer_weights[layer][network_ids]))
+            layer_biases.append(self.read_only(self.layer_biases[layer][network_ids]))
+            layer_activations.append([
+                get_keyword(activation)
+                for activation in self.layer_activations[network_ids, layer]
+                ])
+        return layer_weights, layer_biases, layer_activations
+    
+    def get_network_digest(self, network_id):
+        """Getter to return the digest of a Network in the Population.
+
+        Unlike the checksums, which only sum a few values, the digest is a
+         BLAKE2 hash of every weight and bias, and of the DNA, see
+         Network.get_digest(). It is calculated when the Network's weights
+         are stored, not on every call.
+
+        Args:
+            network_id: INT of the element of the Population to be queried.
+
+        Returns:
+            The bytes of the digest.
+        """
+        
+        return self.digests[network_id].tobytes()
+    
+    def get_stacked_definitions(self, network_ids=None):
+        """Getter to return the type and activation genes of several Networks.
+
+        Args:
+            network_ids: list of INT elements of the Population, or None for
+             the whole Population.
+
+        Returns:
+            A tuple of two numpy arrays, (networks, layers), of the type genes
+             and of the activation genes, of each hidden layer then the output.
+        """
+        
+        if network_ids is None:
+            network_ids = slice(0, self.size)
+        return self.layer_types[network_ids], self.layer_activations[network_ids]
+    
+    def save_checkpoint(self, file_path, metadata=None):
+        """Saves every Network of the Population to a checkpoint on disk.
+
+        The weights and biases of every layer are written, one block per
+         array, into a single memory-mapped .npy file, and the DNA floats,
+         serial numbers, parents, checksums, digests, and fitnesses into a
+         small JSON sidecar. The sidecar is written last, and replaced in one
+         step, so a checkpoint with a sidecar is always complete.
+
+        Args:
+            file_path: str path of the checkpoint, without an extension.
+            metadata: optional DICT, JSON serialisable, to be saved with the
+             checkpoint and returned by load_checkpoint().
+
+        Returns:
+            None. Writes the .npy and .json files to disk.
+        """
+        
+        # Each array is a contiguous block of the file, so that on loading
+        #  every one of them is a view of the memory map, not a copy.
+        
+        arrays = []
+        for layer in range(len(self.layer_weights)):
+            arrays.append(self.layer_weights[layer][:self.size])
+            arrays.append(self.layer_biases[layer][:self.size])
+        blocks = []
+        offset = 0
+        for array in arrays:
+            blocks.append([offset, list(array.shape)])
+            offset += array.size
+        
+        weights_file = np.lib.format.open_memmap(
+            file_path + ".npy",
+            mode = "w+",
+            dtype = np.float32,
+            shape = (offset,)
+            )
+        for array, (offset, shape) in zip(arrays, blocks):
+            weights_file[offset:offset + array.size] = array.ravel()
+        weights_file.flush()
+        del weights_file
+        
+        sidecar = {
+            "inputs_size": self.inputs_size,
+            "hidden_neurons": self.hidden_neurons,
+            "output_count": self.output_count,
+            "serial_numbers": self.serial_numbers[:self.size].tolist(),
+            "parents": self.parents[:self.size].tolist(),
+            "fitness_scores": self.fitness_scores[:self.size].tolist(),
+            "checksums": self.checksums[:self.size].tolist(),
+            "digests": [digest.tobytes().hex() for digest in self.digests[:self.size]],
+            "layer_types": self.layer_types[:self.size].tolist(),
+            "layer_activations": self.layer_activations[:self.size].tolist(),
+            "blocks": blocks,
+            "metadata": metadata
+            }
+        temporary_path = file_path + ".json.tmp"
+        with open(temporary_path, "w") as sidecar_file:
+            json.dump(sidecar, sidecar_file)
+        os.replace(temporary_path, file_path + ".json")
+    
+    def load_checkpoint(self, file_path):
+        """Loads the Networks of a checkpoint into this, empty, Population.
+
+        The weights and biases are memory-mapped read-only rather than read,
+         so they are only loaded from disk as they are used. The checkpoint
+         files must be kept while the Population is in use.
+
+        Args:
+            file_path: str path of the checkpoint, without an extension, as
+             given to save_checkpoint().
+
+        Returns:
+            The metadata DICT saved with the checkpoint, or None.
+        """
+        
+        with open(file_path + ".json") as sidecar_file:
+            sidecar = json.load(sidecar_file)
+        weights_file = np.load(file_path + ".npy", mmap_mode = "r")
+        arrays = [
+            weights_file[offset:offset + int(np.prod(shape))].reshape(shape)
+            for offset, shape in sidecar["blocks"]
+            ]
+        
+        self.inputs_size = sidecar["inputs_size"]
+        self.hidden_neurons = sidecar["hidden_neurons"]
+        self.output_count = sidecar["output_count"]
+        self.serial_numbers = np.asarray(sidecar["serial_numbers"], dtype = np.int64)
+        self.parents = np.asarray(sidecar["parents"], dtype = np.int64).reshape(-1, 2)
+        self.fitness_scores = np.asarray(sidecar["fitness_scores"], dtype = np.float64)
+        self.checksums = np.asarray(sidecar["checksums"], dtype = np.float64).reshape(-1, 3)
+        self.digests = np.asarray(
+            [np.frombuffer(bytes.fromhex(digest), dtype = np.uint8) for digest in sidecar["digests"]],
+            dtype = np.uint8
+            ).reshape(-1, 32)
+        layers_count = len(arrays) // 2
+        self.layer_types = np.asarray(sidecar["layer_types"], dtype = np.float64).reshape(-1, layers_count)
+        self.layer_activations = np.asarray(sidecar["layer_activations"], dtype = np.float64).reshape(-1, layers_count)
+        self.layer_weights = arrays[0::2]
+        self.layer_biases = arrays[1::2]
+        self.size = len(self.serial_numbers)
+        self.capacity = self.size
+        self.serial_index = dict(zip(self.serial_numbers.tolist(), range(self.size)))
+        return sidecar["metadata"]
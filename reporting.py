@@ -8,6 +8,39 @@ class Reporting():
     """Gathers and writes out various reporting to CSV.
     """
     
+    # The columns of nn_and_results_data.csv, and of generation_summary.csv.
+    # The checksum columns sum the first row of the weights in float64, with
+    #  NumPy, so that Network and Population checksums agree exactly. They
+    #  were summed one float32 at a time by Python before networks had
+    #  digests, so they differ slightly from those of older experiment
+    #  folders, and should not be compared with them.
+    
+    nn_results_header = (
+        "generation",
+        "stage",
+        "#",
+        "serial_number",
+        "checksum",
+        "parent_1",
+        "parent_2",
+        "hidden_checksum",
+        "output_checksum",
+        "input",
+        "hidden_type",
+        "hidden_neurons",
+        "hidden_activation",
+        "output_type",
+        "output_count",
+        "output_activation",
+        "fitness"
+        )
+    generation_summary_header = (
+        "generation",
+        "number_of_networks",
+        "maximum_fitness",
+        "average_fitness"
+        )
+    
     def census(sim_population):
         """Gathers the metadata and fitnesses of the passed Population.
 
@@ -39,6 +72,8 @@ class Reporting():
          will be done and the method does not need to run, so it returns.
         If the experiment number is 1 then the existing folders are deleted
          so it can be reused. This is used during development.
+        If the experiment is being resumed, the existing folders are kept,
+         and reused, instead.
          
         Args:
             parameters: DICT containing all the experimental settings. The 
@@ -49,19 +84,20 @@ class Reporting():
             
         Raises:
             Will fail if the experiment folder already exists, to avoid
-             overwriting existing experimental results.
+             overwriting existing experimental results, unless resuming.
         """
         
         comment = hyperparameters['collection_comment']
         maindir = hyperparameters['collection_number']
         subdir = hyperparameters['experiment']
+        resume = hyperparameters.get('resume', False)
         fulldir = maindir + "/" + subdir
         if subdir == 0 or maindir == 0:
             return
         
         # Make the report directory
         
-        if maindir == 1 or subdir == 1:
+        if (maindir == 1 or subdir == 1) and not resume:
             # remove the subdir and contents as this is the testing directory
             # intended for when the output should be created, not not retained.
             
@@ -86,13 +122,158 @@ class Reporting():
         # But subfolders must not be overwritten if they exist as this is where
         #  the data is stored.
         
+        # When resuming, the subfolder holds the checkpoints to resume from.
+        
         try:
             os.mkdir("experiments/" + str(maindir) + "/" + str(subdir))
         except:
+            if resume:
+                print(f"Resuming the experiment in the directory {fulldir}.")
+                return
             print(f"\n\nFATAL. The directory {fulldir} already exists.\n\n")
             quit(1)
         
     
+    def get_checkpoint_path(hyperparameters, generation):
+        """Builds the path of the Population checkpoint of a generation.
+
+        The checkpoints folder is created if it does not exist yet.
+
+        Args:
+            hyperparameters: DICT containing all the experimental settings. The
+             collection number and experiment number are used here.
+            generation: INT of the generation.
+
+        Returns:
+            A str path, without an extension, as Population.save_checkpoint()
+             takes it, or None if no reporting to disk is being done.
+        """
+        
+        maindir = hyperparameters['collection_number']
+        subdir = hyperparameters['experiment']
+        if subdir == 0 or maindir == 0:
+            return None
+        checkpoint_dir = "experiments/" + str(maindir) + "/" + str(subdir) + "/checkpoints"
+        os.makedirs(checkpoint_dir, exist_ok = True)
+        return checkpoint_dir + "/generation_" + str(generation)
+        
+    
+    def find_latest_checkpoint(hyperparameters):
+        """Finds the Population checkpoint of the latest complete generation.
+
+        A checkpoint is only complete once its .json sidecar is written.
+
+        Args:
+            hyperparameters: DICT containing all the experimental settings. The
+             collection number and experiment number are used here.
+
+        Returns:
+            A str path, without an extension, as Population.load_checkpoint()
+             takes it, or None if there is no complete checkpoint.
+        """
+        
+        maindir = hyperparameters['collection_number']
+        subdir = hyperparameters['experiment']
+        if subdir == 0 or maindir == 0:
+            return None
+        checkpoint_dir = "experiments/" + str(maindir) + "/" + str(subdir) + "/checkpoints"
+        if not os.path.isdir(checkpoint_dir):
+            return None
+        generations = []
+        for file_name in os.listdir(checkpoint_dir):
+            if file_name.startswith("generation_") and file_name.endswith(".json"):
+                generations.append(int(file_name[len("generation_"):-len(".json")]))
+        if len(generations) == 0:
+            return None
+        return checkpoint_dir + "/generation_" + str(max(generations))
+        
+    
+    def format_csv_line(values):
+        """Formats a CSV line, each value followed by a comma.
+
+        Args:
+            values: iterable of the values of the line.
+
+        Returns:
+            A str of the line, ending in a newline.
+        """
+        
+        return "".join(str(value) + "," for value in values) + "\n"
+    
+    
+    def format_census_rows(prefix, census):
+        """Formats the nn_and_results_data.csv rows of a census.
+
+        Args:
+            prefix: str of the generation and stage columns, without the
+             trailing comma.
+            census: list returned by census().
+
+        Returns:
+            A list of str rows, each ending in a newline, to be written in
+             one call.
+        """
+        
+        rows = []
+        for nn in range(len(census)):
+            nn_definition, nn_fitness = census[nn]
+            values = [prefix, nn]
+            values.extend(nn_definition['meta'].values())
+            values.append(nn_definition['inputs'])
+            values.extend(nn_definition['hidden_layers'][0].values())
+            values.extend(nn_definition['output'].values())
+            rows.append("".join(f"{value}," for value in values) + f"{nn_fitness}\n")
+        return rows
+    
+    
+    def summarise_generation(generation, census):
+        """Summarises the fitnesses of a generation's census after evaluation.
+
+        Args:
+            generation: INT of the generation.
+            census: list returned by census() after the evaluation.
+
+        Returns:
+            A tuple of the generation, the number of networks, the maximum
+             fitness, and the average fitness rounded to 2 places.
+        """
+        
+        fitnesses = [nn[1] for nn in census]
+        num_nn = len(census)
+        max_fitness = max(fitnesses)
+        avg_fitness = round(sum(fitnesses) / num_nn, 2)
+        return (generation, num_nn, max_fitness, avg_fitness)
+    
+    
+    def format_summary_line(summary):
+        """Formats a generation_summary.csv line.
+
+        Args:
+            summary: tuple returned by summarise_generation().
+
+        Returns:
+            A str of the line, ending in a newline.
+        """
+        
+        return ",".join(str(value) for value in summary) + "\n"
+    
+    
+    def output_parameters_to_csv(fulldir, parameters):
+        """Outputs the experiment parameters to parameters.csv.
+
+        Args:
+            fulldir: str of the experiment folder, under experiments/.
+            parameters: DICT containing all the experimental settings.
+
+        Returns:
+            None - outputs to disk.
+        """
+        
+        with open("experiments/" + str(fulldir) + "/parameters.csv", 'w') as f:
+            f.write(Reporting.format_csv_line(parameters.keys()))
+            f.write(Reporting.format_csv_line(parameters.values()))
+    
+    
     def output_simulation_to_csv(hyperparameters, report):
         """Outputs the large reporting dict to various CSV files.
 
@@ -120,101 +301,34 @@ class Reporting():
         if subdir == 0 or maindir == 0:
             return
         
-        # Write the experiment parameters
-        
-        keys = report['parameters'].keys()
-        values = report['parameters'].values()
-        with open("experiments/" + str(fulldir) + "/parameters.csv", 'w') as f:
-            for key in keys:
-                f.write(key + ",")
-            f.write("\n")
-            for value in values:
-                f.write(str(value) + ",")
-            f.write("\n")
-       
-        # Write the header and details for each network in each generation.
+        # Write the experiment parameters, then the header and details for
+        #  the initial population, with some filler.
         
+        Reporting.output_parameters_to_csv(fulldir, report['parameters'])
         with open("experiments/" + str(fulldir) + "/nn_and_results_data.csv", 'w') as f:
-            header = (
-                "generation",
-                "stage",
-                "#",
-                "serial_number",
-                "checksum",
-                "parent_1",
-                "parent_2",
-                "hidden_checksum",
-                "output_checksum",
-                "input",
-                "hidden_type",
-                "hidden_neurons",
-                "hidden_activation",
-                "output_type",
-                "output_count",
-                "output_activation",
-                "fitness"
-                )
-            for ele in header:
-                f.write(ele + ",")
-            f.write("\n")
-            
-            # Write the details for the initial population, with some filler.
-            
-            for nn in range(len(report['initial_population'])):
-                f.write("initial, initial,")
-                f.write(f"{nn},")
-                for key in report['initial_population'][nn][0]['meta']:
-                    f.write(f"{report['initial_population'][nn][0]['meta'][key]},")
-                f.write(f"{report['initial_population'][nn][0]['inputs']},")
-                for key in report['initial_population'][nn][0]['hidden_layers'][0]:
-                    f.write(f"{report['initial_population'][nn][0]['hidden_layers'][0][key]},")
-                for key in report['initial_population'][nn][0]['output']:
-                    f.write(f"{report['initial_population'][nn][0]['output'][key]},")
-                f.write(f"{report['initial_population'][nn][1]}\n")
-
-
-        # Write the output for each network in each generation after evaluation.
+            f.write(Reporting.format_csv_line(Reporting.nn_results_header))
+            f.writelines(Reporting.format_census_rows("initial, initial", report['initial_population']))
+
+
+        # Write the output for each network in each generation, after
+        #  evaluation and after carry-over.
         
-        for gen in range(len(report['generations'])):
-            with open("experiments/" + str(fulldir) + "/nn_and_results_data.csv", 'a') as f:
-                # Write the after evaluation details
-                for nn in range(len(report['generations'][gen]['after_evaluation'])):
-                    f.write(f"{gen},after_evaluation,{nn},")
-                    for key in report['generations'][gen]['after_evaluation'][nn][0]['meta']:
-                        f.write(f"{report['generations'][gen]['after_evaluation'][nn][0]['meta'][key]},")
-                
-                    f.write(f"{report['generations'][gen]['after_evaluation'][nn][0]['inputs']},")
-                    for key in report['generations'][gen]['after_evaluation'][nn][0]['hidden_layers'][0]:
-                        f.write(f"{report['generations'][gen]['after_evaluation'][nn][0]['hidden_layers'][0][key]},")
-                    for key in report['generations'][gen]['after_evaluation'][nn][0]['output']:
-                        f.write(f"{report['generations'][gen]['after_evaluation'][nn][0]['output'][key]},")
-                    f.write(f"{report['generations'][gen]['after_evaluation'][nn][1]}\n")
-             
-             
-            # Write the output for each network after carry-over.   
-    
-            with open("experiments/" + str(fulldir) + "/nn_and_results_data.csv", 'a') as f:
-                # Write the after carryover details
-                for nn in range(len(report['generations'][gen]['after_carryover'])):
-                    f.write(f"{gen},after_carryover,{nn},")
-                    for key in report['generations'][gen]['after_carryover'][nn][0]['meta']:
-                        f.write(f"{report['generations'][gen]['after_carryover'][nn][0]['meta'][key]},")
-                
-                    f.write(f"{report['generations'][gen]['after_carryover'][nn][0]['inputs']},")
-                    for key in report['generations'][gen]['after_carryover'][nn][0]['hidden_layers'][0]:
-                        f.write(f"{report['generations'][gen]['after_carryover'][nn][0]['hidden_layers'][0][key]},")
-                    for key in report['generations'][gen]['after_carryover'][nn][0]['output']:
-                        f.write(f"{report['generations'][gen]['after_carryover'][nn][0]['output'][key]},")
-                    f.write(f"{report['generations'][gen]['after_carryover'][nn][1]}\n")
+        with open("experiments/" + str(fulldir) + "/nn_and_results_data.csv", 'a') as f:
+            for gen in range(len(report['generations'])):
+                f.writelines(Reporting.format_census_rows(
+                    f"{gen},after_evaluation",
+                    report['generations'][gen]['after_evaluation']
+                    ))
+                f.writelines(Reporting.format_census_rows(
+                    f"{gen},after_carryover",
+                    report['generations'][gen]['after_carryover']
+                    ))
 
        
         # Write the summary for each generation.
   
         with open("experiments/" + str(fulldir) + "/generation_summary.csv", 'w') as f:
-            header = ("generation","number_of_networks","maximum_fitness","average_fitness")
-            for ele in header:
-                f.write(ele + ",")
-            f.write("\n")
+            f.write(Reporting.format_csv_line(Reporting.generation_summary_header))
         
         # Calculate average fitness of this simulation, to be returned and written.
         
@@ -223,24 +337,11 @@ class Reporting():
             # Calculate and write the output for each network in each
             #  generation, after evaluation
             
-            fitnesses = []
-            num_nn = len(report['generations'][gen]['after_evaluation'])
-            
-            # Gather metrics per nn
-            
-            for nn in range(len(report['generations'][gen]['after_evaluation'])):
-                nn_fitness = report['generations'][gen]['after_evaluation'][nn][1]
-                fitnesses.append(nn_fitness)
-                
-            # Summarise metrics
-            
-            max_fitness = max(fitnesses)
-            avg_fitness = round(sum(fitnesses) / num_nn, 2)
-            sim_avg_fitness += avg_fitness
+            summary = Reporting.summarise_generation(gen, report['generations'][gen]['after_evaluation'])
+            sim_avg_fitness += summary[3]
             
             with open("experiments/" + str(fulldir) + "/generation_summary.csv", 'a') as f:
-                f.write(f"{gen},{num_nn},{max_fitness},{avg_fitness}")
-                f.write("\n")
+                f.write(Reporting.format_summary_line(summary))
                 
         sim_avg_fitness = round(sim_avg_fitness / len(report['generations']),4)
         os.mkdir("experiments/" + str(fulldir) + "/!-- simulation average fitness -- " + str(sim_avg_fitness))
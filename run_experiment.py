@@ -1,13 +1,14 @@
 """Configures parameters, runs the simulations.
 
 Initial point for configuring the experimental parameters and triggering the
- simulation. Loops through optional lists of parameter values which can run
- a single experiment, or an exponential number of them.
+ simulation. Sweeps through optional lists of parameter values which can run
+ a single experiment, or an exponential number of them, several at once.
 """
 
 import test_and_run_genetic_algorithm
 import datetime
 import reporting
+import sweep
         
 def main(hyperparameters):
     """Runs the simulation with the hyperparameters argument payload.
@@ -34,7 +35,6 @@ if __name__ == "__main__":
     
     start = datetime.datetime.now()
     cumulative = {'generations': 0, 'networks' : 0}
-    max_fitness = []
     remaining_experiment_count = 1
     
     # Defaults, collection parameters, fixed values that do not iterate.
@@ -44,6 +44,67 @@ if __name__ == "__main__":
         'collection_number': '0',
         'experiment': '',
         'collection_comment': "Demonstration video",
+        # The checksum columns of nn_and_results_data.csv are summed in
+        #  float64, see Reporting.nn_results_header, so they differ slightly
+        #  from those of experiment folders written before networks had
+        #  digests.
+        # How the networks are run through the game: 'sequential' one at a
+        #  time, 'lockstep' all together with batched forward passes,
+        #  'parallel' shared across evaluation_workers processes, or 'async'
+        #  with game steps in threads while forward passes are batched.
+        'evaluation_mode': 'sequential',
+        # Worker processes for 'parallel' mode, and game step threads for
+        #  'async' mode, None for one per CPU core.
+        'evaluation_workers': None,
+        # How parents are selected for breeding: 'fitness_proportionate',
+        #  'rank', 'sus', or 'tournament'. See Population.set_selection_strategy.
+        'selection_strategy': 'fitness_proportionate',
+        'tournament_size': 3,
+        'rank_pressure': 1.5,
+        # How each network computes its outputs: 'keras' models built once per
+        #  architecture and shared, 'keras_compiled' tf.function graphs traced
+        #  once per architecture, or 'numpy' matrix multiplications straight
+        #  from the stored weights.
+        'inference_backend': 'keras',
+        # Where the games are played: 'textworld' in the TextWorld
+        #  interpreter, or 'native' for coin_collector mazes walked in-process
+        #  by NativeMaze.
+        'environment_backend': 'textworld',
+        # End a game as soon as a network repeats a state, which it would
+        #  repeat until out of steps anyway. Same fitnesses, fewer steps.
+        #  Has no effect when force_random_choice is on.
+        'detect_cycles': False,
+        # Fitnesses of already evaluated networks to remember, so carried
+        #  over networks are not played again. 0 turns the cache off.
+        'fitness_cache_size': 0,
+        # File to keep the fitness cache in between experiments, or None.
+        'fitness_cache_path': None,
+        # Answer steps another network of the generation has already played
+        #  from a trie of the replies, in all but 'parallel' mode. Only with
+        #  the 'native' environment backend, as TextWorld games cannot have
+        #  their state restored, and it is ignored with a warning otherwise.
+        'share_steps': False,
+        # Also write each generation's networks to a typed columnar file:
+        #  'parquet' (needs pyarrow, otherwise falls back to 'npz'), 'npz', or
+        #  None for the CSV files only.
+        'columnar_output': None,
+        # Checkpoint the population at the end of every generation, and
+        #  resume an interrupted experiment from its last checkpoint rather
+        #  than failing because its folder already exists.
+        'checkpoint': False,
+        'resume': False,
+        # Experiments of the sweep run at once, each in a process of its own,
+        #  None for one per CPU core, or 1 to run them one after the other in
+        #  this process. With more than 1, the evaluation_workers of each
+        #  experiment are capped at its share of the CPU cores.
+        'sweep_workers': None,
+        # Run every configuration for halving_min_generations, then continue
+        #  only the top 1/halving_reduction_factor of them, by average fitness,
+        #  for halving_reduction_factor times as many generations, and so on
+        #  up to 'generations'. Survivors resume from their checkpoints.
+        'successive_halving': False,
+        'halving_min_generations': 2,
+        'halving_reduction_factor': 3,
     }
     
     # Iterating hyperparameter values.
@@ -82,72 +143,33 @@ if __name__ == "__main__":
         print(f"Aborting at your request.")
         quit()
         
-    # Modification loops to fill in the parameters for a single experiment.
-    # Ignoring the 80 character line limit here to ensure this remains both
-    #  readable and manually traversable in case of troubleshooting.
-    
-    for chain in range(len(hyperparameter_ranges['chain_rewards'])):
-        hyperparameters['chain_rewards'] = hyperparameter_ranges['chain_rewards'][chain]
-        for f_pickup in range(len(hyperparameter_ranges['force_pickup'])):
-            hyperparameters['force_pickup'] = hyperparameter_ranges['force_pickup'][f_pickup]
-            for f_random in range(len(hyperparameter_ranges['force_random_choice'])):
-                hyperparameters['force_random_choice'] = hyperparameter_ranges['force_random_choice'][f_random]
-                for v_step in range(len(hyperparameter_ranges['valid_step_reward'])):
-                    hyperparameters['valid_step_reward'] = hyperparameter_ranges['valid_step_reward'][v_step]
-                    for f_step in range(len(hyperparameter_ranges['failed_step_reward'])):
-                        hyperparameters['failed_step_reward'] = hyperparameter_ranges['failed_step_reward'][f_step]
-                        for f_bias in range(len(hyperparameter_ranges['fitness_bias_scalar'])):
-                            hyperparameters['fitness_bias_scalar'] = hyperparameter_ranges['fitness_bias_scalar'][f_bias]
-                            for s_retain in range(len(hyperparameter_ranges['steps_to_retain'])):
-                                hyperparameters['steps_to_retain'] = hyperparameter_ranges['steps_to_retain'][s_retain]
-                                for game in range(len(hyperparameter_ranges['game'])):
-                                    hyperparameters['game'] = hyperparameter_ranges['game'][game]
-                                    for p_m_s in range(len(hyperparameter_ranges['point_mutation_scalar'])):
-                                        hyperparameters['point_mutation_scalar'] = hyperparameter_ranges['point_mutation_scalar'][p_m_s]
-                                        for p_m_a_m in range(len(hyperparameter_ranges['point_mutation_amount_max'])):
-                                            hyperparameters['point_mutation_amount_max'] = hyperparameter_ranges['point_mutation_amount_max'][p_m_a_m]
-                                            for p_m_c_m in range(len(hyperparameter_ranges['point_mutation_chance_max'])):
-                                                hyperparameters['point_mutation_chance_max'] = hyperparameter_ranges['point_mutation_chance_max'][p_m_c_m]
-                                                for p_m_a in range(len(hyperparameter_ranges['point_mutation_amount'])):
-                                                    hyperparameters['point_mutation_amount'] = hyperparameter_ranges['point_mutation_amount'][p_m_a]
-                                                    for p_m_c in range(len(hyperparameter_ranges['point_mutation_chance'])):
-                                                        hyperparameters['point_mutation_chance'] = hyperparameter_ranges['point_mutation_chance'][p_m_c]
-                                                        for carryover in range(len(hyperparameter_ranges['carryover_count'])):
-                                                            hyperparameters['carryover_count'] = hyperparameter_ranges['carryover_count'][carryover]
-                                                            for s_new in range(len(hyperparameter_ranges['size_new_generations'])):
-                                                                hyperparameters['size_new_generations'] = hyperparameter_ranges['size_new_generations'][s_new]
-                                                                for gener in range(len(hyperparameter_ranges['generations'])):
-                                                                    hyperparameters['generations'] = hyperparameter_ranges['generations'][gener]
-                                                                    
-                                                                    # Get the timestamp to name the subfolder
-                                                                    
-                                                                    exper_start = datetime.datetime.now()
-                                                                    hyperparameters['experiment'] = str(exper_start.minute) + "." + str(exper_start.second) + "." + str(exper_start.microsecond)[:4]
-                                                                    
-                                                                    # And run the experiment
-                                                                    
-                                                                    avg_fit = main(hyperparameters)
-                                                                    
-                                                                    # Store max fitness and other stats
-                                                                    
-                                                                    exper_end = datetime.datetime.now()
-                                                                    exper_elapsed = exper_end - exper_start
-                                                                    remaining_experiment_count -= 1
-                                                                    
-                                                                    print(
-                                                                        f"Writing experiment {hyperparameters['experiment']} " \
-                                                                        f"to the filesystem. That experiment took {exper_elapsed}, " \
-                                                                        f"and there are {remaining_experiment_count} experiments left. "\
-                                                                        f"Estimating {remaining_experiment_count * exper_elapsed} remaining."
-                                                                        )
-                                                                    
-                                                                    max_fitness.append([hyperparameters['experiment'], avg_fit])
-                                                                    cumulative['generations'] += hyperparameters['generations']
-                                                                    cumulative['networks'] += hyperparameters['size_new_generations'] * hyperparameters['generations']
-                                                                    
-
-    
-    # Report the folders by highest average fitnesses, and other statistics.
+    # Run every configuration of the ranges, several at once, each in an
+    #  experiment folder named by the stable ID of its configuration.
+    # Configurations completed by an earlier run of this sweep are skipped.
+    
+    experiment_sweep = sweep.Sweep(
+        hyperparameters,
+        hyperparameter_ranges,
+        hyperparameters['sweep_workers']
+        )
+    configurations = experiment_sweep.get_configurations()
+    if hyperparameters['successive_halving']:
+        max_fitness = experiment_sweep.run_successive_halving(
+            configurations,
+            hyperparameters['halving_min_generations'],
+            hyperparameters['halving_reduction_factor']
+            )
+    else:
+        max_fitness = experiment_sweep.run(configurations)
+    cumulative['generations'] = experiment_sweep.generations_run
+    cumulative['networks'] = experiment_sweep.networks_run
+    
+    # Report the folders by highest average fitnesses, and other statistics,
+    #  unless every experiment was already complete.
+    
+    if cumulative['generations'] == 0:
+        print("Every experiment was already complete, nothing was run.")
+        quit()
     
     most_fit_folders = sorted(max_fitness, key=lambda x: x[1], reverse=True)
     end = datetime.datetime.now()
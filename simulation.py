@@ -6,14 +6,21 @@ The Simulation interfaces with TextWorld, to determine which are the valid steps
  fitness back to the Network instance for future use.
 """
 
-import keras
+import atexit
+import multiprocessing
 import numpy as np
-import random
-from copy import deepcopy
+import os
+import warnings
+
+import async_evaluation
 
-import textworld
-import textworld.gym
 import TextworldGames
+import episode as episode_module
+import inference
+import model_pool
+import native_maze
+import population
+import step_trie
 
 # from keras import layers
 
@@ -28,20 +35,71 @@ class Simulation():
     Attributes:
     remove this: only need to be here if there is an __init__
         env_parameters: A DICT of which TextWorld environment parameters should
-         be returned when TextWorld is queried for them.
+         be returned when TextWorld is queried for them, or None until the
+         first TextWorld game is registered.
+        registered_games: DICT of game shortcode to the registered Gym ID and
+         max_steps, so that each game is registered once.
+        evaluation_workers: INT count of worker processes for the "parallel"
+         evaluation mode, and of game step threads for the "async" mode, or
+         None for one per CPU core.
+        worker_pool: the multiprocessing Pool of the "parallel" evaluation
+         mode, created when first needed.
+        worker_pool_game: str shortcode of the game the worker_pool has
+         registered.
+        environment_backend: str of "textworld" to play the games in the
+         TextWorld interpreter, or "native" to play coin_collector mazes with
+         native_maze.NativeMaze.
+        environment_pools: DICT of game shortcode to a list of the idle
+         environments of that game, kept open to be reused.
+        detect_cycles: Boolean to end a game as soon as the network repeats
+         a state, as it would only repeat it until out of steps. Ignored when
+         random choices are forced.
+        fitness_cache: fitness_cache.FitnessCache of the fitnesses of Networks
+         already evaluated, or None to evaluate every Network.
+        share_steps: Boolean to answer the steps of a game that another
+         Network of the generation has already played from a
+         step_trie.StepTrie, rather than playing them again. Only with the
+         "native" environment backend, see __init__().
+        step_tries: DICT of game shortcode to the StepTrie of this generation.
+        model_pool: model_pool.ModelPool of the Keras models shared by the
+         Networks of each architecture.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        evaluation_workers=None,
+        environment_backend="textworld",
+        detect_cycles=False,
+        fitness_cache=None,
+        share_steps=False
+        ):
         # self.simulation_id = 0
-        self.env_parameters = textworld.EnvInfos(
-            admissible_commands = True,
-            entities = True,
-            verbs = True,
-            command_templates = True,
-            moves = True,
-            won = True,
-            score = True
-        )
+        self.registered_games = {}
+        self.evaluation_workers = evaluation_workers
+        self.environment_backend = environment_backend
+        self.environment_pools = {}
+        self.detect_cycles = detect_cycles
+        self.fitness_cache = fitness_cache
+        
+        # Sharing steps only saves any when a Network leaving the shared path
+        #  has the environment restored to where it left. A TextWorld
+        #  environment cannot be restored, only reset with the shared
+        #  commands replayed, which plays as many steps as the Network would
+        #  have played itself, so steps are only shared on the native backend.
+        
+        if share_steps and environment_backend != "native":
+            warnings.warn(
+                f"share_steps is ignored with the {environment_backend} environment backend, "
+                "steps are only shared with the native backend.",
+                RuntimeWarning
+                )
+            share_steps = False
+        self.share_steps = share_steps
+        self.step_tries = {}
+        self.model_pool = model_pool.ModelPool()
+        self.worker_pool = None
+        self.worker_pool_game = None
+        self.env_parameters = None
     
     def register_env_id(self, code):
         """Creates the Gymnasium environment, attached to a specified TextWorld game.
@@ -57,6 +115,29 @@ class Simulation():
             max_steps: the INT maximum number of steps for the game
         """
         
+        # Each game only needs to be registered once.
+        
+        if code in self.registered_games:
+            return self.registered_games[code]
+        
+        # TextWorld is only imported when a TextWorld game is played, so the
+        #  native backend runs without it, as Keras is only imported when a
+        #  Keras model is built.
+        
+        import textworld
+        import textworld.gym
+        if self.env_parameters is None:
+            self.env_parameters = textworld.EnvInfos(
+                admissible_commands = True,
+                entities = True,
+                verbs = True,
+                command_templates = True,
+                moves = True,
+                won = True,
+                score = True,
+                location = True
+            )
+        
         # Initialise the TextWorld games library, and read from it.
         
         tw_game_index = TextworldGames.TextworldGames()
@@ -70,9 +151,82 @@ class Simulation():
             self.env_parameters,
             max_episode_steps = max_steps
             )
+        self.registered_games[code] = (environment_id, max_steps)
         
         return environment_id, max_steps
     
+    def create_environment(self, code):
+        """Creates an environment to play a game in, with the selected backend.
+
+        Args:
+            code: str shortcode to identify which TextWorld map should be used.
+
+        Returns:
+            environment: the TextWorld/Gym environment, or NativeMaze.
+            max_steps: the INT maximum number of steps for the game
+        """
+        
+        if self.environment_backend == "native":
+            tw_game_index = TextworldGames.TextworldGames()
+            environment = native_maze.NativeMaze(tw_game_index.get_game_data_path(code))
+            return environment, tw_game_index.get_game_max_steps(code)
+        
+        import textworld.gym
+        environment_id, max_steps = self.register_env_id(code)
+        return textworld.gym.make(environment_id), max_steps
+    
+    def acquire_environment(self, code):
+        """Hands out an environment of a game, reusing an idle one if possible.
+
+        Starting the TextWorld interpreter is slow compared to a short game,
+         so environments are kept open between games, and between
+         generations, rather than made for every Network. Each game only ever
+         has as many environments as were in use at the same time.
+        The environment is reset by the Episode that plays it.
+
+        Args:
+            code: str shortcode to identify which TextWorld map should be used.
+
+        Returns:
+            environment: the TextWorld/Gym environment, or NativeMaze.
+            max_steps: the INT maximum number of steps for the game
+        """
+        
+        idle_environments = self.environment_pools.setdefault(code, [])
+        if len(idle_environments) == 0:
+            return self.create_environment(code)
+        return idle_environments.pop(), TextworldGames.TextworldGames().get_game_max_steps(code)
+    
+    def share_environment_steps(self, code, environment):
+        """Wraps an environment to share its steps with the rest of the generation.
+
+        Args:
+            code: str shortcode of the game of the environment.
+            environment: the TextWorld/Gym environment, or NativeMaze.
+
+        Returns:
+            A step_trie.TrieEnvironment of the environment, if steps are
+             shared, or otherwise the environment itself.
+        """
+        
+        if not self.share_steps:
+            return environment
+        if code not in self.step_tries:
+            self.step_tries[code] = step_trie.StepTrie()
+        return step_trie.TrieEnvironment(environment, self.step_tries[code])
+    
+    def release_environment(self, code, environment):
+        """Returns an environment handed out by acquire_environment() to the pool.
+
+        Args:
+            code: str shortcode of the game of the environment.
+            environment: the TextWorld/Gym environment, or NativeMaze.
+
+        Returns:
+            None. The environment is kept open for reuse.
+        """
+        
+        self.environment_pools.setdefault(code, []).append(environment)
       
     def apply_nn_to_textworld(
         self,
@@ -88,7 +242,7 @@ class Simulation():
         """Runs the neural network through the TextWorld game.
 
         Args:
-            nn_obj: the Keras neural network, as an object.
+            nn_obj: the Keras neural network, or inference.NumpyModel, as an object.
             game: INT the ID of the TextWorld/Gym environment to be used.
             force_random_choice: Boolean to force random movement if a the network
              is repeating a previously failed action.
@@ -106,185 +260,370 @@ class Simulation():
             
         """
         
-        environment_id, max_steps = self.register_env_id(game)
-        environment = textworld.gym.make(environment_id)
-        obs, infos = environment.reset()
-
-        # Per TextWorld docs, entities are everything in the game,
-        #  anywhere in the maze.
-        # Admissible commands are all the commands relevant to the current
-        #  game state. So this will change from step to step.
-        # Verbs - all as understood by the game, is static from step to step.
-        # To build the action space of available commands that could be
-        #  entered into the interpreter:
-        #   Get the verbs, and remove the ones that aren't necessary here
-        #   like drop, examine, inventory, and look.
-        #   Which leaves an action space of go * 4, one for each cardinal
-        #   direction, and take coin, since that's the only object in the game.
-        
-        action_space = ["take coin", "go east", "go west", "go north", "go south"]
-
-        # Initialise the network's chosen action
-        
-        nn_action = None
+        # The environment goes back to the pool even if the game fails, so
+        #  that it is closed with the rest by close().
         
-        # Setup the previous_action_spaces_and_choices to the right size for
-        #  storing the prescribed number of previous action spaces.
-        
-        previous_action_spaces_and_choices = []
-        for i in range(steps_to_retain):
-            previous_action_spaces_and_choices.append([0, 0, 0, 0, 0, 0, 0])
-            
-      
-        # Here the network is actually playing the game.
-        # This is where we feed the action space to the network and get
-        #  a result, and assign that result to step.
-        
-        for i in range(max_steps, 0, -1):
-            # Build the action space for this room/step - the curated list of
-            #  actions the network could legally make from the list of 
-            #  available actions in this room.
-
-            # Poll the admissible actions - all the commands relevant to the 
-            #  current game state.
-            # Parse through the curated action space, and mark as to if it's 
-            #  also in the currently admissible commands.
-            
-            # For each step, build the input tensor from a one-hot list of
-            #  which of the global permitted commands are valid in this room.
-            # So if there is no coin in the room, despite "take coin" being
-            #  globally valid, the action space for this room would have a 0 for
-            #  "take coin". The one-hot list for the steps in this room are
-            #  stored in action_space_values[].
+        environment, max_steps = self.acquire_environment(game)
+        try:
+            episode = episode_module.Episode(
+                self.share_environment_steps(game, environment),
+                max_steps,
+                force_random_choice,
+                force_pickup,
+                steps_to_retain,
+                failed_step_reward,
+                valid_step_reward,
+                chain_rewards,
+                self.detect_cycles
+                )
             
-            action_space_values = []
-            for action in action_space:
-                if action in infos["admissible_commands"]:
-                    action_space_values.append(1)
-                else:
-                    action_space_values.append(0)
-                    
-            # Combine the current action space with the previous action
-            #  spaces and results, to build the full input state.
+            # Here the network is actually playing the game.
+            # This is where we feed the action space to the network and get
+            #  a result, and the Episode plays that result as the next step.
             
-            final_input = deepcopy(action_space_values)
-            for prev in previous_action_spaces_and_choices:
-                for ele in prev:
-                    final_input.append(ele)
+            while not episode.finished:
+                final_input = episode.get_input_state()
 
-            # Convert the input space to a tensor, and feed that to the network
-            #  to get the probabilities for each of the 5 possible actions.
-            
-            nn_input_tensor = keras.backend.constant([final_input])
-            nn_outputs = nn_obj(nn_input_tensor)
-                      
-            # Use argsort to determine the arrangement of the probabilities
-            #  in the returned list. This is required over argmax because there
-            #  is a chance that the most preferred step will be discarded.
-            
-            sorted = np.argsort(nn_outputs[0].numpy())
-            descending = sorted[::-1]
-            nn_action = descending[0]
-            
-            # Here is the editing out a choice which is proven to not work.
-            # In early testing the networks were very likely to get stuck, 
-            #  repeatedly walking into the same wall or picking up a coin
-            #  that wasn't there.
-            # To avoid this, check the current observation, which is the result
-            #  of the last step in the game. If it suggests that there is no
-            #  coin to pick up, which is the response when the network tries to
-            #  pick up a coin that isn't there, or that the last step was
-            #  invalid, remove those choices from the possible actions.
-            # Basically, if the selected action is the same as the last action,
-            #  then check if that did anything. If it failed, choose the next
-            #  most likely option instead.
-            # Else, set the action to be what the network has decided.
+                # Convert the input space to a tensor, and feed that to the network
+                #  to get the probabilities for each of the 5 possible actions.
+                
+                nn_input_tensor = final_input[None, :]
+                nn_outputs = nn_obj(nn_input_tensor)
+                episode.take_step(np.asarray(nn_outputs[0]))
+        finally:
+            self.release_environment(game, environment)
             
-            # Use random choice instead of next most likely, if the flag is set
+        # And return the fitness of this network, the number of steps still
+        #  available when the network found the coin, or the minimum fitness
+        #  of 1 if it failed to find the coin.
+        
+        return episode.fitness
+    
+    def evaluate_population_sequential(
+        self,
+        sim_population,
+        game,
+        force_random_choice,
+        force_pickup,
+        steps_to_retain,
+        failed_step_reward,
+        valid_step_reward,
+        chain_rewards,
+        inference_backend="keras"
+        ):
+        """Runs the Networks of the Population through TextWorld, one at a time.
+
+        Args:
+            sim_population: the Population instance to be evaluated.
+            game: the str shortcode of the TextWorld game to be used.
+            force_random_choice: Boolean to force random movement if a the network
+             is repeating a previously failed action.
+            force_pickup: Boolean to force the network to choose to pick up an
+             available coin, thus winning the game.
+            steps_to_retain: INT number of previous steps to be included 
+             in the input tensor for each new step.
+            failed_step_reward: INT reward for making an invalid choice.
+            valid_step_reward: INT reward for making a valid choice.
+            chain_rewards: Boolean to sum previous valid step rewards, or not.
+            inference_backend: str of "keras", "keras_compiled", or "numpy",
+             the Network model type to be evaluated.
+
+        Returns:
+            None. Writes the fitness of each Network back to the Population.
+        """
+        
+        networks_count = sim_population.get_population_size()
+        for i in range(networks_count):
+            # Get the NumPy model from the Network object, or load it into
+            #  the shared Keras model of its architecture.
             
-            if descending[0] == nn_action and force_random_choice:
-                # The current step choice is the same as the previous.
-                # Check what happened the last time this step was taken
-                
-                if previous_action_spaces_and_choices[0][6] == failed_step_reward:
-                    # Means last step resulted in walking into a wall
-                    #  or trying to pick up a coin that wasn't there.
-                    # Avoid doing that again by choosing a different action.
-                    
-                    nn_action = descending[random.randint(1, len(descending) - 1)]
+            if inference_backend == "numpy":
+                nn_obj = sim_population.get_neural_network_model(i, inference_backend)
             else:
-                # The last step didn't fail outright, accept network's choice
-                #  to try it again.
-                
-                nn_action = descending[0]
-                
-            # If flagged, force the network to pick the coin if it's available,
-            #  denoted by a action_space_values[0] == 1    
-                    
-            if action_space_values[0] == 1 and force_pickup:
-                # action 0 is defined above as "take coin" - force it now since
-                #  there is a coin in the room and the flag is true
+                nn_obj = self.model_pool.get_model(sim_population.get_network(i), inference_backend)
             
-                nn_action = 0
-                
-            # Now, having determined which step the network would like to take, 
-            #  or overriding and forcing the decision, 
-            #  send that action to the game.
+            # Send each network off to play the game now, and 
+            #  retrieve and store the fitness the Network scores.
             
-            obs, score, done, infos = environment.step(action_space[nn_action])
+            fitness = self.apply_nn_to_textworld(
+                nn_obj,
+                game,
+                force_random_choice,
+                force_pickup,
+                steps_to_retain,
+                failed_step_reward,
+                valid_step_reward,
+                chain_rewards
+                )
+            sim_population.set_nn_fitness(i, fitness)
+    
+    def evaluate_population_lockstep(
+        self,
+        sim_population,
+        game,
+        force_random_choice,
+        force_pickup,
+        steps_to_retain,
+        failed_step_reward,
+        valid_step_reward,
+        chain_rewards,
+        inference_backend="keras"
+        ):
+        """Runs every Network of the Population through TextWorld together.
 
-            # Evaluate the step.
-            # Check the info output to see if the network solved the game.
-            #  If so, break out now. It's a Boolean, returning True|False.
-            
-            if infos['won']:
-                break
+        Each Network plays its own game, but all the games are advanced one
+         step at a time in lockstep, so that each step needs a single batched
+         forward pass over all the Networks still playing. Finished games are
+         dropped from the batch.
+
+        Args:
+            sim_population: the Population instance to be evaluated.
+            game: the str shortcode of the TextWorld game to be used.
+            force_random_choice: Boolean to force random movement if a the network
+             is repeating a previously failed action.
+            force_pickup: Boolean to force the network to choose to pick up an
+             available coin, thus winning the game.
+            steps_to_retain: INT number of previous steps to be included 
+             in the input tensor for each new step.
+            failed_step_reward: INT reward for making an invalid choice.
+            valid_step_reward: INT reward for making a valid choice.
+            chain_rewards: Boolean to sum previous valid step rewards, or not.
+            inference_backend: unused, the stacked weights are always
+             evaluated with NumPy.
+
+        Returns:
+            None. Writes the fitness of each Network back to the Population.
+        """
+        
+        # The environments go back to the pool even if a game fails, so that
+        #  they are closed with the rest by close().
+        
+        networks_count = sim_population.get_population_size()
+        episodes = []
+        environments = []
+        try:
+            for i in range(networks_count):
+                environment, max_steps = self.acquire_environment(game)
+                environments.append(environment)
+                episodes.append(episode_module.Episode(
+                    self.share_environment_steps(game, environment),
+                    max_steps,
+                    force_random_choice,
+                    force_pickup,
+                    steps_to_retain,
+                    failed_step_reward,
+                    valid_step_reward,
+                    chain_rewards,
+                    self.detect_cycles
+                    ))
             
-            # Determine if the step resulted in running into a wall or trying to
-            #  pick up a coin that wasn't there. 
-            # After this we know the current action space, the step decision, 
-            #  and the result of the step.
-            # So populate that into the previous choices array for the next step.
+            # The stacked weights of the active Networks are only rebuilt when a
+            #  game finishes and the batch shrinks.
             
-            result_to_be_added = None
-            if obs.strip() == "You can't go that way." or obs.strip() == "You can't see any such thing.":
-                result_to_be_added = failed_step_reward
-            else:
-                # Here is a good step. The network didn't win the game, but also
-                #  didn't walk into a wall or try to pick up a coin that wasn't
-                #  there.
-                # Check if we are to chain the rewards, incrementing them as a
-                #  series of valid decisions are made, or not.
+            active = list(range(networks_count))
+            stacked_layers = None
+            while len(active) > 0:
+                if stacked_layers is None:
+                    stacked_layers = sim_population.get_stacked_layers(active)
+                nn_inputs = np.stack([episodes[i].get_input_state() for i in active])
+                nn_outputs = inference.Inference.forward_batch(nn_inputs, *stacked_layers)
+                for row in range(len(active)):
+                    episodes[active[row]].take_step(nn_outputs[row])
                 
-                if chain_rewards:
-                    previous_step_reward = previous_action_spaces_and_choices[len(previous_action_spaces_and_choices) - 1][6]
-                    result_to_be_added = valid_step_reward + previous_step_reward
-                else:
-                    result_to_be_added = valid_step_reward
-            
-            # We have the current action space, the step decision, and the 
-            #  result of the step. Populate that into the previous choices
-            #  array for the next step/iteration of this loop.
-            
-            this_step_and_results = deepcopy(action_space_values)
-            this_step_and_results.append(nn_action)
-            this_step_and_results.append(result_to_be_added)   
-            previous_action_spaces_and_choices.append(this_step_and_results)
-
-            # Finally, with the previous results now appended with the most recent
-            #  step choices and results, remove the oldest entry in the list,
-            #  to keep it at the required number of input steps.
+                still_active = [i for i in active if not episodes[i].finished]
+                if len(still_active) != len(active):
+                    active = still_active
+                    stacked_layers = None
+        finally:
+            for environment in environments:
+                self.release_environment(game, environment)
+        
+        for i in range(networks_count):
+            sim_population.set_nn_fitness(i, episodes[i].fitness)
+        
+    def evaluate_population_async(
+        self,
+        sim_population,
+        game,
+        force_random_choice,
+        force_pickup,
+        steps_to_retain,
+        failed_step_reward,
+        valid_step_reward,
+        chain_rewards,
+        inference_backend="keras"
+        ):
+        """Runs every Network of the Population through TextWorld concurrently.
+
+        Like the lockstep mode, but each game steps on as soon as its Network's
+         outputs are ready, in a thread pool, while the outputs of the other
+         Networks are evaluated in batches, see async_evaluation.AsyncEvaluation.
+
+        Args:
+            sim_population: the Population instance to be evaluated.
+            game: the str shortcode of the TextWorld game to be used.
+            force_random_choice: Boolean to force random movement if a the network
+             is repeating a previously failed action.
+            force_pickup: Boolean to force the network to choose to pick up an
+             available coin, thus winning the game.
+            steps_to_retain: INT number of previous steps to be included 
+             in the input tensor for each new step.
+            failed_step_reward: INT reward for making an invalid choice.
+            valid_step_reward: INT reward for making a valid choice.
+            chain_rewards: Boolean to sum previous valid step rewards, or not.
+            inference_backend: unused, the stacked weights are always
+             evaluated with NumPy.
+
+        Returns:
+            None. Writes the fitness of each Network back to the Population.
+        """
+        
+        # The environments go back to the pool even if a game fails, so that
+        #  they are closed with the rest by close().
+        
+        networks_count = sim_population.get_population_size()
+        episodes = []
+        environments = []
+        try:
+            for i in range(networks_count):
+                environment, max_steps = self.acquire_environment(game)
+                environments.append(environment)
+                episodes.append(episode_module.Episode(
+                    self.share_environment_steps(game, environment),
+                    max_steps,
+                    force_random_choice,
+                    force_pickup,
+                    steps_to_retain,
+                    failed_step_reward,
+                    valid_step_reward,
+                    chain_rewards,
+                    self.detect_cycles
+                    ))
             
-            previous_action_spaces_and_choices.pop(0)
+            # The native mazes never wait on anything, so their steps are played
+            #  in the event loop rather than handed to threads.
             
-        # And return the fitness of this network. If the loop broke then i will
-        #  be greater than 1, representing the number of steps still available
-        #  when decrementing from the max_steps. If the network failed to find
-        #  the coin then i will be 1, the minimum fitness.
+            if self.environment_backend == "native":
+                step_workers = 0
+            else:
+                step_workers = self.evaluation_workers or os.cpu_count()
+            engine = async_evaluation.AsyncEvaluation(
+                *sim_population.get_stacked_layers(),
+                step_workers
+                )
+            engine.run(episodes)
+        finally:
+            for environment in environments:
+                self.release_environment(game, environment)
         
-        return i
+        for i in range(networks_count):
+            sim_population.set_nn_fitness(i, episodes[i].fitness)
+    
+    def evaluate_population_parallel(
+        self,
+        sim_population,
+        game,
+        force_random_choice,
+        force_pickup,
+        steps_to_retain,
+        failed_step_reward,
+        valid_step_reward,
+        chain_rewards,
+        inference_backend="keras"
+        ):
+        """Runs the Networks of the Population through TextWorld, across processes.
+
+        The DNA and weights of each Network are sent to a pool of worker
+         processes, each with its own registered TextWorld game, and the
+         fitnesses are written back to the Population in Network order.
+
+        Args:
+            sim_population: the Population instance to be evaluated.
+            game: the str shortcode of the TextWorld game to be used.
+            force_random_choice: Boolean to force random movement if a the network
+             is repeating a previously failed action.
+            force_pickup: Boolean to force the network to choose to pick up an
+             available coin, thus winning the game.
+            steps_to_retain: INT number of previous steps to be included 
+             in the input tensor for each new step.
+            failed_step_reward: INT reward for making an invalid choice.
+            valid_step_reward: INT reward for making a valid choice.
+            chain_rewards: Boolean to sum previous valid step rewards, or not.
+            inference_backend: str of "keras", "keras_compiled", or "numpy",
+             the Network model type to be evaluated.
+
+        Returns:
+            None. Writes the fitness of each Network back to the Population.
+        """
         
+        # The worker processes keep their registered game between
+        #  generations, so the pool is only replaced if the game changes.
+        # Spawned rather than forked, so that the workers do not inherit any
+        #  TensorFlow state from this process.
+        
+        if self.worker_pool is None or self.worker_pool_game != game:
+            self.close_worker_pool()
+            self.worker_pool = multiprocessing.get_context("spawn").Pool(
+                self.evaluation_workers or os.cpu_count(),
+                initialise_worker,
+                (game, self.environment_backend, self.detect_cycles)
+                )
+            self.worker_pool_game = game
+        
+        jobs = []
+        for i in range(sim_population.get_population_size()):
+            jobs.append((
+                sim_population.get_neural_network_def(i),
+                sim_population.get_weight_bias_definitions(i, 1),
+                sim_population.get_weight_bias_definitions(i, 2),
+                game,
+                force_random_choice,
+                force_pickup,
+                steps_to_retain,
+                failed_step_reward,
+                valid_step_reward,
+                chain_rewards,
+                inference_backend
+                ))
+        
+        fitnesses = self.worker_pool.map(evaluate_network_in_worker, jobs)
+        for i in range(len(fitnesses)):
+            sim_population.set_nn_fitness(i, fitnesses[i])
+    
+    def close_worker_pool(self):
+        """Shuts down the worker processes of the "parallel" evaluation mode.
+
+        Args:
+            None.
 
+        Returns:
+            None.
+        """
+        
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+            self.worker_pool.join()
+            self.worker_pool = None
+            self.worker_pool_game = None
+    
+    def close(self):
+        """Shuts down the worker processes, closes the pooled environments,
+         and drops the shared models.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        
+        self.close_worker_pool()
+        for idle_environments in self.environment_pools.values():
+            for environment in idle_environments:
+                environment.close()
+        self.environment_pools = {}
+        self.model_pool.clear()
+        
     def evaluate_population(
         self,
         sim_population,
@@ -294,13 +633,23 @@ class Simulation():
         steps_to_retain,
         failed_step_reward,
         valid_step_reward,
-        chain_rewards
+        chain_rewards,
+        evaluation_mode="sequential",
+        inference_backend="keras"
         ):
         """Evaluates the Population by sending the Networks through TextWorld.
 
         Takes the Population, and one at a time gets each Network from the
          Population and runs it through the TextWorld game, then commanding the
          Population to store the returned fitness of the Network.
+        In "lockstep" mode all the Networks play at once instead, see
+         evaluate_population_lockstep(), and in "parallel" mode they are shared
+         between worker processes, see evaluate_population_parallel(). In
+         "async" mode they play concurrently, see evaluate_population_async().
+        If there is a fitness cache, only the Networks not found in it are
+         run through the game, unless random choices are forced.
+        If steps are shared, all but the parallel mode answer steps already
+         played in this generation from a fresh StepTrie per game.
          
         Args:
             sim_population: the Population instance to be evaluated.
@@ -314,6 +663,10 @@ class Simulation():
             failed_step_reward: INT reward for making an invalid choice.
             valid_step_reward: INT reward for making a valid choice.
             chain_rewards: Boolean to sum previous valid step rewards, or not.
+            evaluation_mode: str of "sequential", "lockstep", "parallel", or
+             "async".
+            inference_backend: str of "keras", "keras_compiled", or "numpy",
+             the Network model type to be evaluated.
 
         Returns:
             None. Writes back to the Population object and through it to the 
@@ -327,26 +680,72 @@ class Simulation():
         # Get the number of networks in the population.
         
         networks_count = sim_population.get_population_size()
-        for i in range(networks_count):
-            # Get the Keras model from the Network object
-            
-            nn_obj = sim_population.get_neural_network_model(i)
-            
-            # Send each network off to play the game now, and 
-            #  retrieve and store the fitness the Network scores.
-            
-            fitness = self.apply_nn_to_textworld(
-                nn_obj,
+        self.step_tries = {}
+        
+        # Look up every Network in the fitness cache, and gather the ones
+        #  not found into a Population of their own to be evaluated.
+        # With random choices forced the same Network can score differently
+        #  each time, so there is nothing to cache.
+        
+        # The fitnesses are keyed on the inference backend actually used, and
+        #  the "lockstep" and "async" modes always evaluate with NumPy.
+        
+        use_cache = self.fitness_cache is not None and not force_random_choice
+        evaluated_population = sim_population
+        if use_cache:
+            if evaluation_mode in ("lockstep", "async"):
+                used_inference_backend = "numpy"
+            else:
+                used_inference_backend = inference_backend
+            settings = (
                 game,
-                force_random_choice,
                 force_pickup,
                 steps_to_retain,
                 failed_step_reward,
                 valid_step_reward,
-                chain_rewards
+                chain_rewards,
+                used_inference_backend
                 )
-            sim_population.set_nn_fitness(i, fitness)
-            
+            cache_keys = []
+            uncached = []
+            for i in range(networks_count):
+                cache_keys.append(self.fitness_cache.get_key(
+                    sim_population.get_network_digest(i),
+                    settings
+                    ))
+                fitness = self.fitness_cache.get(cache_keys[i])
+                if fitness is None:
+                    uncached.append(i)
+                else:
+                    sim_population.set_nn_fitness(i, fitness)
+            evaluated_population = population.Population()
+            evaluated_population.add_carried_networks(sim_population, uncached)
+        
+        if evaluation_mode == "lockstep":
+            evaluate = self.evaluate_population_lockstep
+        elif evaluation_mode == "parallel":
+            evaluate = self.evaluate_population_parallel
+        elif evaluation_mode == "async":
+            evaluate = self.evaluate_population_async
+        else:
+            evaluate = self.evaluate_population_sequential
+        evaluate(
+            evaluated_population,
+            game,
+            force_random_choice,
+            force_pickup,
+            steps_to_retain,
+            failed_step_reward,
+            valid_step_reward,
+            chain_rewards,
+            inference_backend
+            )
+        
+        if use_cache:
+            for slot in range(len(uncached)):
+                fitness = evaluated_population.get_nn_fitness(slot)
+                sim_population.set_nn_fitness(uncached[slot], fitness)
+                self.fitness_cache.set(cache_keys[uncached[slot]], fitness)
 
         # Validation tests and console output ... good to show computing progress.
         fitnesses = []
@@ -357,4 +756,65 @@ class Simulation():
         print(f"Network count: {len(fitnesses)}.\t", end = "")
         print(f"Average fitness: {round(sum(fitnesses) / len(fitnesses), 2)}.\t", end = "")
         print(f"Max fitness: {str(max(fitnesses)).zfill(3)}.\t", end = "")
-        
\ No newline at end of file
+
+
+# The worker process functions of the "parallel" evaluation mode are at module
+#  level so that the worker processes can find them. Each worker process holds
+#  its own Simulation, and so its own registered TextWorld game.
+
+worker_simulation = None
+
+def initialise_worker(game, environment_backend, detect_cycles):
+    """Creates the Simulation of a worker process and registers the game.
+
+    Args:
+        game: the str shortcode of the TextWorld game to be used.
+        environment_backend: str of the Simulation environment backend.
+        detect_cycles: Boolean of the Simulation cycle detection.
+
+    Returns:
+        None. Sets the worker_simulation of this process.
+    """
+    
+    # The worker's environments and models are closed when the worker
+    #  process exits, as the Simulation of the main process closes its own.
+    
+    global worker_simulation
+    worker_simulation = Simulation(
+        environment_backend = environment_backend,
+        detect_cycles = detect_cycles
+        )
+    atexit.register(worker_simulation.close)
+    if environment_backend != "native":
+        worker_simulation.register_env_id(game)
+
+def evaluate_network_in_worker(job):
+    """Rebuilds a Network in a worker process and runs it through TextWorld.
+
+    Args:
+        job: tuple of the Network DNA dict, hidden and output layer weights,
+         then the arguments of Simulation.apply_nn_to_textworld() from game
+         onwards, and finally the inference backend.
+
+    Returns:
+        INT of the fitness of the Network.
+    """
+    
+    nn_definition, hidden_weights, output_weights = job[0:3]
+    settings = job[3:10]
+    inference_backend = job[10]
+    
+    nn = population.Population().create_nn(
+        nn_definition["meta"]["serial_number"],
+        nn_definition,
+        hidden_weights,
+        output_weights,
+        nn_definition["meta"]["parent_1"],
+        nn_definition["meta"]["parent_2"]
+        )
+    if inference_backend == "numpy":
+        nn_obj = nn.get_numpy_model()
+    else:
+        nn_obj = worker_simulation.model_pool.get_model(nn, inference_backend)
+    
+    return worker_simulation.apply_nn_to_textworld(nn_obj, *settings)
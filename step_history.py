@@ -0,0 +1,108 @@
+"""Holds the retained previous steps of an Episode in a preallocated ring buffer.
+
+Each retained step is a row of 7 values: the 5 one-hot action space values of
+ that step, the action chosen, and the result of the step. The rows are
+ written in place over the oldest one, and the network input vector is filled
+ in place too, so nothing is allocated as the steps are played.
+
+Typical usage example:
+
+  foo = StepHistory(10, 5)
+  foo.append(bar)
+  baz = foo.get_input_state(action_space_values)
+"""
+
+import numpy as np
+
+class StepHistory():
+    """Holds the retained previous steps of an Episode in a preallocated ring buffer.
+
+    Attributes:
+        steps: numpy float32 array of shape (steps_to_retain, 7) of the
+         retained steps, in ring order.
+        oldest_row: INT row of steps holding the oldest retained step.
+        input_state: numpy float32 array of the network input, the current
+         action space then the retained steps, oldest first.
+    """
+
+    def __init__(self, steps_to_retain, actions_count):
+        """Creates the history, with every retained step zeroed.
+
+        Args:
+            steps_to_retain: INT number of previous steps to be retained.
+            actions_count: INT size of the action space.
+        """
+
+        self.steps = np.zeros((steps_to_retain, actions_count + 2), dtype = np.float32)
+        self.oldest_row = 0
+        self.input_state = np.zeros(actions_count + self.steps.size, dtype = np.float32)
+
+    def append(self, action_space_values, action, result):
+        """Retains a step, in place of the oldest retained step.
+
+        Args:
+            action_space_values: array-like of the one-hot action space of the step.
+            action: INT of the action chosen.
+            result: INT of the result of the step.
+
+        Returns:
+            None. Updates the instance.
+        """
+
+        if len(self.steps) == 0:
+            return
+        row = self.steps[self.oldest_row]
+        actions_count = len(row) - 2
+        row[:actions_count] = action_space_values
+        row[actions_count] = action
+        row[actions_count + 1] = result
+        self.oldest_row = (self.oldest_row + 1) % len(self.steps)
+
+    def oldest(self):
+        """Getter to return the oldest retained step.
+
+        Args:
+            None.
+
+        Returns:
+            A numpy view of the 7 values of the oldest retained step.
+        """
+
+        return self.steps[self.oldest_row]
+
+    def newest(self):
+        """Getter to return the most recently retained step.
+
+        Args:
+            None.
+
+        Returns:
+            A numpy view of the 7 values of the newest retained step.
+        """
+
+        return self.steps[self.oldest_row - 1]
+
+    def get_input_state(self, action_space_values):
+        """Fills and returns the network input for the current step.
+
+        The input vector is reused from step to step, so it must be used, or
+         copied, before the next call.
+
+        Args:
+            action_space_values: array-like of the current one-hot action space.
+
+        Returns:
+            A numpy float32 array of the current action space followed by the
+             retained steps, oldest first.
+        """
+
+        actions_count = self.steps.shape[1] - 2
+        np.copyto(self.input_state[:actions_count], action_space_values)
+
+        # The ring is unrolled from the oldest row, so the retained steps are
+        #  laid out oldest first, as they always have been.
+
+        split = actions_count + (len(self.steps) - self.oldest_row) * self.steps.shape[1]
+        np.copyto(self.input_state[actions_count:split], self.steps[self.oldest_row:].ravel())
+        np.copyto(self.input_state[split:], self.steps[:self.oldest_row].ravel())
+        return self.input_state
@@ -0,0 +1,208 @@
+"""Shares the steps of games already played between the Networks of a generation.
+
+The games are deterministic, so the reply to a command only depends on the
+ commands played before it since reset(). The StepTrie remembers every reply,
+ in a trie keyed by those commands, and a TrieEnvironment answers from it
+ whenever a Network plays a sequence of commands already played by another.
+Many Networks of a generation, siblings especially, open with the same
+ commands, so most of their steps never reach the environment.
+
+When a Network leaves the explored paths, the environment it wraps is brought
+ to the state at the end of the shared path before it plays the new command.
+ A NativeMaze has its state restored directly, other environments are reset
+ and the shared commands replayed. Replaying plays every shared step again,
+ so steps are only saved on environments which can be restored, and the
+ Simulation only shares steps on the native backend.
+
+The TrieEnvironments of a StepTrie may step in different threads, as in the
+ "async" evaluation mode, so the trie is only read and updated under its lock.
+ The wrapped environments are stepped outside it, each by its own thread.
+
+Typical usage example:
+
+  foo = StepTrie()
+  bar = TrieEnvironment(environment, foo)
+  obs, infos = bar.reset()
+  obs, score, done, infos = bar.step("go east")
+"""
+
+import threading
+
+class StepTrieNode():
+    """The reply to one command, following the commands of its parents.
+
+    Attributes:
+        parent: StepTrieNode of the previous command, None for the reset().
+        command: str command played to reach this node, None for the reset().
+        result: tuple of the reply of the environment.
+        state: the environment state after the command, if it can be restored.
+        children: DICT of the next command to its StepTrieNode.
+    """
+
+    def __init__(self, parent, command, result, state):
+        self.parent = parent
+        self.command = command
+        self.result = result
+        self.state = state
+        self.children = {}
+
+    def get_commands(self):
+        """Getter to return the commands played from reset() to this node.
+
+        Args:
+            None.
+
+        Returns:
+            A list of the str commands, in the order played.
+        """
+
+        commands = []
+        node = self
+        while node.parent is not None:
+            commands.append(node.command)
+            node = node.parent
+        commands.reverse()
+        return commands
+
+
+class StepTrie():
+    """Remembers the replies of a game to every sequence of commands played.
+
+    Attributes:
+        root: StepTrieNode of the reset(), None until the first reset().
+        nodes_count: INT count of the replies remembered.
+        shared_steps: INT count of the steps answered from the trie.
+        played_steps: INT count of the steps played in an environment.
+        lock: threading.Lock held while the trie is read or updated.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.nodes_count = 0
+        self.shared_steps = 0
+        self.played_steps = 0
+        self.lock = threading.Lock()
+
+
+class TrieEnvironment():
+    """Wraps an environment, answering from a StepTrie where it can.
+
+    Called in the same way as a TextWorld/Gym environment.
+
+    Attributes:
+        environment: the TextWorld/Gym environment, or NativeMaze, wrapped.
+        trie: the StepTrie shared with the other TrieEnvironments of the game.
+        node: StepTrieNode of the commands played since reset().
+        synchronised_node: StepTrieNode of the state the wrapped environment
+         is actually in, or None if not known.
+    """
+
+    def __init__(self, environment, trie):
+        self.environment = environment
+        self.trie = trie
+        self.node = None
+        self.synchronised_node = None
+
+    def reset(self):
+        """Starts the game again.
+
+        The wrapped environment is only reset if this is the first reset()
+         of the trie, otherwise not until it is needed.
+
+        Args:
+            None.
+
+        Returns:
+            A tuple of the str observation, and the DICT of infos.
+        """
+
+        with self.trie.lock:
+            if self.trie.root is None:
+                result = self.environment.reset()
+                self.trie.root = StepTrieNode(None, None, result, self.get_environment_state())
+                self.trie.nodes_count += 1
+                self.synchronised_node = self.trie.root
+            else:
+                self.synchronised_node = None
+            self.node = self.trie.root
+        return self.node.result
+
+    def step(self, command):
+        """Plays a command in the game, or answers it from the trie.
+
+        Args:
+            command: str command to be played.
+
+        Returns:
+            A tuple of the str observation, the INT score, the Boolean done,
+             and the DICT of infos.
+        """
+
+        with self.trie.lock:
+            child = self.node.children.get(command)
+            if child is not None:
+                self.trie.shared_steps += 1
+
+        # Another thread may play the same command from the same node in the
+        #  meantime. The games are deterministic, so whichever reply reaches
+        #  the trie first is kept, and this environment is in its state.
+
+        if child is None:
+            self.synchronise()
+            result = self.environment.step(command)
+            played_child = StepTrieNode(self.node, command, result, self.get_environment_state())
+            with self.trie.lock:
+                child = self.node.children.setdefault(command, played_child)
+                if child is played_child:
+                    self.trie.nodes_count += 1
+                self.trie.played_steps += 1
+            self.synchronised_node = child
+        self.node = child
+        return child.result
+
+    def close(self):
+        """Closes the wrapped environment.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+
+        self.environment.close()
+
+    def synchronise(self):
+        """Brings the wrapped environment to the state of the current node.
+
+        Args:
+            None.
+
+        Returns:
+            None. Restores, or replays, the wrapped environment.
+        """
+
+        if self.synchronised_node is self.node:
+            return
+        if self.node.state is not None:
+            self.environment.set_state(self.node.state)
+        else:
+            self.environment.reset()
+            for command in self.node.get_commands():
+                self.environment.step(command)
+        self.synchronised_node = self.node
+
+    def get_environment_state(self):
+        """Getter to return the state of the wrapped environment, if it has one.
+
+        Args:
+            None.
+
+        Returns:
+            The state from the environment's get_state(), or None if it
+             cannot be restored and must be replayed.
+        """
+
+        if hasattr(self.environment, "get_state"):
+            return self.environment.get_state()
+        return None
@@ -0,0 +1,175 @@
+"""Writes the reporting of each generation to CSV as soon as it is complete.
+
+Rather than gathering every generation's census into one report, to be
+ written out by Reporting.output_simulation_to_csv() when the simulation
+ ends, the StreamingReport appends each generation's after_evaluation and
+ after_carryover rows, and its generation_summary line, as the generation
+ completes. Only the running total of the average fitnesses is kept, so the
+ memory used does not grow with the generations, and the generations already
+ complete are on disk if a run dies part way through.
+
+The files written are the same as those of Reporting.output_simulation_to_csv().
+A resumed experiment carries on writing to them from where the checkpoint it
+ resumes from was taken, see get_state().
+
+Typical usage example:
+
+  foo = StreamingReport(hyperparameters, initial_census)
+  foo.write_generation(0, after_evaluation_census, after_carryover_census)
+  bar = foo.close()
+"""
+
+import os
+import reporting
+
+class StreamingReport():
+    """Writes the reporting of each generation to CSV as soon as it is complete.
+
+    Attributes:
+        fulldir: str of the experiment folder, under experiments/, or None if
+         no reporting to disk is to be done.
+        nn_results_file: the open nn_and_results_data.csv file.
+        summary_file: the open generation_summary.csv file.
+        generations_count: INT count of the generations written.
+        sum_avg_fitness: float sum of the average fitness of each generation.
+    """
+
+    def __init__(self, hyperparameters, initial_census, resume_state=None):
+        """Writes the parameters and initial population, and opens the files.
+
+        If the experiment number is specified as 0 then no reporting to disk
+         will be done, as for Reporting.output_simulation_to_csv().
+
+        Args:
+            hyperparameters: DICT containing all the experimental settings. The
+             collection number and experiment number are used here.
+            initial_census: list returned by Reporting.census() for the initial
+             population, unused when resuming.
+            resume_state: optional DICT returned by get_state() when the
+             checkpoint being resumed from was taken. The files are cut back
+             to that point, dropping any generation written after it, and
+             appended to.
+        """
+
+        self.fulldir = None
+        self.nn_results_file = None
+        self.summary_file = None
+        self.generations_count = 0
+        self.sum_avg_fitness = 0
+
+        maindir = hyperparameters['collection_number']
+        subdir = hyperparameters['experiment']
+        if subdir == 0 or maindir == 0:
+            return
+        self.fulldir = maindir + "/" + subdir
+
+        if resume_state is not None:
+            self.nn_results_file = open("experiments/" + str(self.fulldir) + "/nn_and_results_data.csv", 'a')
+            self.nn_results_file.truncate(resume_state['nn_results_size'])
+            self.summary_file = open("experiments/" + str(self.fulldir) + "/generation_summary.csv", 'a')
+            self.summary_file.truncate(resume_state['summary_size'])
+            self.generations_count = resume_state['generations_count']
+            self.sum_avg_fitness = resume_state['sum_avg_fitness']
+
+            # The simulation average fitness recorded when the experiment last
+            #  stopped is out of date once it carries on, so remove it.
+
+            for folder_name in os.listdir("experiments/" + str(self.fulldir)):
+                if folder_name.startswith("!-- simulation average fitness -- "):
+                    os.rmdir("experiments/" + str(self.fulldir) + "/" + folder_name)
+            return
+
+        reporting.Reporting.output_parameters_to_csv(self.fulldir, hyperparameters)
+        self.nn_results_file = open("experiments/" + str(self.fulldir) + "/nn_and_results_data.csv", 'w')
+        self.nn_results_file.write(reporting.Reporting.format_csv_line(reporting.Reporting.nn_results_header))
+        self.nn_results_file.writelines(reporting.Reporting.format_census_rows("initial, initial", initial_census))
+        self.nn_results_file.flush()
+        self.summary_file = open("experiments/" + str(self.fulldir) + "/generation_summary.csv", 'w')
+        self.summary_file.write(reporting.Reporting.format_csv_line(reporting.Reporting.generation_summary_header))
+        self.summary_file.flush()
+
+    def is_enabled(self):
+        """Getter to return whether reporting to disk is being done.
+
+        Args:
+            None.
+
+        Returns:
+            Boolean, False if the experiment number is 0.
+        """
+
+        return self.fulldir is not None
+
+    def get_state(self):
+        """Getter to return how far the report has been written.
+
+        Saved with each Population checkpoint, to resume the report from.
+
+        Args:
+            None.
+
+        Returns:
+            A DICT of the sizes of the files, and the running totals, or None
+             if no reporting to disk is being done.
+        """
+
+        if not self.is_enabled():
+            return None
+        return {
+            'nn_results_size': self.nn_results_file.tell(),
+            'summary_size': self.summary_file.tell(),
+            'generations_count': self.generations_count,
+            'sum_avg_fitness': self.sum_avg_fitness
+            }
+
+    def write_generation(self, generation, after_evaluation, after_carryover):
+        """Appends the rows and the summary line of a completed generation.
+
+        Each file is written in one call, and flushed to disk.
+
+        Args:
+            generation: INT of the generation.
+            after_evaluation: list returned by Reporting.census() after the
+             population was evaluated.
+            after_carryover: list returned by Reporting.census() after the
+             breeding and carryover.
+
+        Returns:
+            None. Appends to the files on disk.
+        """
+
+        if not self.is_enabled():
+            return
+
+        rows = reporting.Reporting.format_census_rows(f"{generation},after_evaluation", after_evaluation)
+        rows.extend(reporting.Reporting.format_census_rows(f"{generation},after_carryover", after_carryover))
+        self.nn_results_file.writelines(rows)
+        self.nn_results_file.flush()
+
+        summary = reporting.Reporting.summarise_generation(generation, after_evaluation)
+        self.summary_file.write(reporting.Reporting.format_summary_line(summary))
+        self.summary_file.flush()
+
+        self.generations_count += 1
+        self.sum_avg_fitness += summary[3]
+
+    def close(self):
+        """Closes the files, and records the simulation average fitness.
+
+        Args:
+            None.
+
+        Returns:
+            Float of the average fitness of the generations written, as
+             returned by Reporting.output_simulation_to_csv(), or None if no
+             reporting to disk is being done.
+        """
+
+        if not self.is_enabled():
+            return None
+
+        self.nn_results_file.close()
+        self.summary_file.close()
+        sim_avg_fitness = round(self.sum_avg_fitness / self.generations_count, 4)
+        os.makedirs("experiments/" + str(self.fulldir) + "/!-- simulation average fitness -- " + str(sim_avg_fitness), exist_ok = True)
+        return sim_avg_fitness
@@ -0,0 +1,448 @@
+"""Runs every combination of a set of hyperparameter ranges, in parallel.
+
+Each configuration of the Cartesian product of the ranges is given an ID, a
+ BLAKE2 hash of the hyperparameters which change its fitnesses, which is the
+ same every time the sweep is run, and which names its experiment folder. The
+ configurations are run concurrently, one experiment per process of a process
+ pool, and each ID is recorded in the collection folder as its experiment
+ completes. Running the sweep again skips the configurations already complete,
+ and resumes any that were interrupted from their last checkpoint, if they
+ were checkpointing.
+
+In successive halving mode, every configuration is run for a few generations,
+ and only the most fit are continued, from their checkpoints, for longer, so
+ a larger grid can be explored for the same compute.
+
+Typical usage example:
+
+  foo = Sweep(hyperparameters, hyperparameter_ranges)
+  bar = foo.run()
+  baz = foo.run_successive_halving(min_generations = 2, reduction_factor = 3)
+"""
+
+import concurrent.futures
+import datetime
+import hashlib
+import itertools
+import json
+import numpy as np
+import os
+import random
+import test_and_run_genetic_algorithm
+
+class Sweep():
+    """Runs every combination of a set of hyperparameter ranges, in parallel.
+
+    Attributes:
+        hyperparameters: DICT of the fixed experimental hyperparameters.
+        hyperparameter_ranges: DICT of hyperparameter to the list of values
+         to be swept over.
+        sweep_workers: INT count of experiments run at once.
+        completed: DICT of the ID of each complete configuration to its
+         average fitness.
+        rung_results: DICT of (ID, generations) of each successive halving
+         rung run to the average fitness it reached.
+        generations_run: INT count of the generations run by this sweep.
+        networks_run: INT count of the networks evaluated by this sweep.
+    """
+
+    # The fixed hyperparameters which change the fitnesses an experiment
+    #  scores, so which configuration it is, as every swept one does. The
+    #  others only say where, or how, an experiment is run.
+
+    identifying_keys = (
+        'generations',
+        'size_new_generations',
+        'carryover_count',
+        'point_mutation_chance',
+        'point_mutation_amount',
+        'point_mutation_chance_max',
+        'point_mutation_amount_max',
+        'point_mutation_scalar',
+        'game',
+        'steps_to_retain',
+        'fitness_bias_scalar',
+        'failed_step_reward',
+        'valid_step_reward',
+        'force_random_choice',
+        'force_pickup',
+        'chain_rewards',
+        'selection_strategy',
+        'tournament_size',
+        'rank_pressure'
+        )
+
+    def __init__(self, hyperparameters, hyperparameter_ranges, sweep_workers=None):
+        """Prepares the sweep, reading the configurations already complete.
+
+        Args:
+            hyperparameters: DICT of the fixed experimental hyperparameters.
+             See run_experiment.py for a full description.
+            hyperparameter_ranges: DICT of hyperparameter to the list of values
+             to be swept over.
+            sweep_workers: INT count of experiments to run at once, None for
+             one per CPU core.
+        """
+
+        self.hyperparameters = hyperparameters
+        self.hyperparameter_ranges = hyperparameter_ranges
+        if sweep_workers is None:
+            sweep_workers = os.cpu_count()
+        self.sweep_workers = sweep_workers
+        self.completed = {}
+        completed_path = self.get_completed_path()
+        if completed_path is not None and os.path.exists(completed_path):
+            with open(completed_path) as completed_file:
+                for line in completed_file:
+                    experiment_id, avg_fit = line.strip().split(",")
+                    self.completed[experiment_id] = float(avg_fit)
+        self.rung_results = {}
+        rungs_path = self.get_rungs_path()
+        if rungs_path is not None and os.path.exists(rungs_path):
+            with open(rungs_path) as rungs_file:
+                for line in rungs_file:
+                    generations, experiment_id, avg_fit = line.strip().split(",")
+                    self.rung_results[(experiment_id, int(generations))] = float(avg_fit)
+        self.generations_run = 0
+        self.networks_run = 0
+
+    def get_configurations(self):
+        """Builds the hyperparameters of every configuration of the sweep.
+
+        The configurations are in the order the nested loops of
+         run_experiment.py used to run them, the first range varying fastest.
+
+        Args:
+            None.
+
+        Returns:
+            A list of (str ID, DICT of hyperparameters) tuples.
+        """
+
+        keys = list(self.hyperparameter_ranges)
+        keys.reverse()
+        configurations = []
+        for values in itertools.product(*[self.hyperparameter_ranges[key] for key in keys]):
+            hyperparameters = dict(self.hyperparameters)
+            hyperparameters.update(zip(keys, values))
+            experiment_id = self.get_configuration_id(hyperparameters)
+            hyperparameters['experiment'] = experiment_id
+            configurations.append((experiment_id, hyperparameters))
+        return configurations
+
+    def get_configuration_id(self, hyperparameters):
+        """Builds the stable ID of a configuration from its hyperparameters.
+
+        Only the swept hyperparameters, and those of identifying_keys, make
+         up the ID, so changing how the experiments are run, or reported,
+         does not change it.
+
+        Args:
+            hyperparameters: DICT of the hyperparameters of the configuration.
+
+        Returns:
+            A str of the 16 character hex digest.
+        """
+
+        keys = set(self.identifying_keys).union(self.hyperparameter_ranges)
+        identifying = {
+            key: value
+            for key, value in hyperparameters.items()
+            if key in keys
+            }
+        encoded = json.dumps(identifying, sort_keys = True, default = repr).encode()
+        return hashlib.blake2b(encoded, digest_size = 8).hexdigest()
+
+    def get_completed_path(self):
+        """Getter to return the path of the file of completed configuration IDs.
+
+        Args:
+            None.
+
+        Returns:
+            A str path in the collection folder, or None if no reporting to
+             disk is being done.
+        """
+
+        if self.hyperparameters['collection_number'] == 0:
+            return None
+        return "experiments/" + str(self.hyperparameters['collection_number']) + "/completed_experiments.csv"
+
+    def get_rungs_path(self):
+        """Getter to return the path of the file of successive halving rungs.
+
+        Args:
+            None.
+
+        Returns:
+            A str path in the collection folder, or None if no reporting to
+             disk is being done.
+        """
+
+        if self.hyperparameters['collection_number'] == 0:
+            return None
+        return "experiments/" + str(self.hyperparameters['collection_number']) + "/successive_halving_rungs.csv"
+
+    def record_completed(self, experiment_id, avg_fit):
+        """Records a configuration as complete, on disk straight away.
+
+        Args:
+            experiment_id: str ID of the configuration.
+            avg_fit: float of the average fitness of the experiment.
+
+        Returns:
+            None. Appends to the file of completed configuration IDs.
+        """
+
+        self.completed[experiment_id] = avg_fit
+        completed_path = self.get_completed_path()
+        if completed_path is None:
+            return
+        with open(completed_path, "a") as completed_file:
+            completed_file.write(f"{experiment_id},{avg_fit}\n")
+
+    def run(self, configurations=None):
+        """Runs every configuration not already complete.
+
+        Args:
+            configurations: optional list of (str ID, DICT of hyperparameters)
+             tuples to be run, by default get_configurations().
+
+        Returns:
+            A list of [str ID, float average fitness] of every configuration,
+             including those completed by an earlier run of the sweep.
+        """
+
+        if configurations is None:
+            configurations = self.get_configurations()
+        pending = [
+            (experiment_id, hyperparameters)
+            for experiment_id, hyperparameters in configurations
+            if experiment_id not in self.completed
+            ]
+        print(f"{len(configurations) - len(pending)} of {len(configurations)} experiments " \
+            f"are already complete, running the other {len(pending)}."
+            )
+
+        self.run_experiments(
+            [hyperparameters for experiment_id, hyperparameters in pending],
+            lambda hyperparameters, avg_fit: self.record_completed(hyperparameters['experiment'], avg_fit)
+            )
+        for experiment_id, hyperparameters in pending:
+            self.count_generations(hyperparameters, hyperparameters['generations'])
+
+        return [
+            [experiment_id, self.completed[experiment_id]]
+            for experiment_id, hyperparameters in configurations
+            ]
+
+    def run_successive_halving(self, configurations=None, min_generations=2, reduction_factor=3):
+        """Runs the configurations in rungs, continuing only the most fit.
+
+        Every configuration is first run for min_generations. Those with
+         generations left are then ranked by the average fitness they reached
+         in that rung, and only the top 1/reduction_factor are continued, for
+         reduction_factor times as many generations, and so on, until the
+         remaining configurations have run for all of their generations. Each
+         configuration checkpoints every generation, so a survivor resumes
+         from the end of its last rung rather than restarting.
+
+        The result of each rung is recorded in the collection folder as it
+         completes, so a restarted sweep skips the rungs already run.
+
+        Args:
+            configurations: optional list of (str ID, DICT of hyperparameters)
+             tuples to be run, by default get_configurations().
+            min_generations: INT count of generations of the first rung.
+            reduction_factor: INT of how many configurations there are for
+             each one continued, and how many times longer each rung runs.
+
+        Returns:
+            A list of [str ID, float average fitness] of every configuration,
+             at the last rung it ran to.
+        """
+
+        if configurations is None:
+            configurations = self.get_configurations()
+        results = {}
+        survivors = list(configurations)
+        rung_generations = min_generations
+        previous_generations = 0
+        while True:
+            pending = []
+            for experiment_id, hyperparameters in survivors:
+                generations = min(rung_generations, hyperparameters['generations'])
+                if experiment_id in self.completed or (experiment_id, generations) in self.rung_results:
+                    continue
+                rung_hyperparameters = dict(hyperparameters)
+                rung_hyperparameters['generations'] = generations
+                rung_hyperparameters['checkpoint'] = True
+                pending.append(rung_hyperparameters)
+                self.count_generations(hyperparameters, generations - min(previous_generations, generations))
+            print(f"Successive halving rung of {rung_generations} generations, " \
+                f"{len(survivors)} configurations, {len(pending)} to run."
+                )
+            self.run_experiments(pending, self.record_rung)
+
+            # A configuration which has run all of its generations is complete,
+            #  just as if it had been run by run(). The others are ranked by
+            #  the average fitness they reached in this rung, so that every
+            #  one is compared after the same number of generations. One
+            #  completed by an earlier sweep is ranked by its result in this
+            #  rung, if it ran it, or otherwise is not ranked at all.
+
+            ranked = []
+            for experiment_id, hyperparameters in survivors:
+                generations = min(rung_generations, hyperparameters['generations'])
+                rung_result = self.rung_results.get((experiment_id, generations))
+                if experiment_id in self.completed:
+                    results[experiment_id] = self.completed[experiment_id]
+                else:
+                    results[experiment_id] = rung_result
+                    if generations == hyperparameters['generations']:
+                        self.record_completed(experiment_id, rung_result)
+                if generations < hyperparameters['generations'] and rung_result is not None:
+                    ranked.append((rung_result, experiment_id, hyperparameters))
+
+            if len(ranked) == 0:
+                break
+            ranked.sort(key = lambda rung: rung[0], reverse = True)
+            survivors = [
+                (experiment_id, hyperparameters)
+                for rung_result, experiment_id, hyperparameters in ranked[:max(1, len(ranked) // reduction_factor)]
+                ]
+            previous_generations = rung_generations
+            rung_generations *= reduction_factor
+
+        return [
+            [experiment_id, results[experiment_id]]
+            for experiment_id, hyperparameters in configurations
+            ]
+
+    def count_generations(self, hyperparameters, generations):
+        """Adds to the counts of generations and networks run by the sweep.
+
+        Args:
+            hyperparameters: DICT of the hyperparameters of the experiment.
+            generations: INT count of the generations it runs.
+
+        Returns:
+            None. Updates the instance.
+        """
+
+        self.generations_run += generations
+        self.networks_run += hyperparameters['size_new_generations'] * generations
+
+    def record_rung(self, hyperparameters, avg_fit):
+        """Records the result of a successive halving rung, on disk straight away.
+
+        Args:
+            hyperparameters: DICT of the hyperparameters of the rung, with
+             the generations it ran to.
+            avg_fit: float of the average fitness of the experiment so far.
+
+        Returns:
+            None. Appends to the file of rung results.
+        """
+
+        self.rung_results[(hyperparameters['experiment'], hyperparameters['generations'])] = avg_fit
+        rungs_path = self.get_rungs_path()
+        if rungs_path is None:
+            return
+        with open(rungs_path, "a") as rungs_file:
+            rungs_file.write(f"{hyperparameters['generations']},{hyperparameters['experiment']},{avg_fit}\n")
+
+    def run_experiments(self, pending, record):
+        """Runs experiments, on the process pool if there is more than one worker.
+
+        Args:
+            pending: list of the DICT of hyperparameters of each experiment.
+            record: function taking the hyperparameters and the average
+             fitness of each experiment as it finishes.
+
+        Returns:
+            None.
+        """
+
+        # The collection folder is made here, rather than racing to make it
+        #  in every experiment. Every experiment is resumed, so that one
+        #  interrupted by the end of an earlier sweep can reuse its folder.
+
+        if self.get_completed_path() is not None:
+            collection_dir = "experiments/" + str(self.hyperparameters['collection_number'])
+            os.makedirs(collection_dir + "/!-- " + str(self.hyperparameters['collection_comment']), exist_ok = True)
+        for hyperparameters in pending:
+            hyperparameters['resume'] = True
+
+        # Experiments run at once share the CPU cores, so each one's
+        #  'parallel' worker processes, or 'async' step threads, are capped at
+        #  its share, rather than every experiment taking one per core.
+
+        if self.sweep_workers > 1:
+            cores_each = max(1, (os.cpu_count() or 1) // self.sweep_workers)
+            for hyperparameters in pending:
+                evaluation_workers = hyperparameters.get('evaluation_workers') or cores_each
+                hyperparameters['evaluation_workers'] = min(evaluation_workers, cores_each)
+
+        # A single worker runs the experiments in this process, one after
+        #  the other, as they always were.
+
+        remaining = len(pending)
+        if self.sweep_workers == 1:
+            for hyperparameters in pending:
+                avg_fit, elapsed = run_configuration(hyperparameters)
+                remaining -= 1
+                self.complete(remaining, hyperparameters, avg_fit, elapsed, record)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(self.sweep_workers) as executor:
+                futures = {
+                    executor.submit(run_configuration, hyperparameters): hyperparameters
+                    for hyperparameters in pending
+                    }
+                for future in concurrent.futures.as_completed(futures):
+                    avg_fit, elapsed = future.result()
+                    remaining -= 1
+                    self.complete(remaining, futures[future], avg_fit, elapsed, record)
+
+    def complete(self, remaining, hyperparameters, avg_fit, elapsed, record):
+        """Records a finished experiment, and reports progress to the console.
+
+        Args:
+            remaining: INT count of the experiments still to finish.
+            hyperparameters: DICT of the hyperparameters of the experiment.
+            avg_fit: float of the average fitness of the experiment.
+            elapsed: datetime.timedelta the experiment took.
+            record: function taking the hyperparameters and average fitness.
+
+        Returns:
+            None.
+        """
+
+        record(hyperparameters, avg_fit)
+        print(
+            f"Wrote experiment {hyperparameters['experiment']} to the filesystem. That " \
+            f"experiment took {elapsed}, and there are {remaining} experiments left."
+            )
+
+
+def run_configuration(hyperparameters):
+    """Runs the experiment of one configuration, in a sweep process.
+
+    Args:
+        hyperparameters: DICT of the hyperparameters of the configuration.
+
+    Returns:
+        A tuple of the float average fitness, and the datetime.timedelta the
+         experiment took.
+    """
+
+    # Forked processes all start with the random number generators of the
+    #  sweep, so each experiment seeds them afresh from the OS.
+    
+    random.seed()
+    np.random.seed()
+    
+    start = datetime.datetime.now()
+    simulation = test_and_run_genetic_algorithm.TestGeneticAlgorithm()
+    avg_fit = simulation.test_genetic_algorithm(hyperparameters)
+    return avg_fit, datetime.datetime.now() - start
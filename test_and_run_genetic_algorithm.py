@@ -8,10 +8,13 @@ Causes reporting metrics to be created and stored.
 
 import population
 import simulation
-from copy import deepcopy
 import numpy as np
+import random
 import reporting
 import breeding
+import fitness_cache
+import streaming_report
+import columnar_report
 
 class TestGeneticAlgorithm():
     """Main control for the execution of the genetic algorithm.
@@ -43,8 +46,6 @@ class TestGeneticAlgorithm():
         # Initialisation
         
         serial_number = 0
-        experiment_report = {}
-        experiment_results = []
        
         # Extract to shorter variable names from the parameters argument.
         
@@ -64,6 +65,20 @@ class TestGeneticAlgorithm():
         valid_step_reward = parameters['valid_step_reward']
         chain_rewards = parameters['chain_rewards']
         steps_to_retain = parameters['steps_to_retain']
+        evaluation_mode = parameters.get('evaluation_mode', 'sequential')
+        inference_backend = parameters.get('inference_backend', 'keras')
+        evaluation_workers = parameters.get('evaluation_workers', None)
+        selection_strategy = parameters.get('selection_strategy', 'fitness_proportionate')
+        tournament_size = parameters.get('tournament_size', 3)
+        rank_pressure = parameters.get('rank_pressure', 1.5)
+        environment_backend = parameters.get('environment_backend', 'textworld')
+        detect_cycles = parameters.get('detect_cycles', False)
+        fitness_cache_size = parameters.get('fitness_cache_size', 0)
+        fitness_cache_path = parameters.get('fitness_cache_path', None)
+        share_steps = parameters.get('share_steps', False)
+        columnar_output = parameters.get('columnar_output', None)
+        checkpoint = parameters.get('checkpoint', False)
+        resume = parameters.get('resume', False)
         
         # Calculated variables derived from the parameters
         # The size of the inputs will be steps * 7
@@ -79,68 +94,128 @@ class TestGeneticAlgorithm():
         
         reporting.Reporting.create_folders(parameters)
         
-        # Create the initial population of randomised neural networks.
+        # When resuming, carry on from the population checkpointed at the
+        #  end of the last complete generation, with the serial numbers,
+        #  random number generators, and reporting as they were then.
         
         sim_population = population.Population()
-        sim_population.create_random_population(
-            size_new_generations,
-            serial_number,
-            inputs_size
-            )
-        serial_number += size_new_generations
+        first_generation = 0
+        resumed = None
+        if resume:
+            checkpoint_path = reporting.Reporting.find_latest_checkpoint(parameters)
+            if checkpoint_path is not None:
+                resumed = sim_population.load_checkpoint(checkpoint_path)
+                first_generation = resumed['generation'] + 1
+                serial_number = resumed['serial_number']
+                python_state = resumed['random_state']
+                random.setstate((python_state[0], tuple(python_state[1]), python_state[2]))
+                numpy_state = resumed['numpy_random_state']
+                np.random.set_state((
+                    numpy_state[0],
+                    np.asarray(numpy_state[1], dtype = np.uint32),
+                    numpy_state[2],
+                    numpy_state[3],
+                    numpy_state[4]
+                    ))
+                print(f"Resuming from the end of generation {resumed['generation']}.")
+        
+        # Otherwise create the initial population of randomised neural networks.
+        
+        if resumed is None:
+            sim_population.create_random_population(
+                size_new_generations,
+                serial_number,
+                inputs_size
+                )
+            serial_number += size_new_generations
         
         # Validate that the simulation_population is of the proper class, 
         #  and has the specified number of member neural networks
         
-        # Prepare reporting
+        # Prepare reporting, which writes each generation out as soon as it
+        #  is complete, rather than holding them all until the end.
         
-        experiment_report['parameters'] = parameters
-        experiment_report['initial_population'] = reporting.Reporting.census(sim_population)
-        experiment_report['generations'] = []
+        if resumed is None:
+            experiment_report = streaming_report.StreamingReport(
+                parameters,
+                reporting.Reporting.census(sim_population)
+                )
+        else:
+            experiment_report = streaming_report.StreamingReport(
+                parameters,
+                None,
+                resumed['report']
+                )
+        columnar_results = None
+        if columnar_output is not None:
+            columnar_results = columnar_report.ColumnarReport(parameters, columnar_output)
+            if resumed is None:
+                columnar_results.write_initial(sim_population.get_report_columns())
         
-        # Create the simulation environment
+        # Create the simulation environment, with a cache of the fitnesses
+        #  of networks already evaluated if one is wanted.
         
-        sim_environment = simulation.Simulation()
+        network_fitness_cache = None
+        if fitness_cache_size > 0:
+            network_fitness_cache = fitness_cache.FitnessCache(fitness_cache_size, fitness_cache_path)
+        sim_environment = simulation.Simulation(
+            evaluation_workers,
+            environment_backend,
+            detect_cycles,
+            network_fitness_cache,
+            share_steps
+            )
         
-        # Run the networks through the gym and gather their fitness scores
+        # Whatever happens during the generations, the Simulation is closed
+        #  afterwards, so no worker processes are left running.
         
-        for iteration in range(generations):
-            print(f"Beginning of generation {iteration}. \t", end = "")
-            experiment_results = {'after_evaluation': [], 'after_carryover': []}
-            
-            # Run the networks through the game, which modifies the 
-            #  components of the sim_population object and the network objects
-            #  stored in it.
-            
-            sim_environment.evaluate_population(
-                sim_population,
-                game,
-                force_random_choice,
-                force_pickup,
-                steps_to_retain,
-                failed_step_reward,
-                valid_step_reward,
-                chain_rewards
-                )
-            
-            # Capture the state of the population with fitnesses after 
-            #  they've gone through the evaluation.
-            
-            experiment_results['after_evaluation'] = reporting.Reporting.census(sim_population)
+        try:
+            # Run the networks through the gym and gather their fitness scores
             
-            # Create the fitness map, breed, cross-over, and mutate the 
-            #  population to produce a new population.
-            sim_population.create_fitness_map()
-            new_population = population.Population()
-            breeder = breeding.Breeding()
-            
-            # For each new child neural network that is required, run the
-            #  breeder and add the child nn to the new population.
-            
-            for new_child_nn in range(size_new_generations):
-                new_child_nn_obj = breeder.network_cross_and_mutate(
+            for iteration in range(first_generation, generations):
+                print(f"Beginning of generation {iteration}. \t", end = "")
+                
+                # Run the networks through the game, which modifies the 
+                #  components of the sim_population object and the network objects
+                #  stored in it.
+                
+                sim_environment.evaluate_population(
+                    sim_population,
+                    game,
+                    force_random_choice,
+                    force_pickup,
+                    steps_to_retain,
+                    failed_step_reward,
+                    valid_step_reward,
+                    chain_rewards,
+                    evaluation_mode,
+                    inference_backend
+                    )
+                
+                # Capture the state of the population with fitnesses after 
+                #  they've gone through the evaluation.
+                
+                after_evaluation = reporting.Reporting.census(sim_population)
+                if columnar_results is not None:
+                    after_evaluation_columns = sim_population.get_report_columns()
+                
+                # Create the fitness map, breed, cross-over, and mutate the 
+                #  population to produce a new population.
+                sim_population.set_selection_strategy(
+                    selection_strategy,
+                    tournament_size,
+                    rank_pressure
+                    )
+                sim_population.create_fitness_map()
+                breeder = breeding.Breeding()
+                
+                # Breed all the new child neural networks that are required in
+                #  one batch, straight into the new population.
+                
+                new_population = breeder.breed_generation(
                     sim_population,
                     serial_number,
+                    size_new_generations,
                     point_mutation_scalar,
                     point_mutation_chance,
                     point_mutation_amount,
@@ -148,87 +223,110 @@ class TestGeneticAlgorithm():
                     point_mutation_amount_max,
                     fitness_bias_scalar
                     )
-                new_population.add_nn(new_child_nn_obj)
-                serial_number += 1
+                serial_number += size_new_generations
 
-            
-            # Carryover - retaining most fit network(s) from prev generation.
-            # The concept of carryover is not evolution or breeding, so it's 
-            #  intentionally not in that class.
-            
-            if carryover_count != 0:
-                # # Get the number of networks to carry over from the old
-                # #  generation to the new, capped at the number of networks
-                # #  in the old generation.
-                
-                # size_prev_gen = sim_population.get_population_size()
-                # carryover_count = max_population_size - size_new_generations
-                # carryover_count = min(carryover_count, size_prev_gen)
-                
-                # Gather the fitnesses of the previous generation, and use numpy
-                #  to create a list sorting the element positions by fitness
-                
-                all_fitnesses_prev_gen = []
-                for i in range(carryover_count):
-                    all_fitnesses_prev_gen.append(sim_population.get_nn_fitness(i))
-                all_fitnesses_prev_gen = np.asarray(all_fitnesses_prev_gen)
-                most_fit_networks = np.argsort(all_fitnesses_prev_gen)
-                most_fit_networks_desc = most_fit_networks[::-1].tolist()
+                
+                # Carryover - retaining most fit network(s) from prev generation.
+                # The concept of carryover is not evolution or breeding, so it's 
+                #  intentionally not in that class.
+                
+                if carryover_count != 0:
+                    # # Get the number of networks to carry over from the old
+                    # #  generation to the new, capped at the number of networks
+                    # #  in the old generation.
+                    
+                    # size_prev_gen = sim_population.get_population_size()
+                    # carryover_count = max_population_size - size_new_generations
+                    # carryover_count = min(carryover_count, size_prev_gen)
+                    
+                    # Gather the fitnesses of the previous generation, and use numpy
+                    #  to create a list sorting the element positions by fitness
+                    
+                    all_fitnesses_prev_gen = []
+                    for i in range(carryover_count):
+                        all_fitnesses_prev_gen.append(sim_population.get_nn_fitness(i))
+                    all_fitnesses_prev_gen = np.asarray(all_fitnesses_prev_gen)
+                    most_fit_networks = np.argsort(all_fitnesses_prev_gen)
+                    most_fit_networks_desc = most_fit_networks[::-1].tolist()
 
-                # Then iterate through the sorted list to copy the specified
-                #  count of fit networks to the new generation, unless they have
-                #  a minimum fitness, in which case skip them, no point.
-                
-                for i in range(carryover_count):
-                    if sim_population.get_nn_fitness(most_fit_networks_desc[i]) > 1:
-                        # Build definition of a network from candidate network
-                        import_nn_definition = {}
-                        import_nn_definition = sim_population.get_neural_network_def(most_fit_networks_desc[i])
-                        import_nn_weights_bias = sim_population.get_weight_bias_definitions(most_fit_networks_desc[i], 1)
-                        import_nn_output_weights_bias = sim_population.get_weight_bias_definitions(most_fit_networks_desc[i], 2)
-                        import_nn_serial = import_nn_definition['meta']['serial_number']
-                        import_nn_parent_1 = import_nn_definition['meta']['parent_1']
-                        import_nn_parent_2 = import_nn_definition['meta']['parent_2']
-                        
-                        # Create object from definition and add to new_population
-                        import_nn_obj = sim_population.create_nn(
-                            import_nn_serial,
-                            import_nn_definition,
-                            import_nn_weights_bias,
-                            import_nn_output_weights_bias,
-                            import_nn_parent_1,
-                            import_nn_parent_2
-                            )
-                        new_population.add_nn(import_nn_obj)
-            
-            # Check any carried-over networks against the previous versions to
-            #  ensure they are EXACTLY the same from generation to generation.
-            
-            for i in range(new_population.get_population_size()):
-                for new_nn in range(new_population.get_population_size()):
-                    new_nn_sn = new_population.get_neural_network_def(new_nn)['meta']['serial_number']
-                    for old_nn in range(sim_population.get_population_size()):
-                        old_nn_sn = sim_population.get_neural_network_def(old_nn)['meta']['serial_number']
-                        if old_nn_sn == new_nn_sn:
-                            new_nn_checksum = new_population.get_neural_network_def(new_nn)['meta']['checksum']
-                            old_nn_checksum = sim_population.get_neural_network_def(old_nn)['meta']['checksum']
-            
-            # Replace the old population with the new one
-            
-            sim_population = deepcopy(new_population)
-            new_population = None
-            
-            # Report the state of the population after they've gone
-            #  through the breeding and carryover.
-            
-            experiment_results['after_carryover'] = reporting.Reporting.census(sim_population)
-            experiment_report['generations'].append(experiment_results)
+                    # Then iterate through the sorted list to copy the specified
+                    #  count of fit networks to the new generation, unless they have
+                    #  a minimum fitness, in which case skip them, no point.
+                    # They are copied straight from the old population's arrays,
+                    #  all together.
+                    
+                    carried_networks = []
+                    for i in range(carryover_count):
+                        if sim_population.get_nn_fitness(most_fit_networks_desc[i]) > 1:
+                            carried_networks.append(most_fit_networks_desc[i])
+                    new_population.add_carried_networks(sim_population, carried_networks)
+                
+                # Check any carried-over networks against the previous versions to
+                #  ensure they are EXACTLY the same from generation to generation.
+                # Each network is looked up by serial number in the previous
+                #  population's index, so this is a single pass.
+                
+                new_population.verify_carried_networks(sim_population)
+                
+                # Replace the old population with the new one. The new population
+                #  is handed over rather than copied, nothing else refers to it.
+                
+                sim_population = new_population
+                new_population = None
+                
+                # Report the state of the population after they've gone
+                #  through the breeding and carryover, and write out the
+                #  generation.
+                
+                experiment_report.write_generation(
+                    iteration,
+                    after_evaluation,
+                    reporting.Reporting.census(sim_population)
+                    )
+                if columnar_results is not None:
+                    columnar_results.write_generation(
+                        iteration,
+                        after_evaluation_columns,
+                        sim_population.get_report_columns()
+                        )
+                
+                # Checkpoint the new population, with everything needed to
+                #  resume from the end of this generation.
+                
+                checkpoint_path = None
+                if checkpoint:
+                    checkpoint_path = reporting.Reporting.get_checkpoint_path(parameters, iteration)
+                if checkpoint_path is not None:
+                    python_state = random.getstate()
+                    numpy_state = np.random.get_state()
+                    sim_population.save_checkpoint(checkpoint_path, {
+                        'generation': iteration,
+                        'serial_number': serial_number,
+                        'random_state': [python_state[0], list(python_state[1]), python_state[2]],
+                        'numpy_random_state': [
+                            numpy_state[0],
+                            numpy_state[1].tolist(),
+                            numpy_state[2],
+                            numpy_state[3],
+                            numpy_state[4]
+                            ],
+                        'report': experiment_report.get_state()
+                        })
+                
+                print("Generation is complete.")
+        
+        finally:
+            # The simulation is complete here, or has failed, either way
+            #  release any worker processes and pooled environments.
             
-            print("Generation is complete.")
+            sim_environment.close()
+        
+        # Save the fitness cache for the next experiment, and close the
+        #  reporting.
         
-        # The simulation is complete here
-        # Export the reporting
+        if network_fitness_cache is not None:
+            network_fitness_cache.save()
         
-        sim_avg_fitness = reporting.Reporting.output_simulation_to_csv(parameters, experiment_report)
+        sim_avg_fitness = experiment_report.close()
         
         return sim_avg_fitness
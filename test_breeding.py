@@ -0,0 +1,108 @@
+# Tests of breeding a whole generation at once with Breeding.breed_generation().
+
+# The children must be stored with the same shapes as their parents, numbered
+#  in sequence from the serial number given, and record as parents the serial
+#  numbers of two distinct networks of the Population bred from.
+
+import unittest
+import tracemalloc
+import numpy as np
+import breeding
+import fixtures_utest
+
+class TestBreedGeneration(unittest.TestCase):
+    def make_population(self, size, first_serial_number):
+        sim_population = fixtures_utest.make_population(size, 13, 5, first_serial_number, range(1, size + 1))
+        sim_population.create_fitness_map()
+        return sim_population
+
+    def breed(self, sim_population, serial_number, count):
+        return breeding.Breeding().breed_generation(
+            sim_population,
+            serial_number,
+            count,
+            3,
+            0.1,
+            0.2,
+            0.5,
+            0.6,
+            1
+            )
+
+    def test_shapes(self):
+        parents = self.make_population(8, 100)
+        children = self.breed(parents, 200, 12)
+        self.assertEqual(children.get_population_size(), 12)
+        self.assertEqual(children.layer_types[:12].shape, (12,) + parents.layer_types.shape[1:])
+        self.assertEqual(children.layer_activations[:12].shape, (12,) + parents.layer_activations.shape[1:])
+        self.assertEqual(len(children.layer_weights), len(parents.layer_weights))
+        for layer in range(len(parents.layer_weights)):
+            self.assertEqual(children.layer_weights[layer][:12].shape, (12,) + parents.layer_weights[layer].shape[1:])
+            self.assertEqual(children.layer_biases[layer][:12].shape, (12,) + parents.layer_biases[layer].shape[1:])
+            self.assertEqual(children.layer_weights[layer].dtype, parents.layer_weights[layer].dtype)
+        self.assertEqual(children.get_neural_network_def(0)["hidden_layers"][0]["neurons"], parents.get_neural_network_def(0)["hidden_layers"][0]["neurons"])
+        self.assertTrue(np.isnan(children.get_fitnesses()).all())
+
+    def test_serial_numbers(self):
+        parents = self.make_population(8, 100)
+        children = self.breed(parents, 200, 12)
+        self.assertEqual(list(children.serial_numbers[:12]), list(range(200, 212)))
+        for serial_number in range(200, 212):
+            self.assertEqual(children.serial_numbers[children.get_network_id(serial_number)], serial_number)
+
+    def test_parent_serial_numbers(self):
+        parents = self.make_population(8, 100)
+        children = self.breed(parents, 200, 50)
+        parent_serial_numbers = set(parents.serial_numbers[:8])
+        for parent_1, parent_2 in children.parents[:50]:
+            self.assertIn(parent_1, parent_serial_numbers)
+            self.assertIn(parent_2, parent_serial_numbers)
+            self.assertNotEqual(parent_1, parent_2)
+
+    def test_children_from_parents(self):
+        # Without mutation, every weight of a child is its parent_1's or its
+        #  parent_2's.
+
+        parents = self.make_population(4, 0)
+        children = breeding.Breeding().breed_generation(parents, 10, 6, 1, 0, 0, 0, 0, 1)
+        for child in range(6):
+            parent_1 = parents.get_network_id(int(children.parents[child, 0]))
+            parent_2 = parents.get_network_id(int(children.parents[child, 1]))
+            for layer in range(len(parents.layer_weights)):
+                child_weights = children.layer_weights[layer][child]
+                self.assertTrue((
+                    (child_weights == parents.layer_weights[layer][parent_1])
+                    | (child_weights == parents.layer_weights[layer][parent_2])
+                    ).all())
+
+    def test_large_generation(self):
+        # Bred in chunks, a large generation needs little memory beyond the
+        #  children's own weights, which are stored once in the stacks being
+        #  bred and once in the new Population.
+
+        parents = self.make_population(8, 100)
+        breeder = breeding.Breeding()
+        breeder.chunk_elements = 1 << 16
+        tracemalloc.start()
+        try:
+            children = breeder.breed_generation(parents, 200, 301, 3, 0.1, 0.2, 0.5, 0.6, 1)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        children_bytes = sum(stacked[:301].nbytes for stacked in children.layer_weights + children.layer_biases)
+        self.assertLess(peak, 2.5 * children_bytes)
+        for layer in range(len(parents.layer_weights)):
+            self.assertEqual(children.layer_weights[layer].dtype, np.float32)
+            self.assertEqual(children.layer_biases[layer].dtype, np.float32)
+            self.assertTrue((np.abs(children.layer_weights[layer][:301]) <= 1).all())
+
+        # The last, part filled, chunk is crossed and mutated as the others.
+
+        last_child = children.layer_weights[0][300]
+        parent_1 = parents.layer_weights[0][parents.get_network_id(int(children.parents[300, 0]))]
+        parent_2 = parents.layer_weights[0][parents.get_network_id(int(children.parents[300, 1]))]
+        self.assertGreater(np.mean((last_child == parent_1) | (last_child == parent_2)), 0.8)
+        self.assertLess(np.mean((last_child == parent_1) | (last_child == parent_2)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# Tests of checkpointing a Population, and of resuming an experiment from it.
+
+# A checkpoint must load back every array of the Population as it was saved,
+#  with the weights memory-mapped read-only, and the loaded Population must
+#  breed as any other. An experiment interrupted after a generation and
+#  resumed from its checkpoint must write exactly the same CSV files as the
+#  same experiment run without interruption.
+
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+import numpy as np
+import breeding
+import fixtures_utest
+import population
+import simulation
+import test_and_run_genetic_algorithm
+
+COLLECTION = "unittest_checkpoint"
+
+class TestPopulationCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.folder.name, "generation_0")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def make_population(self):
+        sim_population = fixtures_utest.make_population(10, 26, 9, 40, [1, 5, None, 30, 1, 7, 2, 1, 12, 3])
+        sim_population.parents[:10] = np.arange(20).reshape(10, 2)
+        return sim_population
+
+    def test_round_trip(self):
+        saved = self.make_population()
+        saved.reserve(7)
+        saved.save_checkpoint(self.file_path, {"generation": 0, "note": "saved"})
+        loaded = population.Population()
+        metadata = loaded.load_checkpoint(self.file_path)
+        self.assertEqual(metadata, {"generation": 0, "note": "saved"})
+
+        self.assertEqual(loaded.get_population_size(), 10)
+        self.assertEqual(loaded.inputs_size, saved.inputs_size)
+        self.assertEqual(loaded.hidden_neurons, saved.hidden_neurons)
+        self.assertEqual(loaded.output_count, saved.output_count)
+        for name in ("serial_numbers", "parents", "checksums", "digests", "layer_types", "layer_activations"):
+            self.assertTrue(np.array_equal(getattr(loaded, name), getattr(saved, name)[:10]), name)
+            self.assertEqual(getattr(loaded, name).dtype, getattr(saved, name).dtype, name)
+        self.assertTrue(np.array_equal(loaded.fitness_scores, saved.fitness_scores[:10], equal_nan = True))
+        for layer in range(len(saved.layer_weights)):
+            self.assertTrue(np.array_equal(loaded.layer_weights[layer], saved.layer_weights[layer][:10]))
+            self.assertTrue(np.array_equal(loaded.layer_biases[layer], saved.layer_biases[layer][:10]))
+        self.assertEqual(loaded.get_network_id(45), 5)
+
+        # The loaded checksums and digests are those of the loaded weights,
+        #  not only those that were saved.
+
+        checksums = loaded.checksums.copy()
+        loaded.checksums = np.empty_like(checksums)
+        loaded.update_checksums(slice(0, 10))
+        self.assertTrue(np.array_equal(loaded.checksums, checksums))
+        digests = loaded.digests.copy()
+        loaded.digests = np.empty_like(digests)
+        for network_id in range(10):
+            loaded.update_digest(network_id)
+        self.assertTrue(np.array_equal(loaded.digests, digests))
+
+    def test_memory_mapped(self):
+        self.make_population().save_checkpoint(self.file_path)
+        loaded = population.Population()
+        self.assertIsNone(loaded.load_checkpoint(self.file_path))
+        for array in loaded.layer_weights + loaded.layer_biases:
+            self.assertIsInstance(array.base, np.memmap)
+            self.assertFalse(array.flags.writeable)
+
+    def test_breed_from_loaded(self):
+        saved = self.make_population()
+        saved.save_checkpoint(self.file_path)
+        loaded = population.Population()
+        loaded.load_checkpoint(self.file_path)
+
+        def breed(sim_population):
+            fixtures_utest.seed_random(2)
+            sim_population.create_fitness_map()
+            children = breeding.Breeding().breed_generation(sim_population, 100, 12, 3, 0.1, 0.2, 0.5, 0.6, 1)
+            children.add_carried_networks(sim_population, [3, 8])
+            children.verify_carried_networks(sim_population)
+            return children
+
+        # Fitnesses are needed to breed.
+
+        saved.set_nn_fitness(2, 4)
+        loaded.fitness_scores[2] = 4
+        expected = breed(saved)
+        children = breed(loaded)
+        self.assertEqual(children.get_population_size(), 14)
+        self.assertTrue(np.array_equal(children.parents[:14], expected.parents[:14]))
+        self.assertTrue(np.array_equal(children.digests[:14], expected.digests[:14]))
+        for layer in range(len(expected.layer_weights)):
+            self.assertTrue(np.array_equal(children.layer_weights[layer][:14], expected.layer_weights[layer][:14]))
+            self.assertTrue(children.layer_weights[layer].flags.writeable)
+
+class TestResume(unittest.TestCase):
+    def tearDown(self):
+        shutil.rmtree("experiments/" + COLLECTION, ignore_errors = True)
+
+    def run_experiment(self, experiment, seed=0, **settings):
+        fixtures_utest.seed_random(seed)
+        parameters = {
+            'collection_comment': "unittest of resuming from a checkpoint",
+            'collection_number': COLLECTION,
+            'experiment': experiment,
+            'generations': 5,
+            'size_new_generations': 12,
+            'carryover_count': 4,
+            'point_mutation_chance': 0.1,
+            'point_mutation_amount': 0.1,
+            'point_mutation_chance_max': 0.5,
+            'point_mutation_amount_max': 0.5,
+            'point_mutation_scalar': 1.0,
+            'force_random_choice': False,
+            'force_pickup': True,
+            'game': "coin_collector_5",
+            'fitness_bias_scalar': 1.0,
+            'failed_step_reward': -1,
+            'valid_step_reward': 1,
+            'chain_rewards': False,
+            'steps_to_retain': 3,
+            'evaluation_mode': "lockstep",
+            'inference_backend': "numpy",
+            'environment_backend': "native"
+            }
+        parameters.update(settings)
+        return test_and_run_genetic_algorithm.TestGeneticAlgorithm().test_genetic_algorithm(parameters)
+
+    def read_results(self, experiment):
+        results = {}
+        for file_name in ("nn_and_results_data.csv", "generation_summary.csv"):
+            with open("experiments/" + COLLECTION + "/" + experiment + "/" + file_name) as results_file:
+                results[file_name] = results_file.read()
+        return results
+
+    def test_resumed_same_as_uninterrupted(self):
+        sim_avg_fitness = self.run_experiment("uninterrupted")
+
+        for last_generation in (0, 2):
+            experiment = "interrupted_" + str(last_generation)
+
+            # Fail the evaluation of the generation after last_generation.
+
+            evaluate_population = simulation.Simulation.evaluate_population
+            evaluations = []
+
+            def interrupted(sim_environment, *args):
+                evaluations.append(len(evaluations))
+                if len(evaluations) > last_generation + 1:
+                    raise KeyboardInterrupt
+                return evaluate_population(sim_environment, *args)
+
+            with mock.patch.object(simulation.Simulation, "evaluate_population", interrupted):
+                with self.assertRaises(KeyboardInterrupt):
+                    self.run_experiment(experiment, checkpoint = True)
+
+            # The RNGs are seeded differently on resuming, so that they must
+            #  be restored from the checkpoint to give the same results.
+
+            resumed_avg_fitness = self.run_experiment(experiment, 1, checkpoint = True, resume = True)
+            self.assertEqual(resumed_avg_fitness, sim_avg_fitness)
+            self.assertEqual(self.read_results(experiment), self.read_results("uninterrupted"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+# Tests of writing each generation's networks to a typed, columnar file.
+
+# Loaded back, the columns must be those of Population.get_report_columns(),
+#  after the generation and stage columns, with their types kept: -1 for the
+#  parents of networks with none, and NaN for fitnesses not yet evaluated.
+#  Parquet is only tested when pyarrow is installed.
+
+import unittest
+import os
+import shutil
+import sys
+from unittest import mock
+import numpy as np
+import breeding
+import columnar_report
+import fixtures_utest
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+COLLECTION = "unittest_columnar"
+
+class TestColumnarReport(unittest.TestCase):
+    def setUp(self):
+        os.makedirs("experiments/" + COLLECTION + "/columns")
+        self.parameters = {'collection_number': COLLECTION, 'experiment': "columns"}
+
+        # The initial population has no parents, then after evaluation one
+        #  network is still without a fitness, and the children bred have
+        #  none at all.
+
+        self.initial = fixtures_utest.make_population(5, 13, 17, 10)
+        self.evaluated = fixtures_utest.make_population(5, 13, 17, 10, [3, 1, 120, None, 8])
+        parents = fixtures_utest.make_population(5, 13, 17, 10, [3, 1, 120, 2, 8])
+        parents.create_fitness_map()
+        self.children = breeding.Breeding().breed_generation(parents, 15, 4, 3, 0.1, 0.2, 0.5, 0.6, 1)
+
+    def tearDown(self):
+        shutil.rmtree("experiments/" + COLLECTION, ignore_errors = True)
+
+    def write_and_load(self, file_format):
+        report = columnar_report.ColumnarReport(self.parameters, file_format)
+        self.assertEqual(report.file_format, file_format)
+        report.write_initial(self.initial.get_report_columns())
+        report.write_generation(0, self.evaluated.get_report_columns(), self.children.get_report_columns())
+        self.assertTrue(report.get_file_path(-1).endswith("nn_and_results_initial." + file_format))
+        self.assertTrue(report.get_file_path(0).endswith("nn_and_results_generation_0." + file_format))
+        return (
+            columnar_report.ColumnarReport.load_columns(report.get_file_path(-1)),
+            report.load_columns(report.get_file_path(0))
+            )
+
+    def assert_round_trip(self, file_format):
+        initial, generation = self.write_and_load(file_format)
+        names = ["generation", "stage"] + list(self.initial.get_report_columns())
+        self.assertEqual(list(initial), names)
+        self.assertEqual(list(generation), names)
+
+        self.assertEqual(initial["generation"].tolist(), [-1] * 5)
+        self.assertEqual(initial["stage"].tolist(), ["initial"] * 5)
+        self.assertEqual(generation["generation"].tolist(), [0] * 9)
+        self.assertEqual(generation["stage"].tolist(), ["after_evaluation"] * 5 + ["after_carryover"] * 4)
+
+        for name, values in self.initial.get_report_columns().items():
+            self.assertEqual(initial[name].dtype, values.dtype, name)
+            self.assertTrue(np.array_equal(initial[name], values, equal_nan = True), name)
+        self.assertEqual(initial["parent_1"].tolist(), [-1] * 5)
+        self.assertEqual(initial["parent_2"].tolist(), [-1] * 5)
+        self.assertTrue(np.isnan(initial["fitness"]).all())
+
+        self.assertEqual(generation["serial_number"].tolist(), list(range(10, 15)) + list(range(15, 19)))
+        self.assertEqual(generation["parent_1"][:5].tolist(), [-1] * 5)
+        self.assertTrue((generation["parent_1"][5:] >= 10).all())
+        self.assertEqual(generation["parent_1"].dtype, np.int64)
+        self.assertEqual(generation["fitness"].dtype, np.float64)
+        self.assertEqual(generation["fitness"][[0, 1, 2, 4]].tolist(), [3, 1, 120, 8])
+        self.assertTrue(np.isnan(generation["fitness"][3]))
+        self.assertTrue(np.isnan(generation["fitness"][5:]).all())
+
+    def test_npz(self):
+        self.assert_round_trip("npz")
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet(self):
+        self.assert_round_trip("parquet")
+
+    def test_parquet_falls_back_to_npz(self):
+        with mock.patch.dict(sys.modules, {"pyarrow": None}):
+            report = columnar_report.ColumnarReport(self.parameters, "parquet")
+        self.assertEqual(report.file_format, "npz")
+
+    def test_not_enabled(self):
+        report = columnar_report.ColumnarReport({'collection_number': COLLECTION, 'experiment': 0}, "npz")
+        report.write_initial(self.initial.get_report_columns())
+        self.assertEqual(os.listdir("experiments/" + COLLECTION + "/columns"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# Tests of playing Episodes on the NativeMaze, with and without cycle detection.
+
+# Ending a game when the network repeats a state must not change any fitness,
+#  as a network that repeats a state would only go round the same loop until
+#  out of steps, and score the minimum fitness of 1 anyway. It should only
+#  save the steps.
+
+import unittest
+import numpy as np
+import TextworldGames
+import episode
+import fixtures_utest
+import native_maze
+
+class TestCycleDetection(unittest.TestCase):
+    def play_population(self, code, steps_to_retain, chain_rewards, detect_cycles):
+        sim_population = fixtures_utest.make_population(30, (steps_to_retain * 7) + 5, 4)
+        tw_game_index = TextworldGames.TextworldGames()
+        fitnesses = []
+        steps_played = 0
+        for network_id in range(sim_population.get_population_size()):
+            nn_obj = sim_population.get_neural_network_model(network_id, "numpy")
+            max_steps = tw_game_index.get_game_max_steps(code)
+            game = episode.Episode(
+                native_maze.NativeMaze(tw_game_index.get_game_data_path(code)),
+                max_steps,
+                False,
+                False,
+                steps_to_retain,
+                -1,
+                10,
+                chain_rewards,
+                detect_cycles
+                )
+            while not game.finished:
+                game.take_step(np.asarray(nn_obj(game.get_input_state()[None, :])[0]))
+            fitnesses.append(game.fitness)
+            steps_played += max_steps - game.remaining_steps
+        return fitnesses, steps_played
+
+    def test_same_fitnesses(self):
+        for code in ("coin_collector_5", "coin_collector_15"):
+            for steps_to_retain in (1, 3):
+                for chain_rewards in (False, True):
+                    settings = f"{code}, {steps_to_retain} steps, chain_rewards {chain_rewards}"
+                    fitnesses, steps_played = self.play_population(code, steps_to_retain, chain_rewards, False)
+                    detected_fitnesses, detected_steps_played = self.play_population(code, steps_to_retain, chain_rewards, True)
+                    self.assertEqual(detected_fitnesses, fitnesses, settings)
+                    self.assertLess(detected_steps_played, steps_played, settings)
+
+    def test_some_networks_win(self):
+        # So that the fitnesses compared are not all the minimum.
+
+        fitnesses, steps_played = self.play_population("coin_collector_5", 3, False, True)
+        self.assertGreater(max(fitnesses), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# Tests of the FitnessCache, and of evaluating a Population with it.
+
+# The cache must evict the least recently used fitness when full, keep its
+#  fitnesses across a save and reload, and never change the fitness a Network
+#  is given: a generation evaluated with the cache must score exactly as it
+#  does without it.
+
+import unittest
+import os
+import tempfile
+import threading
+import numpy as np
+import fitness_cache
+import fixtures_utest
+import simulation
+
+GAME = "coin_collector_5"
+STEPS_TO_RETAIN = 3
+
+class TestFitnessCache(unittest.TestCase):
+    def test_key(self):
+        cache = fitness_cache.FitnessCache(10)
+        settings = (GAME, False, STEPS_TO_RETAIN, -1, 10, False, "numpy")
+        key = cache.get_key(bytes(32), settings)
+        self.assertEqual(key, cache.get_key(bytes(32), settings))
+        self.assertNotEqual(key, cache.get_key(bytes(31) + b"\x01", settings))
+        self.assertNotEqual(key, cache.get_key(bytes(32), settings[:-1] + ("keras",)))
+
+    def test_least_recently_used_evicted(self):
+        cache = fitness_cache.FitnessCache(3)
+        for key in ("a", "b", "c"):
+            cache.set(key, 1)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("d", 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(list(cache.entries), ["c", "a", "d"])
+        cache.set("c", 3)
+        cache.set("e", 4)
+        self.assertEqual(list(cache.entries), ["d", "c", "e"])
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_save_and_reload(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "fitness_cache.json")
+            cache = fitness_cache.FitnessCache(3, file_path)
+            for key, fitness in (("a", 1), ("b", 20), ("c", 300), ("d", 4)):
+                cache.set(key, fitness)
+            cache.get("b")
+            cache.save()
+            self.assertEqual(sorted(os.listdir(folder)), ["fitness_cache.json", "fitness_cache.json.lock"])
+
+            reloaded = fitness_cache.FitnessCache(3, file_path)
+            self.assertEqual(list(reloaded.entries.items()), [("c", 300), ("d", 4), ("b", 20)])
+
+            # Reloaded into a smaller cache, the least recently used go.
+
+            smaller = fitness_cache.FitnessCache(2, file_path)
+            self.assertEqual(list(smaller.entries.items()), [("d", 4), ("b", 20)])
+
+    def test_save_merges(self):
+        # The fitnesses saved by another cache since this one was loaded are
+        #  kept, as less recently used than this cache's own.
+
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "fitness_cache.json")
+            first = fitness_cache.FitnessCache(4, file_path)
+            second = fitness_cache.FitnessCache(4, file_path)
+            first.set("a", 1)
+            first.set("b", 2)
+            first.save()
+            second.set("c", 3)
+            second.set("a", 1)
+            second.set("d", 4)
+            second.save()
+            self.assertEqual(list(second.entries), ["b", "c", "a", "d"])
+            self.assertEqual(list(fitness_cache.FitnessCache(4, file_path).entries), ["b", "c", "a", "d"])
+
+            first.set("e", 5)
+            first.save()
+            self.assertEqual(list(fitness_cache.FitnessCache(4, file_path).entries), ["d", "a", "b", "e"])
+
+    def test_concurrent_saves(self):
+        # Every fitness saved at the same time by many caches is kept.
+
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "fitness_cache.json")
+            caches = [fitness_cache.FitnessCache(1000, file_path) for worker in range(8)]
+
+            def save_fitnesses(worker):
+                for fitness in range(20):
+                    caches[worker].set(f"{worker}-{fitness}", fitness)
+                    caches[worker].save()
+
+            threads = [threading.Thread(target = save_fitnesses, args = (worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(fitness_cache.FitnessCache(1000, file_path).entries), 160)
+            self.assertEqual(sorted(os.listdir(folder)), ["fitness_cache.json", "fitness_cache.json.lock"])
+
+class TestCachedEvaluation(unittest.TestCase):
+    def make_population(self):
+        return fixtures_utest.make_population(16, (STEPS_TO_RETAIN * 7) + 5, 4)
+
+    def evaluate(self, sim_population, cache, evaluation_mode="sequential", inference_backend="numpy"):
+        sim_environment = simulation.Simulation(environment_backend = "native", fitness_cache = cache)
+        try:
+            sim_environment.evaluate_population(sim_population, GAME, False, False, STEPS_TO_RETAIN, -1, 10, False, evaluation_mode, inference_backend)
+        finally:
+            sim_environment.close()
+        return sim_population.get_fitnesses()
+
+    def test_same_fitnesses(self):
+        uncached = self.evaluate(self.make_population(), None)
+        self.assertGreater(uncached.max(), 1)
+
+        cache = fitness_cache.FitnessCache(100)
+        first = self.evaluate(self.make_population(), cache)
+        self.assertTrue(np.array_equal(first, uncached))
+        self.assertEqual(cache.hits, 0)
+
+        second = self.evaluate(self.make_population(), cache)
+        self.assertTrue(np.array_equal(second, uncached))
+        self.assertEqual(cache.hits, 16)
+
+    def test_part_cached(self):
+        # Half the Population cached, in a cache too small for all of it.
+
+        uncached = self.evaluate(self.make_population(), None)
+        cache = fitness_cache.FitnessCache(8)
+        self.evaluate(self.make_population(), cache)
+        self.assertEqual(len(cache.entries), 8)
+        fitnesses = self.evaluate(self.make_population(), cache)
+        self.assertTrue(np.array_equal(fitnesses, uncached))
+        self.assertEqual(cache.hits, 8)
+
+    def test_keyed_on_backend_used(self):
+        # The lockstep and async modes evaluate with NumPy, whichever inference
+        #  backend is asked for, so their fitnesses are NumPy's.
+
+        uncached = self.evaluate(self.make_population(), None)
+        cache = fitness_cache.FitnessCache(100)
+        for evaluation_mode in ("lockstep", "async"):
+            fitnesses = self.evaluate(self.make_population(), cache, evaluation_mode, "keras")
+            self.assertTrue(np.array_equal(fitnesses, uncached), evaluation_mode)
+        self.assertEqual(cache.hits, 16)
+        self.evaluate(self.make_population(), cache)
+        self.assertEqual(cache.hits, 32)
+        self.assertEqual(len(cache.entries), 16)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# Tests of the CompiledModel against the NumPy forward pass of a Network.
+
+# Keras and TensorFlow are faked, see fixtures_utest.fake_keras(), so only the
+#  loading of the weights into the model is tested, not the tracing.
+
+import unittest
+import numpy as np
+import fixtures_utest
+import inference
+
+class TestCompiledModel(unittest.TestCase):
+    def setUp(self):
+        fixtures_utest.fake_keras(self)
+
+    def test_layers_after_input(self):
+        # The Network's layer n is the model's layer n + 1.
+
+        sim_population = fixtures_utest.make_population(2, 13, 15)
+        nn = sim_population.get_network(0)
+        compiled = inference.CompiledModel(nn)
+        compiled.set_weights(nn.weights)
+        self.assertIsNone(compiled.model.layers[0].weights)
+        self.assertEqual(compiled.model.layers[1].weights[0].shape, nn.weights[0][0].shape)
+        self.assertEqual(compiled.model.layers[2].weights[0].shape, nn.weights[1][0].shape)
+        inputs = np.ones((2, 13), dtype = np.float32)
+        self.assertTrue(np.allclose(compiled(inputs), nn.get_numpy_model()(inputs)))
+
+    def test_weights_swapped(self):
+        # Networks of the same architecture loaded in turn into one model.
+
+        sim_population = fixtures_utest.make_population(16, 13, 15)
+        networks = [sim_population.get_network(network_id) for network_id in range(16)]
+        key = networks[0].get_architecture_key()
+        same_architecture = [nn for nn in networks if nn.get_architecture_key() == key]
+        self.assertGreater(len(same_architecture), 1)
+        compiled = inference.CompiledModel(same_architecture[0])
+        inputs = np.random.default_rng(15).random((4, 13), dtype = np.float32)
+        for nn in same_architecture + same_architecture[::-1]:
+            compiled.set_weights(nn.weights)
+            self.assertTrue(np.allclose(compiled(inputs), nn.get_numpy_model()(inputs)))
+
+if __name__ == '__main__':
+    unittest.main()
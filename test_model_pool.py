@@ -0,0 +1,66 @@
+# Tests of sharing one model per architecture with the ModelPool, against the
+#  NumPy forward pass of each Network.
+
+# Keras and TensorFlow are faked, see fixtures_utest.fake_keras(). Loading a
+#  Network into a shared model must leave nothing of the Network loaded
+#  before it.
+
+import unittest
+import numpy as np
+import fixtures_utest
+import inference
+import model_pool
+
+class TestModelPool(unittest.TestCase):
+    def setUp(self):
+        fixtures_utest.fake_keras(self)
+        self.sim_population = fixtures_utest.make_population(16, 13, 14)
+        self.inputs = np.random.default_rng(14).random((3, 13), dtype = np.float32)
+
+    def assert_loaded(self, model, nn):
+        # Every layer holds this Network's weights, and the model gives its
+        #  outputs.
+
+        layers = model.layers if isinstance(model, fixtures_utest.FakeModel) else model.model.layers
+        self.assertIsNone(layers[0].weights)
+        for layer in range(len(nn.weights)):
+            self.assertTrue(np.array_equal(layers[layer + 1].weights[0], nn.weights[layer][0]))
+            self.assertTrue(np.array_equal(layers[layer + 1].weights[1], nn.weights[layer][1]))
+        self.assertTrue(np.allclose(model(self.inputs), nn.get_numpy_model()(self.inputs)))
+
+    def test_one_model_per_architecture(self):
+        for backend in ("keras", "keras_compiled"):
+            pool = model_pool.ModelPool()
+            keys = set()
+            for network_id in range(16):
+                nn = self.sim_population.get_network(network_id)
+                keys.add(nn.get_architecture_key())
+                model = pool.get_model(nn, backend)
+                self.assertIs(model, pool.models[(backend, nn.get_architecture_key())])
+                self.assertIsInstance(model, fixtures_utest.FakeModel if backend == "keras" else inference.CompiledModel)
+            self.assertGreater(len(keys), 1)
+            self.assertEqual(pool.builds_count, len(keys))
+            self.assertEqual(len(pool.models), len(keys))
+            self.assertEqual(pool.loads_count, 16)
+
+    def test_no_stale_weights(self):
+        # Every Network loaded after another of the same architecture.
+
+        networks = [self.sim_population.get_network(network_id) for network_id in range(16)]
+        for backend in ("keras", "keras_compiled"):
+            pool = model_pool.ModelPool()
+            for nn in networks + networks[::-1]:
+                self.assert_loaded(pool.get_model(nn, backend), nn)
+            self.assertLess(pool.builds_count, 16)
+
+    def test_clear(self):
+        pool = model_pool.ModelPool()
+        nn = self.sim_population.get_network(0)
+        model = pool.get_model(nn)
+        pool.clear()
+        self.assertEqual(pool.models, {})
+        self.assertIsNot(pool.get_model(nn), model)
+        self.assertEqual(pool.builds_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# Conformance tests of the NativeMaze against the real TextWorld engine.
+
+# Each coin_collector game is played in both, with the same commands, and the
+#  parts of the replies the Simulation uses must match: which of the Episode
+#  action space commands are admissible, the observations of failed moves,
+#  and the won flag.
+
+import unittest
+import random
+import json
+import TextworldGames
+import native_maze
+import episode
+
+try:
+    import textworld
+    import textworld.gym
+except ImportError:
+    textworld = None
+
+# The coin_collector games, the NativeMaze cannot play the others.
+
+GAMES = ["coin_collector_5", "coin_collector_15", "coin_collector_50"]
+
+class TestNativeMaze(unittest.TestCase):
+    def make_environments(self, code):
+        tw_game_index = TextworldGames.TextworldGames()
+        env_parameters = textworld.EnvInfos(
+            admissible_commands = True,
+            moves = True,
+            won = True,
+            score = True
+        )
+        environment_id = textworld.gym.register_game(
+            tw_game_index.get_game_path(code),
+            env_parameters,
+            max_episode_steps = tw_game_index.get_game_max_steps(code)
+            )
+        tw_environment = textworld.gym.make(environment_id)
+        maze = native_maze.NativeMaze(tw_game_index.get_game_data_path(code))
+        return tw_environment, maze
+
+    def assert_same_reply(self, tw_reply, native_reply, command):
+        tw_obs, tw_infos = tw_reply
+        native_obs, native_infos = native_reply
+        for action in episode.Episode.action_space:
+            self.assertEqual(
+                action in tw_infos["admissible_commands"],
+                action in native_infos["admissible_commands"],
+                "admissible " + action + " after " + command
+                )
+        self.assertEqual(tw_infos["won"], native_infos["won"], "won after " + command)
+        for failed in (native_maze.NativeMaze.failed_move_observation, native_maze.NativeMaze.failed_take_observation):
+            self.assertEqual(tw_obs.strip() == failed, native_obs.strip() == failed, "observation after " + command)
+
+    def play(self, code, commands):
+        tw_environment, maze = self.make_environments(code)
+        self.assert_same_reply(tw_environment.reset(), maze.reset(), "reset")
+        for command in commands:
+            tw_obs, tw_score, tw_done, tw_infos = tw_environment.step(command)
+            native_obs, native_score, native_done, native_infos = maze.step(command)
+            self.assert_same_reply((tw_obs, tw_infos), (native_obs, native_infos), command)
+            self.assertEqual(tw_done, native_done, "done after " + command)
+            if tw_done:
+                break
+        tw_environment.close()
+
+    @unittest.skipIf(textworld is None, "TextWorld is not installed")
+    def test_walkthrough(self):
+        tw_game_index = TextworldGames.TextworldGames()
+        for code in GAMES:
+            with open(tw_game_index.get_game_data_path(code)) as game_file:
+                walkthrough = json.load(game_file)["metadata"]["walkthrough"]
+            self.play(code, walkthrough)
+
+    @unittest.skipIf(textworld is None, "TextWorld is not installed")
+    def test_random_walks(self):
+        for code in GAMES:
+            random.seed(code)
+            commands = [random.choice(episode.Episode.action_space) for i in range(100)]
+            self.play(code, commands)
+
+    def test_walkthrough_wins(self):
+        # Needs only the game data, so runs without TextWorld too.
+
+        tw_game_index = TextworldGames.TextworldGames()
+        for code in GAMES:
+            maze = native_maze.NativeMaze(tw_game_index.get_game_data_path(code))
+            maze.reset()
+            with open(tw_game_index.get_game_data_path(code)) as game_file:
+                walkthrough = json.load(game_file)["metadata"]["walkthrough"]
+            for command in walkthrough:
+                obs, score, done, infos = maze.step(command)
+            self.assertTrue(infos["won"])
+            self.assertTrue(done)
+
+    def test_not_a_maze(self):
+        tw_game_index = TextworldGames.TextworldGames()
+        with self.assertRaises(ValueError):
+            native_maze.NativeMaze(tw_game_index.get_game_data_path("2-3-10-v1"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+# Tests of the digest and checksums of a Network against its Population's.
+
+# The fitness cache keys each Network by the digest the Population stores for
+#  it, so a Network built from the Population must compute the same digest,
+#  and any change of its weights must give a new one.
+
+import unittest
+import numpy as np
+import fixtures_utest
+
+class TestDigest(unittest.TestCase):
+    def test_same_as_population(self):
+        sim_population = fixtures_utest.make_population(6, 13, 12)
+        for network_id in range(6):
+            nn = sim_population.get_network(network_id)
+            self.assertEqual(nn.get_digest(), sim_population.get_network_digest(network_id))
+            self.assertEqual(nn.dna["meta"]["hidden_checksum"], sim_population.checksums[network_id, 0])
+            self.assertEqual(nn.dna["meta"]["output_checksum"], sim_population.checksums[network_id, 1])
+            self.assertEqual(nn.dna["meta"]["checksum"], sim_population.checksums[network_id, 2])
+        self.assertEqual(len(set(sim_population.get_network_digest(network_id) for network_id in range(6))), 6)
+
+    def test_saving_weights_changes_digest(self):
+        sim_population = fixtures_utest.make_population(2, 13, 12)
+        nn = sim_population.get_network(0)
+        digest = nn.get_digest()
+
+        # Stored weights are replaced at their index in the weights list, so
+        #  index 1 is the output layer.
+
+        weights, biases = nn.weights[1]
+        weights = weights.copy()
+        weights[5, 2] += 0.125
+        nn.save_weight_bias_definitions(1, [weights, biases])
+        self.assertIsNone(nn.digest)
+        self.assertNotEqual(nn.get_digest(), digest)
+        self.assertEqual(nn.get_digest(), nn.compute_digest(nn.weights, nn.dna))
+
+        # Saved to the Population, the weights give it the same new digest.
+
+        sim_population.save_weight_bias_definitions(0, 2, [weights, biases])
+        self.assertEqual(sim_population.get_network_digest(0), nn.get_digest())
+        self.assertEqual(sim_population.get_network(0).get_digest(), nn.get_digest())
+
+    def test_dna_changes_digest(self):
+        sim_population = fixtures_utest.make_population(1, 13, 12)
+        nn = sim_population.get_network(0)
+        dna = nn.get_network_dna()
+        digest = nn.compute_digest(nn.weights, dna)
+        dna["output"]["activation"] = np.nextafter(dna["output"]["activation"], 2.0)
+        self.assertNotEqual(nn.compute_digest(nn.weights, dna), digest)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+# Tests of the Population arrays, and of selecting parents from them.
+
+# The selection strategies are drawn from many times, with the random number
+#  generators seeded, and the counts of each network's selections compared
+#  against the order of the fitnesses.
+
+import unittest
+import pickle
+import numpy as np
+import fixtures_utest
+import population
+
+class TestSelection(unittest.TestCase):
+    def make_population(self, fitnesses):
+        return fixtures_utest.make_population(len(fitnesses), 13, 7, fitnesses = fitnesses)
+
+    def count_selections(self, sim_population, strategy, tournament_size=3):
+        sim_population.set_selection_strategy(strategy, tournament_size)
+        sim_population.create_fitness_map()
+        parents = sim_population.get_weighted_parent_pairs(20000)
+        self.assertTrue((parents[:, 0] != parents[:, 1]).all())
+        return np.bincount(parents.ravel(), minlength = sim_population.get_population_size())
+
+    def assert_follows_fitness(self, counts, fitnesses):
+        order = np.argsort(fitnesses)
+        self.assertTrue((np.diff(counts[order]) > 0).all(), f"{counts[order]} for {np.sort(fitnesses)}")
+
+    def test_sus_follows_fitness(self):
+        fitnesses = [3, 40, 1, 12, 25, 6]
+        sim_population = self.make_population(fitnesses)
+        self.assert_follows_fitness(self.count_selections(sim_population, "sus"), fitnesses)
+
+    def test_rank_follows_fitness(self):
+        # Rank selection ignores the spread, so a huge fitness is picked no
+        #  more often than the fittest of an even spread would be.
+
+        fitnesses = [3, 1000, 1, 12, 25, 6]
+        sim_population = self.make_population(fitnesses)
+        counts = self.count_selections(sim_population, "rank")
+        self.assert_follows_fitness(counts, fitnesses)
+        self.assertLess(counts[1] / counts.sum(), 0.5)
+
+    def test_rank_ties_share_weight(self):
+        fitnesses = [5, 5, 1, 9]
+        sim_population = self.make_population(fitnesses)
+        sim_population.set_selection_strategy("rank")
+        sim_population.create_fitness_map()
+        weights = np.diff(np.concatenate(([0.0], sim_population.get_fitness_map())))
+        self.assertAlmostEqual(weights[0], weights[1])
+        self.assertLess(weights[2], weights[0])
+        self.assertGreater(weights[3], weights[0])
+
+    def test_tournament_never_picks_worst(self):
+        # With the whole Population in each tournament, the worst network
+        #  could only win one that drew nothing else.
+
+        fitnesses = [4, 9, 2, 7, 1, 8, 5, 3]
+        sim_population = self.make_population(fitnesses)
+        counts = self.count_selections(sim_population, "tournament", len(fitnesses))
+        self.assertEqual(counts[np.argmin(fitnesses)], 0)
+        self.assertEqual(counts.argmax(), np.argmax(fitnesses))
+
+    def test_concentrated_fitness_distinct_parents(self):
+        # With almost all the fitness in one network, nearly every first draw
+        #  is that network, and so would nearly every second draw be, were
+        #  it not taken out of the fitness map.
+
+        for fitnesses in ([1, 1, 100000, 1, 1], [0, 0, 50, 0]):
+            for strategy in ("fitness_proportionate", "sus"):
+                settings = f"{strategy}, {fitnesses}"
+                sim_population = self.make_population(fitnesses)
+                sim_population.set_selection_strategy(strategy)
+                sim_population.create_fitness_map()
+                parents = sim_population.get_weighted_parent_pairs(5000)
+                self.assertFalse((parents[:, 0] == parents[:, 1]).any(), settings)
+                self.assertTrue(((parents == 2).sum(axis = 1) == 1).mean() > 0.99, settings)
+                counts = np.bincount(parents.ravel(), minlength = len(fitnesses))
+                self.assertTrue((np.delete(counts, 2) > 0).all(), settings)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            population.Population().set_selection_strategy("lottery")
+
+class TestPickling(unittest.TestCase):
+    def test_pickling_leaves_population(self):
+        sim_population = fixtures_utest.make_population(5, 13, 8)
+        sim_population.reserve(20)
+        capacity = sim_population.capacity
+        layer_weights = sim_population.layer_weights[0]
+        unpickled = pickle.loads(pickle.dumps(sim_population))
+        self.assertEqual(sim_population.capacity, capacity)
+        self.assertIs(sim_population.layer_weights[0], layer_weights)
+        self.assertEqual(unpickled.capacity, 5)
+        self.assertEqual(unpickled.layer_weights[0].shape[0], 5)
+        self.assertTrue(np.array_equal(unpickled.layer_weights[0], layer_weights[:5]))
+        self.assertTrue(np.array_equal(unpickled.digests, sim_population.digests[:5]))
+
+        # The unpickled Population can still grow.
+
+        unpickled.add_carried_networks(sim_population, [0, 1])
+        self.assertEqual(unpickled.get_population_size(), 7)
+
+class TestCarriedNetworks(unittest.TestCase):
+    def make_generations(self):
+        previous = fixtures_utest.make_population(6, 13, 10)
+        current = fixtures_utest.make_population(4, 13, 11, 6)
+        current.add_carried_networks(previous, [1, 4])
+        return previous, current
+
+    def test_unchanged_networks_pass(self):
+        previous, current = self.make_generations()
+        self.assertEqual(current.verify_carried_networks(previous), 2)
+
+    def test_changed_checksum_raises(self):
+        previous, current = self.make_generations()
+        weights, biases = current.get_weight_bias_definitions(5, 1)
+        current.save_weight_bias_definitions(5, 1, [weights * 0.5, biases])
+        with self.assertRaises(ValueError):
+            current.verify_carried_networks(previous)
+
+    def test_changed_digest_raises(self):
+        # The checksums only sum the first row of weights, so a change
+        #  anywhere else is only seen in the digest.
+
+        previous, current = self.make_generations()
+        weights, biases = current.get_weight_bias_definitions(4, 2)
+        weights = weights.copy()
+        weights[3, 0] += 0.25
+        current.save_weight_bias_definitions(4, 2, [weights, biases])
+        self.assertTrue(np.array_equal(current.checksums[4], previous.checksums[1]))
+        with self.assertRaises(ValueError):
+            current.verify_carried_networks(previous)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+# Tests of evaluating a Population with the Simulation, on the native backend.
+
+# The NativeMaze plays the coin_collector games without TextWorld, and the
+#  NumPy inference backend evaluates the networks without Keras, so these run
+#  with neither installed.
+
+import unittest
+import os
+import subprocess
+import sys
+import numpy as np
+import TextworldGames
+import async_evaluation
+import episode
+import fixtures_utest
+import native_maze
+import simulation
+import step_trie
+
+GAME = "coin_collector_5"
+STEPS_TO_RETAIN = 50
+
+class TestSimulation(unittest.TestCase):
+    def make_population(self, size=12, seed=3):
+        return fixtures_utest.make_population(size, (STEPS_TO_RETAIN * 7) + 5, seed)
+
+    def evaluate(self, sim_population, evaluation_mode="sequential", seed=11, **settings):
+        fixtures_utest.seed_random(seed)
+        sim_environment = simulation.Simulation(environment_backend = "native", **settings)
+        try:
+            sim_environment.evaluate_population(
+                sim_population,
+                GAME,
+                False,
+                False,
+                STEPS_TO_RETAIN,
+                -1,
+                10,
+                False,
+                evaluation_mode,
+                "numpy"
+                )
+        finally:
+            sim_environment.close()
+        return sim_population.get_fitnesses()
+
+    def test_native_without_textworld(self):
+        # Run in a fresh interpreter, as another test may have imported it.
+
+        script = (
+            "import sys, numpy, population, simulation\n"
+            "numpy.random.seed(1)\n"
+            "p = population.Population()\n"
+            f"p.create_random_population(3, 0, {(STEPS_TO_RETAIN * 7) + 5})\n"
+            "s = simulation.Simulation(environment_backend = 'native')\n"
+            f"s.evaluate_population(p, '{GAME}', False, False, {STEPS_TO_RETAIN}, -1, 10, False, 'sequential', 'numpy')\n"
+            "s.close()\n"
+            "assert 'textworld' not in sys.modules\n"
+            )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd = os.path.dirname(os.path.abspath(__file__)),
+            capture_output = True,
+            text = True
+            )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_fitnesses_set(self):
+        fitnesses = self.evaluate(self.make_population())
+        self.assertFalse(np.isnan(fitnesses).any())
+
+    def test_environment_released_on_failure(self):
+        def failing_network(nn_input_tensor):
+            raise RuntimeError("failed")
+
+        sim_environment = simulation.Simulation(environment_backend = "native")
+        with self.assertRaises(RuntimeError):
+            sim_environment.apply_nn_to_textworld(failing_network, GAME, False, False, STEPS_TO_RETAIN, -1, 10, False)
+        self.assertEqual(len(sim_environment.environment_pools[GAME]), 1)
+        sim_environment.close()
+
+    def test_environments_released_on_failure(self):
+        # The inputs of these networks do not fit the input state.
+
+        sim_population = fixtures_utest.make_population(4, 13, 3)
+        for evaluation_mode in ("lockstep", "async"):
+            sim_environment = simulation.Simulation(environment_backend = "native")
+            with self.assertRaises(ValueError):
+                sim_environment.evaluate_population(sim_population, GAME, False, False, STEPS_TO_RETAIN, -1, 10, False, evaluation_mode, "numpy")
+            self.assertEqual(len(sim_environment.environment_pools[GAME]), 4, evaluation_mode)
+            sim_environment.close()
+
+    def test_modes_match_sequential(self):
+        # The "parallel" mode pickles the Population's Networks to spawned
+        #  worker processes, which build their own Simulation.
+
+        sequential = self.evaluate(self.make_population())
+        self.assertGreater(sequential.max(), 1)
+        for evaluation_mode in ("lockstep", "async", "parallel"):
+            fitnesses = self.evaluate(self.make_population(), evaluation_mode, evaluation_workers = 2)
+            self.assertTrue(np.array_equal(fitnesses, sequential), evaluation_mode)
+
+    def test_shared_steps_match_sequential(self):
+        sequential = self.evaluate(self.make_population())
+        self.assertGreater(sequential.max(), 1)
+        for evaluation_mode in ("sequential", "lockstep", "async"):
+            fitnesses = self.evaluate(self.make_population(), evaluation_mode, share_steps = True)
+            self.assertTrue(np.array_equal(fitnesses, sequential), evaluation_mode)
+
+    def test_shared_steps_native_only(self):
+        # TextWorld games can only be replayed, not restored, so their steps
+        #  are not shared. Creating the Simulation does not import TextWorld.
+
+        with self.assertWarns(RuntimeWarning):
+            sim_environment = simulation.Simulation(environment_backend = "textworld", share_steps = True)
+        self.assertFalse(sim_environment.share_steps)
+        self.assertEqual(sim_environment.share_environment_steps(GAME, "environment"), "environment")
+        sim_environment = simulation.Simulation(environment_backend = "native", share_steps = True)
+        self.assertTrue(sim_environment.share_steps)
+        self.assertIsInstance(sim_environment.share_environment_steps(GAME, "environment"), step_trie.TrieEnvironment)
+
+    def test_shared_steps_in_threads(self):
+        # The native mazes are stepped in the event loop by the Simulation,
+        #  so the Episodes are played here with step threads, as TextWorld
+        #  games would be, all sharing one StepTrie.
+
+        sequential = self.evaluate(self.make_population())
+        sim_population = self.make_population()
+        tw_game_index = TextworldGames.TextworldGames()
+        trie = step_trie.StepTrie()
+        episodes = []
+        for network_id in range(sim_population.get_population_size()):
+            episodes.append(episode.Episode(
+                step_trie.TrieEnvironment(native_maze.NativeMaze(tw_game_index.get_game_data_path(GAME)), trie),
+                tw_game_index.get_game_max_steps(GAME),
+                False,
+                False,
+                STEPS_TO_RETAIN,
+                -1,
+                10,
+                False
+                ))
+        async_evaluation.AsyncEvaluation(*sim_population.get_stacked_layers(), 8).run(episodes)
+        self.assertEqual([game.fitness for game in episodes], sequential.tolist())
+        self.assertGreater(trie.shared_steps, 0)
+
+if __name__ == '__main__':
+    unittest.main()
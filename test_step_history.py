@@ -0,0 +1,71 @@
+# Tests of the StepHistory ring buffer against the list it replaced.
+
+# The Episode used to keep its retained steps in a list, appending each new
+#  step and popping the oldest, and built the network input by concatenating
+#  the current action space and every retained step. The ring buffer must give
+#  the same input, oldest step, and newest step, however often it wraps round.
+
+import unittest
+import random
+import numpy as np
+import step_history
+
+ACTIONS_COUNT = 5
+
+class ListHistory():
+    # The list of retained steps as the Episode kept it before StepHistory.
+
+    def __init__(self, steps_to_retain):
+        self.steps = [[0] * (ACTIONS_COUNT + 2) for i in range(steps_to_retain)]
+
+    def append(self, action_space_values, action, result):
+        self.steps.append(list(action_space_values) + [action, result])
+        self.steps.pop(0)
+
+    def get_input_state(self, action_space_values):
+        final_input = list(action_space_values)
+        for prev in self.steps:
+            for ele in prev:
+                final_input.append(ele)
+        return final_input
+
+class TestStepHistory(unittest.TestCase):
+    def random_step(self):
+        action_space_values = [random.randint(0, 1) for i in range(ACTIONS_COUNT)]
+        return action_space_values, random.randrange(ACTIONS_COUNT), random.choice([-1, 10, 20, 30])
+
+    def test_same_as_list(self):
+        random.seed(13)
+        for steps_to_retain in (1, 2, 3, 7, 50):
+            history = step_history.StepHistory(steps_to_retain, ACTIONS_COUNT)
+            expected = ListHistory(steps_to_retain)
+
+            # Several times round the ring, checking after every step.
+
+            for step in range(steps_to_retain * 3 + 2):
+                current = self.random_step()[0]
+                self.assertEqual(
+                    history.get_input_state(np.asarray(current, dtype = np.float32)).tolist(),
+                    expected.get_input_state(current),
+                    f"input after {step} steps of {steps_to_retain}"
+                    )
+                self.assertEqual(history.oldest().tolist(), expected.steps[0])
+                self.assertEqual(history.newest().tolist(), expected.steps[-1])
+                values, action, result = self.random_step()
+                history.append(np.asarray(values, dtype = np.float32), action, result)
+                expected.append(values, action, result)
+
+    def test_no_steps_retained(self):
+        history = step_history.StepHistory(0, ACTIONS_COUNT)
+        history.append(np.ones(ACTIONS_COUNT, dtype = np.float32), 2, 10)
+        current = np.asarray([1, 0, 1, 0, 1], dtype = np.float32)
+        self.assertEqual(history.get_input_state(current).tolist(), current.tolist())
+
+    def test_input_reused(self):
+        history = step_history.StepHistory(3, ACTIONS_COUNT)
+        first = history.get_input_state(np.zeros(ACTIONS_COUNT, dtype = np.float32))
+        second = history.get_input_state(np.ones(ACTIONS_COUNT, dtype = np.float32))
+        self.assertIs(first, second)
+
+if __name__ == '__main__':
+    unittest.main()
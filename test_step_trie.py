@@ -0,0 +1,120 @@
+# Tests of answering game steps from a StepTrie against stepping the game directly.
+
+# Several TrieEnvironments share one StepTrie, each playing its own random
+#  commands, many of them opening the same way, and every reply must be the
+#  one the game itself gives to the same commands. The NativeMaze has its
+#  state restored directly, and an environment without get_state() is reset
+#  and replayed, so both ways of synchronising are tested.
+
+import unittest
+import random
+import TextworldGames
+import episode
+import native_maze
+import step_trie
+
+GAMES = ["coin_collector_5", "coin_collector_15"]
+
+class ReplayedMaze():
+    # A NativeMaze without get_state(), as a TextWorld environment would be.
+
+    def __init__(self, file_path):
+        self.maze = native_maze.NativeMaze(file_path)
+        self.steps_count = 0
+
+    def reset(self):
+        return self.maze.reset()
+
+    def step(self, command):
+        self.steps_count += 1
+        return self.maze.step(command)
+
+    def close(self):
+        self.maze.close()
+
+class TestStepTrie(unittest.TestCase):
+    def make_commands(self, walks_count, steps_count):
+        # Walks that share their opening commands, then go their own way.
+
+        openings = [[random.choice(episode.Episode.action_space) for i in range(steps_count)] for j in range(3)]
+        walks = []
+        for walk in range(walks_count):
+            shared = random.randint(0, steps_count)
+            walks.append(random.choice(openings)[:shared] + [
+                random.choice(episode.Episode.action_space)
+                for i in range(steps_count - shared)
+                ])
+        return walks
+
+    def assert_same_replies(self, make_environment):
+        tw_game_index = TextworldGames.TextworldGames()
+        for code in GAMES:
+            random.seed(code)
+            file_path = tw_game_index.get_game_data_path(code)
+            trie = step_trie.StepTrie()
+            steps_count = 0
+            for commands in self.make_commands(20, 30):
+                shared = step_trie.TrieEnvironment(make_environment(file_path), trie)
+                direct = native_maze.NativeMaze(file_path)
+                self.assertEqual(shared.reset(), direct.reset())
+                for command in commands:
+                    reply = shared.step(command)
+                    self.assertEqual(reply, direct.step(command), code + " " + command)
+                    steps_count += 1
+                    if reply[2]:
+                        break
+            self.assertEqual(trie.shared_steps + trie.played_steps, steps_count)
+            self.assertGreater(trie.shared_steps, 0)
+
+    def test_restored(self):
+        self.assert_same_replies(native_maze.NativeMaze)
+
+    def test_replayed(self):
+        self.assert_same_replies(ReplayedMaze)
+
+    def test_replaying_saves_no_steps(self):
+        # Walks that all leave the shared path only save steps when the
+        #  environment is restored where they leave it, which is why the
+        #  Simulation only shares steps on the native backend.
+
+        tw_game_index = TextworldGames.TextworldGames()
+        file_path = tw_game_index.get_game_data_path("coin_collector_15")
+        random.seed(23)
+        opening = [random.choice(episode.Episode.action_space) for i in range(10)]
+        walks = [opening + [command] for command in episode.Episode.action_space]
+        steps_counts = {}
+        for restored in (True, False):
+            trie = step_trie.StepTrie()
+            environment = ReplayedMaze(file_path)
+            if restored:
+                environment.get_state = environment.maze.get_state
+                environment.set_state = environment.maze.set_state
+            for commands in walks:
+                shared = step_trie.TrieEnvironment(environment, trie)
+                shared.reset()
+                for command in commands:
+                    shared.step(command)
+            steps_counts[restored] = environment.steps_count
+        self.assertEqual(steps_counts[True], len(opening) + len(walks))
+        self.assertEqual(steps_counts[False], len(walks) * (len(opening) + 1))
+
+    def test_interleaved(self):
+        # Two environments taking turns, each leaving the other's wrapped
+        #  environment out of step with its node.
+
+        tw_game_index = TextworldGames.TextworldGames()
+        file_path = tw_game_index.get_game_data_path("coin_collector_15")
+        random.seed(17)
+        trie = step_trie.StepTrie()
+        walks = self.make_commands(2, 40)
+        shared = [step_trie.TrieEnvironment(ReplayedMaze(file_path), trie) for walk in walks]
+        direct = [native_maze.NativeMaze(file_path) for walk in walks]
+        for walk in range(2):
+            self.assertEqual(shared[walk].reset(), direct[walk].reset())
+        for step in range(40):
+            for walk in range(2):
+                command = walks[walk][step]
+                self.assertEqual(shared[walk].step(command), direct[walk].step(command))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# Tests of streaming each generation's reporting to CSV as it completes.
+
+# The files written by a StreamingReport must be byte for byte those written
+#  by Reporting.output_simulation_to_csv() at the end of the simulation, from
+#  the same censuses, and so must those of a report resumed part way through.
+
+import unittest
+import os
+import shutil
+import breeding
+import fixtures_utest
+import reporting
+import streaming_report
+
+COLLECTION = "unittest_streaming"
+
+class TestStreamingReport(unittest.TestCase):
+    def setUp(self):
+        self.parameters = {
+            'collection_number': COLLECTION,
+            'experiment': "",
+            'collection_comment': "unittest of streaming reporting",
+            'generations': 3
+            }
+
+        # The censuses of a short simulation, with fitnesses of every kind
+        #  the report formats.
+
+        sim_population = fixtures_utest.make_population(6, 13, 16)
+        self.initial_census = reporting.Reporting.census(sim_population)
+        self.generations = []
+        serial_number = 6
+        for generation in range(3):
+            for network_id in range(6):
+                sim_population.set_nn_fitness(network_id, [1, 2.5, 140, 1, 7, 33][(network_id + generation) % 6])
+            after_evaluation = reporting.Reporting.census(sim_population)
+            sim_population.create_fitness_map()
+            children = breeding.Breeding().breed_generation(sim_population, serial_number, 4, 3, 0.1, 0.2, 0.5, 0.6, 1)
+            children.add_carried_networks(sim_population, [2, 5])
+            serial_number += 4
+            sim_population = children
+            self.generations.append((after_evaluation, reporting.Reporting.census(sim_population)))
+
+    def tearDown(self):
+        shutil.rmtree("experiments/" + COLLECTION, ignore_errors = True)
+
+    def make_folder(self, experiment):
+        os.makedirs("experiments/" + COLLECTION + "/" + experiment)
+        parameters = dict(self.parameters)
+        parameters['experiment'] = experiment
+        return parameters
+
+    def write_batch(self):
+        parameters = self.make_folder("batch")
+        report = {
+            'parameters': parameters,
+            'initial_population': self.initial_census,
+            'generations': [
+                {'after_evaluation': after_evaluation, 'after_carryover': after_carryover}
+                for after_evaluation, after_carryover in self.generations
+                ]
+            }
+        return reporting.Reporting.output_simulation_to_csv(parameters, report)
+
+    def read_files(self, experiment):
+        files = {}
+        for file_name in sorted(os.listdir("experiments/" + COLLECTION + "/" + experiment)):
+            file_path = "experiments/" + COLLECTION + "/" + experiment + "/" + file_name
+            if os.path.isdir(file_path):
+                files[file_name] = None
+            else:
+                with open(file_path, "rb") as csv_file:
+                    files[file_name] = csv_file.read()
+        return files
+
+    def assert_same_files(self, experiment):
+        batch = self.read_files("batch")
+        streamed = self.read_files(experiment)
+        self.assertEqual(sorted(streamed), sorted(batch))
+
+        # Only the parameters differ, by the experiment name.
+
+        for file_name in batch:
+            if file_name != "parameters.csv":
+                self.assertEqual(streamed[file_name], batch[file_name], file_name)
+        self.assertEqual(
+            streamed["parameters.csv"].replace(experiment.encode(), b"batch"),
+            batch["parameters.csv"]
+            )
+
+    def test_same_as_batch(self):
+        sim_avg_fitness = self.write_batch()
+        report = streaming_report.StreamingReport(self.make_folder("streamed"), self.initial_census)
+        for generation in range(3):
+            report.write_generation(generation, *self.generations[generation])
+        self.assertEqual(report.close(), sim_avg_fitness)
+        self.assert_same_files("streamed")
+
+    def test_resumed_same_as_batch(self):
+        # Resumed from the end of generation 0, after generation 1 was half
+        #  written when the run died.
+
+        sim_avg_fitness = self.write_batch()
+        parameters = self.make_folder("resumed")
+        report = streaming_report.StreamingReport(parameters, self.initial_census)
+        report.write_generation(0, *self.generations[0])
+        resume_state = report.get_state()
+        report.nn_results_file.writelines(reporting.Reporting.format_census_rows("1,after_evaluation", self.generations[1][0]))
+        report.nn_results_file.flush()
+        report.close()
+
+        report = streaming_report.StreamingReport(parameters, None, resume_state)
+        for generation in range(1, 3):
+            report.write_generation(generation, *self.generations[generation])
+        self.assertEqual(report.close(), sim_avg_fitness)
+        self.assert_same_files("resumed")
+
+    def test_not_enabled(self):
+        parameters = dict(self.parameters)
+        parameters['experiment'] = 0
+        report = streaming_report.StreamingReport(parameters, self.initial_census)
+        self.assertFalse(report.is_enabled())
+        report.write_generation(0, *self.generations[0])
+        self.assertIsNone(report.get_state())
+        self.assertIsNone(report.close())
+        self.assertFalse(os.path.exists("experiments/" + COLLECTION))
+
+if __name__ == '__main__':
+    unittest.main()
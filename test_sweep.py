@@ -0,0 +1,312 @@
+# Tests of the configurations of a Sweep, and of their IDs.
+
+# The ID of a configuration names its experiment folder, and is how a sweep
+#  run again knows which configurations are already complete, so it must be
+#  the same every time, and only change with the hyperparameters which
+#  change the fitnesses.
+
+import unittest
+import concurrent.futures
+import datetime
+import os
+import shutil
+from unittest import mock
+import sweep
+
+COLLECTION = "unittest_sweep"
+
+HYPERPARAMETERS = {
+    'collection_number': '0',
+    'experiment': '',
+    'collection_comment': "unittest of the sweep",
+    'evaluation_mode': 'sequential',
+    'evaluation_workers': None,
+    'selection_strategy': 'fitness_proportionate',
+    'tournament_size': 3,
+    'rank_pressure': 1.5,
+    'inference_backend': 'numpy',
+    'environment_backend': 'native',
+    'detect_cycles': False,
+    'fitness_cache_size': 0,
+    'fitness_cache_path': None,
+    'share_steps': False,
+    'columnar_output': None,
+    'checkpoint': False,
+    'resume': False,
+    'sweep_workers': 1,
+    'successive_halving': False,
+    'halving_min_generations': 2,
+    'halving_reduction_factor': 3,
+    'point_mutation_chance_max': 0.75,
+    'point_mutation_amount_max': 0.1,
+    'point_mutation_scalar': 0.8,
+    'game': 'coin_collector_5',
+    'steps_to_retain': 3,
+    'fitness_bias_scalar': 0.25,
+    'failed_step_reward': -1,
+    'valid_step_reward': 10,
+    'force_random_choice': False,
+    'force_pickup': True,
+    'chain_rewards': False
+    }
+
+HYPERPARAMETER_RANGES = {
+    'generations': [3, 6],
+    'size_new_generations': [8],
+    'carryover_count': [0, 2],
+    'point_mutation_chance': [0.1, 0.3, 0.5],
+    'point_mutation_amount': [0.35]
+    }
+
+class TestConfigurationId(unittest.TestCase):
+    def get_ids(self, hyperparameters, hyperparameter_ranges=HYPERPARAMETER_RANGES):
+        experiment_sweep = sweep.Sweep(hyperparameters, hyperparameter_ranges, 1)
+        return [experiment_id for experiment_id, configuration in experiment_sweep.get_configurations()]
+
+    def test_stable(self):
+        ids = self.get_ids(dict(HYPERPARAMETERS))
+        self.assertEqual(ids, self.get_ids(dict(HYPERPARAMETERS)))
+        self.assertEqual(len(set(ids)), len(ids))
+        for experiment_id in ids:
+            self.assertRegex(experiment_id, "^[0-9a-f]{16}$")
+
+        # The same from one version to the next, or a sweep run again would
+        #  not find the configurations it had completed.
+
+        self.assertEqual(ids[:2], ["59b41cc8bab96589", "0c3879c7245876a6"])
+
+        # The order of the ranges, and of the fixed hyperparameters, does not
+        #  matter.
+
+        reordered = dict(reversed(list(HYPERPARAMETERS.items())))
+        experiment_sweep = sweep.Sweep(reordered, HYPERPARAMETER_RANGES, 1)
+        self.assertEqual(
+            sorted(experiment_sweep.get_configuration_id(configuration) for experiment_id, configuration in experiment_sweep.get_configurations()),
+            sorted(ids)
+            )
+
+    def test_how_run_does_not_change_id(self):
+        ids = self.get_ids(dict(HYPERPARAMETERS))
+        for key, value in (
+            ('collection_comment', "another comment"),
+            ('checkpoint', True),
+            ('resume', True),
+            ('sweep_workers', 8),
+            ('evaluation_workers', 4),
+            ('evaluation_mode', 'async'),
+            ('inference_backend', 'keras'),
+            ('environment_backend', 'textworld'),
+            ('columnar_output', 'npz'),
+            ('fitness_cache_size', 1000),
+            ('fitness_cache_path', "fitness_cache.json"),
+            ('share_steps', True),
+            ('detect_cycles', True),
+            ('successive_halving', True),
+            ('halving_min_generations', 1),
+            ('halving_reduction_factor', 2)
+            ):
+            hyperparameters = dict(HYPERPARAMETERS)
+            hyperparameters[key] = value
+            self.assertEqual(self.get_ids(hyperparameters), ids, key)
+
+    def test_fitness_settings_change_id(self):
+        ids = set(self.get_ids(dict(HYPERPARAMETERS)))
+        for key, value in (
+            ('selection_strategy', 'tournament'),
+            ('tournament_size', 5),
+            ('rank_pressure', 2.0),
+            ('game', 'coin_collector_15'),
+            ('steps_to_retain', 5),
+            ('force_pickup', False),
+            ('valid_step_reward', 1)
+            ):
+            hyperparameters = dict(HYPERPARAMETERS)
+            hyperparameters[key] = value
+            self.assertTrue(ids.isdisjoint(self.get_ids(hyperparameters)), key)
+
+class TestConfigurations(unittest.TestCase):
+    def test_nested_loop_order(self):
+        # The order of the nested loops run_experiment.py used to have, the
+        #  last range outermost and the first innermost.
+
+        expected = []
+        for amount in HYPERPARAMETER_RANGES['point_mutation_amount']:
+            for chance in HYPERPARAMETER_RANGES['point_mutation_chance']:
+                for carryover in HYPERPARAMETER_RANGES['carryover_count']:
+                    for size in HYPERPARAMETER_RANGES['size_new_generations']:
+                        for generations in HYPERPARAMETER_RANGES['generations']:
+                            expected.append((generations, size, carryover, chance, amount))
+
+        configurations = sweep.Sweep(dict(HYPERPARAMETERS), HYPERPARAMETER_RANGES, 1).get_configurations()
+        self.assertEqual(
+            [tuple(configuration[key] for key in HYPERPARAMETER_RANGES) for experiment_id, configuration in configurations],
+            expected
+            )
+        for experiment_id, configuration in configurations:
+            self.assertEqual(configuration['experiment'], experiment_id)
+            self.assertEqual(configuration['game'], HYPERPARAMETERS['game'])
+
+class TestRun(unittest.TestCase):
+    def setUp(self):
+        self.hyperparameters = dict(HYPERPARAMETERS)
+        self.hyperparameters['collection_number'] = COLLECTION
+        self.run_configurations = []
+
+    def tearDown(self):
+        shutil.rmtree("experiments/" + COLLECTION, ignore_errors = True)
+
+    def run_configuration(self, hyperparameters):
+        # Stands in for running the experiment, scoring it by its chance.
+
+        self.run_configurations.append(dict(hyperparameters))
+        return hyperparameters['point_mutation_chance'] * 10, datetime.timedelta(0)
+
+    def test_skips_completed(self):
+        experiment_sweep = sweep.Sweep(self.hyperparameters, HYPERPARAMETER_RANGES, 1)
+        configurations = experiment_sweep.get_configurations()
+        os.makedirs("experiments/" + COLLECTION)
+        with open(experiment_sweep.get_completed_path(), "w") as completed_file:
+            completed_file.write(f"{configurations[0][0]},42.5\n{configurations[5][0]},7.25\n")
+
+        experiment_sweep = sweep.Sweep(self.hyperparameters, HYPERPARAMETER_RANGES, 1)
+        with mock.patch.object(sweep, "run_configuration", self.run_configuration):
+            results = experiment_sweep.run()
+        self.assertEqual(
+            [configuration['experiment'] for configuration in self.run_configurations],
+            [experiment_id for experiment_id, configuration in configurations if experiment_id not in (configurations[0][0], configurations[5][0])]
+            )
+        self.assertTrue(all(configuration['resume'] for configuration in self.run_configurations))
+        self.assertEqual(results[0], [configurations[0][0], 42.5])
+        self.assertEqual(results[5], [configurations[5][0], 7.25])
+        self.assertEqual(results[1], [configurations[1][0], configurations[1][1]['point_mutation_chance'] * 10])
+        self.assertEqual(experiment_sweep.generations_run, sum(
+            configuration['generations'] for configuration in self.run_configurations
+            ))
+
+        # Run again, everything is complete.
+
+        self.run_configurations = []
+        experiment_sweep = sweep.Sweep(self.hyperparameters, HYPERPARAMETER_RANGES, 1)
+        with mock.patch.object(sweep, "run_configuration", self.run_configuration):
+            self.assertEqual(experiment_sweep.run(), results)
+        self.assertEqual(self.run_configurations, [])
+        self.assertEqual(experiment_sweep.generations_run, 0)
+
+    def test_evaluation_workers_share_cores(self):
+        # Threads stand in for the sweep processes, so the patches apply.
+
+        for evaluation_workers, expected in ((None, 2), (1, 1), (6, 2)):
+            self.hyperparameters['evaluation_workers'] = evaluation_workers
+            self.run_configurations = []
+            experiment_sweep = sweep.Sweep(self.hyperparameters, HYPERPARAMETER_RANGES, 4)
+            with mock.patch.object(sweep, "run_configuration", self.run_configuration), \
+                mock.patch.object(concurrent.futures, "ProcessPoolExecutor", concurrent.futures.ThreadPoolExecutor), \
+                mock.patch.object(os, "cpu_count", lambda: 8):
+                experiment_sweep.run()
+            shutil.rmtree("experiments/" + COLLECTION)
+            self.assertEqual(len(self.run_configurations), 12)
+            for configuration in self.run_configurations:
+                self.assertEqual(configuration['evaluation_workers'], expected)
+
+    def test_one_sweep_worker_keeps_evaluation_workers(self):
+        experiment_sweep = sweep.Sweep(self.hyperparameters, HYPERPARAMETER_RANGES, 1)
+        with mock.patch.object(sweep, "run_configuration", self.run_configuration):
+            experiment_sweep.run()
+        for configuration in self.run_configurations:
+            self.assertIsNone(configuration['evaluation_workers'])
+
+class TestSuccessiveHalving(unittest.TestCase):
+    ranges = {
+        'generations': [9],
+        'size_new_generations': [8],
+        'carryover_count': [0],
+        'point_mutation_chance': [0.5, 0.9, 0.1, 0.7, 0.3, 0.8, 0.2, 0.6, 0.4],
+        'point_mutation_amount': [0.35]
+        }
+
+    def setUp(self):
+        self.hyperparameters = dict(HYPERPARAMETERS)
+        self.hyperparameters['collection_number'] = COLLECTION
+        self.run_rungs = []
+        self.interrupt_after = None
+
+    def tearDown(self):
+        shutil.rmtree("experiments/" + COLLECTION, ignore_errors = True)
+
+    def run_configuration(self, hyperparameters):
+        # Stands in for running the experiment, scoring it by its chance.
+
+        if self.interrupt_after is not None and len(self.run_rungs) == self.interrupt_after:
+            raise KeyboardInterrupt
+        self.run_rungs.append((hyperparameters['point_mutation_chance'], hyperparameters['generations']))
+        self.assertTrue(hyperparameters['checkpoint'])
+        self.assertTrue(hyperparameters['resume'])
+        return hyperparameters['point_mutation_chance'] * 10 + hyperparameters['generations'], datetime.timedelta(0)
+
+    def run_sweep(self):
+        experiment_sweep = sweep.Sweep(self.hyperparameters, self.ranges, 1)
+        with mock.patch.object(sweep, "run_configuration", self.run_configuration):
+            results = experiment_sweep.run_successive_halving(None, 1, 3)
+        return experiment_sweep, results
+
+    def test_promotion(self):
+        experiment_sweep, results = self.run_sweep()
+        chances = self.ranges['point_mutation_chance']
+        self.assertEqual(self.run_rungs, [(chance, 1) for chance in chances] + [(0.9, 3), (0.8, 3), (0.7, 3), (0.9, 9)])
+        last_rungs = {0.9: 9, 0.8: 3, 0.7: 3}
+        self.assertEqual(
+            [fitness for experiment_id, fitness in results],
+            [chance * 10 + last_rungs.get(chance, 1) for chance in chances]
+            )
+        self.assertEqual(list(experiment_sweep.completed), [results[1][0]])
+        self.assertEqual(experiment_sweep.generations_run, 9 + 3 * 2 + 6)
+
+    def test_ranked_at_same_generations(self):
+        # A configuration completed by an earlier sweep, with a high fitness
+        #  after all its generations but a low one in the first rung, is not
+        #  continued over those that did better in the first rung.
+
+        experiment_sweep = sweep.Sweep(self.hyperparameters, self.ranges, 1)
+        configurations = experiment_sweep.get_configurations()
+        os.makedirs("experiments/" + COLLECTION)
+        with open(experiment_sweep.get_completed_path(), "w") as completed_file:
+            completed_file.write(f"{configurations[2][0]},999.0\n")
+        with open(experiment_sweep.get_rungs_path(), "w") as rungs_file:
+            rungs_file.write(f"1,{configurations[2][0]},2.0\n")
+
+        experiment_sweep, results = self.run_sweep()
+        self.assertNotIn((0.1, 1), self.run_rungs)
+        self.assertEqual([rung for rung in self.run_rungs if rung[1] > 1], [(0.9, 3), (0.8, 3), (0.7, 3), (0.9, 9)])
+        self.assertEqual(results[2], [configurations[2][0], 999.0])
+
+    def test_restart(self):
+        experiment_sweep, expected = self.run_sweep()
+        expected_rungs = self.run_rungs
+        shutil.rmtree("experiments/" + COLLECTION)
+
+        # Interrupted part way through the second rung, then run again.
+
+        self.run_rungs = []
+        self.interrupt_after = 10
+        with self.assertRaises(KeyboardInterrupt):
+            self.run_sweep()
+        self.assertEqual(self.run_rungs, expected_rungs[:10])
+
+        self.run_rungs = []
+        self.interrupt_after = None
+        experiment_sweep, results = self.run_sweep()
+        self.assertEqual(results, expected)
+        self.assertEqual(self.run_rungs, expected_rungs[10:])
+        with open(experiment_sweep.get_rungs_path()) as rungs_file:
+            self.assertEqual(len(rungs_file.readlines()), len(expected_rungs))
+
+        # And again, with nothing left to run.
+
+        self.run_rungs = []
+        experiment_sweep, results = self.run_sweep()
+        self.assertEqual(results, expected)
+        self.assertEqual(self.run_rungs, [])
+        self.assertEqual(experiment_sweep.generations_run, 0)
+
+if __name__ == '__main__':
+    unittest.main()